@@ -1,8 +1,15 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Callable, List, Optional, Literal
 import os
+import asyncio
+import json
+import time
+import threading
+import traceback
 from datetime import datetime
 
 # Add parent directory to path for imports
@@ -11,8 +18,15 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from processing.video_processor import VideoProcessor
 from processing.indexer import MultiVectorIndexer
+from processing.embedding_cache import EmbeddingCache
+from processing.artifact_cache import TranscriptCache
 from processing.reranker import Reranker
-from processing.llm_integration import LLMClient
+from processing.llm_integration import LLMClient, TimestampExtractor, AnswerStreamError, ANSWER_ERROR_PREFIX
+from processing.answer_cache import AnswerCache
+from processing.jobs import IngestionQueue, IngestionJob, QueueFullError
+from processing.worker_stats import WorkerRegistry, memory_usage
+from processing import metrics
+from processing.metrics import span
 
 app = FastAPI(title="Video RAG API", version="1.0.0")
 
@@ -25,80 +39,521 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize components
-video_processor = VideoProcessor()
-indexer = MultiVectorIndexer()
-reranker = Reranker()
+async def record_timings(request: Request, call_next):
+    """Per-request Server-Timing header with the stages it ran, and a request latency histogram"""
+    spans = metrics.start_request()
+    start = time.perf_counter()
+    response = await call_next(request)
+    seconds = time.perf_counter() - start
+    response.headers["Server-Timing"] = metrics.server_timing(spans, seconds)
+    route = request.scope.get("route")
+    metrics.REQUEST_SECONDS.observe(
+        (request.method, route.path if route is not None else "unmatched", str(response.status_code)), seconds)
+    return response
+
+# An HTTP middleware wraps every response (streams included) in an extra task
+# and queue, so with METRICS_ENABLED=0 it is not installed at all
+if metrics.ENABLED:
+    app.middleware("http")(record_timings)
+
+# Deployment role: "ingest" replicas only process videos, "query" replicas
+# only answer queries, "all" does both. Models a role never uses are not loaded.
+ROLE = os.getenv("VIDEO_RAG_ROLE", "all")
+if ROLE not in ("all", "ingest", "query"):
+    raise ValueError(f"Unknown VIDEO_RAG_ROLE: {ROLE}")
+SERVES_INGEST = ROLE in ("all", "ingest")
+SERVES_QUERY = ROLE in ("all", "query")
+# Ingestion jobs, their concurrency limit, URL dedup and per-video locks live
+# in process memory (/jobs/{id} only finds jobs of the worker that took them),
+# so only query replicas may run more than one uvicorn worker
+if SERVES_INGEST and int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+    raise ValueError(f"VIDEO_RAG_ROLE={ROLE} needs WEB_CONCURRENCY=1; "
+                     "run extra workers as a VIDEO_RAG_ROLE=query replica")
+
+# Initialize components (cheap: models load lazily or in the warm-up thread)
+video_processor = VideoProcessor(
+    transcribe_workers=int(os.getenv("WHISPER_WORKERS", "1")),
+    transcribe_mode=os.getenv("WHISPER_TRANSCRIBE_MODE", "single"),
+    sentence_splitter=os.getenv("SENTENCE_SPLITTER", "parser"),
+    stream_window_seconds=float(os.getenv("STREAM_WINDOW_SECONDS", "60")),
+    transcript_cache=TranscriptCache() if os.getenv("TRANSCRIPT_CACHE", "1") == "1" else None
+) if SERVES_INGEST else None
+indexer = MultiVectorIndexer(
+    corpus_enabled=os.getenv("CORPUS_INDEX", "1") == "1",
+    embedding_cache=EmbeddingCache() if os.getenv("EMBEDDING_CACHE", "1") == "1" else None,
+    # Saved indexes are memory-mapped, so uvicorn --workers (WEB_CONCURRENCY)
+    # share their pages instead of each loading a private copy
+    mmap_indexes=os.getenv("INDEX_MMAP", "1") == "1",
+    # Sentence and section vectors for search_mode="hierarchical" (opt-in:
+    # they double the embedding work of every ingestion)
+    hierarchical=os.getenv("HIERARCHICAL_INDEX", "0") == "1",
+    section_chunks=int(os.getenv("SECTION_CHUNKS", "4"))
+)
+reranker = Reranker() if SERVES_QUERY else None
 llm_client = LLMClient()
+answer_cache = AnswerCache(indexer.dimension) if SERVES_QUERY and os.getenv("ANSWER_CACHE", "1") == "1" else None
+ingestion_queue = IngestionQueue(
+    video_processor,
+    indexer,
+    max_concurrent=int(os.getenv("MAX_CONCURRENT_INGESTIONS", "2")),
+    max_pending=int(os.getenv("MAX_PENDING_INGESTIONS", "16"))
+) if SERVES_INGEST else None
+
+MAX_BATCH_QUERIES = int(os.getenv("MAX_BATCH_QUERIES", "1000"))
+
+# Every worker process publishes its memory use; /workers lists them all
+worker_registry = WorkerRegistry(
+    interval=float(os.getenv("WORKER_REPORT_SECONDS", "10")),
+    role=ROLE,
+    extra=lambda: {"indexes_loaded": indexer.index_cache.stats()['entries']}
+)
+
+# Readiness: set once every model this role needs has been loaded
+warm_up_done = threading.Event()
+warm_up_error: Optional[str] = None
+
+def warm_up():
+    global warm_up_error
+    try:
+        for component in (indexer, reranker, video_processor):
+            if component is not None:
+                component.warm_up()
+    except Exception as e:
+        traceback.print_exc()
+        warm_up_error = str(e)
+    finally:
+        warm_up_done.set()
+
+def require(serves: bool, capability: str):
+    """Reject requests this replica's role does not handle"""
+    if not serves:
+        raise HTTPException(status_code=503, detail=f"This replica (role: {ROLE}) does not serve {capability}")
 
 class VideoProcessRequest(BaseModel):
     video_url: str
+    streaming: bool = False  # index window by window; queryable before the job completes
 
 class QueryRequest(BaseModel):
     video_id: str
     query: str
     top_k: Optional[int] = 5
     rerank_top_k: Optional[int] = 3
+    search_mode: Literal["dense", "hybrid", "hierarchical"] = "dense"
+    start_time: Optional[float] = None  # only search segments overlapping [start_time, end_time) seconds
+    end_time: Optional[float] = None
+    neighbors: int = 0  # widen each hit by this many segments on either side
+    merge_adjacent: bool = False  # join overlapping/touching hits into one passage
 
-class ProcessedVideoResponse(BaseModel):
-    video_id: str
-    segments: List[dict]
+class CorpusQueryRequest(BaseModel):
+    query: str
+    video_ids: Optional[List[str]] = None  # None searches every processed video
+    top_k: Optional[int] = 5
+    rerank_top_k: Optional[int] = 3
+
+class ProcessVideoResponse(BaseModel):
+    job_id: str
+    status: str
     message: str
 
+class Coverage(BaseModel):
+    indexed_seconds: float  # audio covered by the index, from the start of the video
+    duration_seconds: Optional[float] = None
+    fraction: Optional[float] = None
+    complete: bool = True
+
 class QueryResponse(BaseModel):
     answer: str
     relevant_segments: List[dict]
     timestamps: List[float]
+    coverage: Optional[Coverage] = None
 
-@app.post("/process_video", response_model=ProcessedVideoResponse)
+class BatchQueryRequest(BaseModel):
+    video_id: str
+    queries: List[str]
+    top_k: Optional[int] = 5
+    rerank_top_k: Optional[int] = 3
+    search_mode: Literal["dense", "hybrid", "hierarchical"] = "dense"
+    start_time: Optional[float] = None
+    end_time: Optional[float] = None
+    neighbors: int = 0
+    merge_adjacent: bool = False
+    generate_answers: bool = False  # retrieval and reranking only unless set
+    max_concurrency: Optional[int] = 8  # LLM calls in flight for this batch
+
+class BatchQueryResult(BaseModel):
+    query: str
+    relevant_segments: List[dict]
+    answer: Optional[str] = None
+    timestamps: List[float] = []
+
+class BatchQueryResponse(BaseModel):
+    results: List[BatchQueryResult]
+    coverage: Coverage
+    num_queries: int
+    seconds: float
+    queries_per_second: float
+
+@app.post("/process_video", response_model=ProcessVideoResponse, status_code=202)
 async def process_video(request: VideoProcessRequest):
-    """Process a video URL and create search index"""
+    """Queue a video URL for processing; poll /jobs/{job_id} for progress"""
+    require(SERVES_INGEST, "video processing")
     try:
-        segments, video_id = video_processor.process_video(request.video_url)
-        indexer.create_index(segments, video_id)
-        
-        return ProcessedVideoResponse(
-            video_id=video_id,
-            segments=[seg.dict() for seg in segments],
-            message="Video processed successfully"
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing video: {str(e)}")
+        job = ingestion_queue.submit(request.video_url, streaming=request.streaming)
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=f"Ingestion queue is full: {str(e)}")
+    
+    return ProcessVideoResponse(
+        job_id=job.job_id,
+        status=job.status,
+        message="Video queued for processing" if job.status == "queued" else "Video is already being processed"
+    )
+
+@app.get("/jobs/{job_id}", response_model=IngestionJob)
+async def get_job(job_id: str):
+    """Report the stage and progress of a processing job"""
+    require(SERVES_INGEST, "video processing")
+    job = ingestion_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
 @app.post("/query", response_model=QueryResponse)
 async def query_video(request: QueryRequest):
     """Query a processed video"""
+    # Search and rerank are CPU-bound and run on the thread pool (each request
+    # searches its own immutable VideoIndex handle); the LLM call is awaited
+    # so slow completions never block the event loop.
+    require(SERVES_QUERY, "queries")
+    # Invalid options are rejected before the answer cache encodes the query
+    options = retrieval_options(request)
     try:
-        # Load index if not already loaded
-        if not indexer.load_index(request.video_id):
+        # Load index (served from the in-memory cache when resident)
+        with span("query", "load_index"):
+            video_index = await run_in_threadpool(indexer.load_index, request.video_id)
+        if video_index is None:
             raise HTTPException(status_code=404, detail="Video not processed. Please process it first.")
         
+        # Repeated and near-duplicate questions are answered from the cache
+        cached, query_embedding = await lookup_answer(request, video_index)
+        if cached is not None:
+            return cached
+        
         # Initial vector search
-        initial_results = indexer.search(request.query, k=request.top_k)
+        initial_results = await run_in_threadpool(indexer.search, request.query, k=request.top_k,
+                                                  video_index=video_index, mode=request.search_mode,
+                                                  query_embedding=query_embedding, **options)
         
-        # Rerank results
-        reranked_results = reranker.rerank(request.query, initial_results)[:request.rerank_top_k]
+        response = await answer_query(request.query, initial_results, request.rerank_top_k)
+        response.coverage = coverage_of(video_index)
+        store_answer(request, video_index, query_embedding, response)
+        return response
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error querying video: {str(e)}")
+
+@app.post("/query/stream")
+async def query_video_stream(request: QueryRequest):
+    """Query a processed video, streaming the answer as server-sent events"""
+    require(SERVES_QUERY, "queries")
+    options = retrieval_options(request)
+    try:
+        with span("query", "load_index"):
+            video_index = await run_in_threadpool(indexer.load_index, request.video_id)
+        if video_index is None:
+            raise HTTPException(status_code=404, detail="Video not processed. Please process it first.")
+        cached, query_embedding = await lookup_answer(request, video_index)
+        if cached is not None:
+            return stream_cached(cached)
+        initial_results = await run_in_threadpool(indexer.search, request.query, k=request.top_k,
+                                                  video_index=video_index, mode=request.search_mode,
+                                                  query_embedding=query_embedding, **options)
+        return await stream_query(request.query, initial_results, request.rerank_top_k,
+                                  on_done=lambda response: store_answer(request, video_index, query_embedding, response),
+                                  coverage=coverage_of(video_index))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error querying video: {str(e)}")
+
+@app.post("/query_batch", response_model=BatchQueryResponse)
+async def query_batch(request: BatchQueryRequest):
+    """Answer many questions about one video in a single request"""
+    require(SERVES_QUERY, "queries")
+    if len(request.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_QUERIES} queries per batch")
+    options = retrieval_options(request)
+    try:
+        start = time.perf_counter()
+        with span("query", "load_index"):
+            video_index = await run_in_threadpool(indexer.load_index, request.video_id)
+        if video_index is None:
+            raise HTTPException(status_code=404, detail="Video not processed. Please process it first.")
         
-        # Generate answer with LLM
-        context = llm_client.format_context(reranked_results)
-        answer = llm_client.generate_answer(request.query, context)
+        # One encode call and one FAISS search for all queries, then every
+        # (query, segment) pair reranked in shared forward passes
+        initial_results = await run_in_threadpool(indexer.search_batch, request.queries, k=request.top_k,
+                                                  video_index=video_index, mode=request.search_mode,
+                                                  **options)
+        with span("query", "rerank"):
+            reranked = await run_in_threadpool(reranker.rerank_batch, request.queries, initial_results,
+                                               request.rerank_top_k)
+        results = [BatchQueryResult(query=query, relevant_segments=segments[:request.rerank_top_k])
+                   for query, segments in zip(request.queries, reranked)]
         
-        # Extract timestamps from answer
-        timestamps = llm_client.extract_timestamps(answer)
+        if request.generate_answers:
+            limit = asyncio.Semaphore(max(1, request.max_concurrency or 1))
+            
+            async def answer(result: BatchQueryResult):
+                async with limit:
+                    context = llm_client.format_context(result.relevant_segments)
+                    result.answer = await llm_client.generate_answer(result.query, context)
+                    result.timestamps = llm_client.extract_timestamps(result.answer)
+            
+            with span("query", "llm"):
+                await asyncio.gather(*(answer(result) for result in results))
         
-        return QueryResponse(
-            answer=answer,
-            relevant_segments=reranked_results,
-            timestamps=timestamps
+        seconds = time.perf_counter() - start
+        return BatchQueryResponse(
+            results=results,
+            coverage=coverage_of(video_index),
+            num_queries=len(results),
+            seconds=seconds,
+            queries_per_second=len(results) / seconds if seconds > 0 else 0.0
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error querying video: {str(e)}")
 
+@app.post("/query_corpus", response_model=QueryResponse)
+async def query_corpus(request: CorpusQueryRequest):
+    """Query across processed videos: the given video_ids, or all of them"""
+    require(SERVES_QUERY, "queries")
+    require(indexer.corpus_enabled, "cross-video queries (CORPUS_INDEX=0)")
+    try:
+        initial_results = await run_in_threadpool(indexer.search_corpus, request.query, k=request.top_k,
+                                                  video_ids=request.video_ids)
+        return await answer_query(request.query, initial_results, request.rerank_top_k)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error querying videos: {str(e)}")
+
+@app.post("/query_corpus/stream")
+async def query_corpus_stream(request: CorpusQueryRequest):
+    """Query across processed videos, streaming the answer as server-sent events"""
+    require(SERVES_QUERY, "queries")
+    require(indexer.corpus_enabled, "cross-video queries (CORPUS_INDEX=0)")
+    try:
+        initial_results = await run_in_threadpool(indexer.search_corpus, request.query, k=request.top_k,
+                                                  video_ids=request.video_ids)
+        return await stream_query(request.query, initial_results, request.rerank_top_k)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error querying videos: {str(e)}")
+
+def coverage_of(video_index) -> Coverage:
+    """How much of the video a handle covers; indexes without streaming coverage are complete"""
+    if video_index.coverage is None:
+        end_times = video_index.metadata.end_times
+        return Coverage(indexed_seconds=float(end_times.max()) if len(end_times) else 0.0, fraction=1.0)
+    coverage = Coverage(**video_index.coverage)
+    if coverage.duration_seconds:
+        coverage.fraction = min(1.0, coverage.indexed_seconds / coverage.duration_seconds)
+    return coverage
+
+def retrieval_options(request) -> dict:
+    """Time filter and context window arguments of indexer.search"""
+    time_range = None
+    if request.start_time is not None or request.end_time is not None:
+        if (request.start_time is not None and request.end_time is not None
+                and request.start_time >= request.end_time):
+            raise HTTPException(status_code=400, detail="start_time must be before end_time")
+        time_range = (request.start_time, request.end_time)
+    if request.neighbors < 0:
+        raise HTTPException(status_code=400, detail="neighbors must not be negative")
+    return {"time_range": time_range, "neighbors": request.neighbors, "merge_adjacent": request.merge_adjacent}
+
+def answer_options(request: QueryRequest) -> tuple:
+    """Request fields besides the question that change the response"""
+    return (request.top_k, request.rerank_top_k, request.search_mode, request.start_time,
+            request.end_time, request.neighbors, request.merge_adjacent)
+
+async def lookup_answer(request: QueryRequest, video_index) -> tuple:
+    """(cached response or None, query embedding or None)"""
+    if answer_cache is None:
+        return None, None
+    options = answer_options(request)
+    with span("query", "answer_cache"):
+        cached = answer_cache.get_exact(request.video_id, video_index.version, request.query, options)
+    if cached is not None:
+        return cached, None
+    with span("query", "encode"):
+        query_embedding = await run_in_threadpool(indexer.encode_query, request.query)
+    with span("query", "answer_cache"):
+        cached = answer_cache.get_similar(request.video_id, video_index.version, query_embedding, options)
+    return cached, query_embedding
+
+def store_answer(request: QueryRequest, video_index, query_embedding, response: QueryResponse):
+    if answer_cache is None or response.answer.startswith(ANSWER_ERROR_PREFIX):
+        return
+    answer_cache.put(request.video_id, video_index.version, request.query, query_embedding,
+                     answer_options(request), response)
+
+def server_sent_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def event_stream(events) -> StreamingResponse:
+    return StreamingResponse(events, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def stream_cached(response: QueryResponse) -> StreamingResponse:
+    """A cached response as the same event sequence, with the answer as a single token"""
+    def events():
+        if response.coverage is not None:
+            yield server_sent_event("coverage", response.coverage.dict())
+        yield server_sent_event("segments", response.relevant_segments)
+        yield server_sent_event("token", response.answer)
+        if response.timestamps:
+            yield server_sent_event("timestamps", response.timestamps)
+        yield server_sent_event("done", {"answer": response.answer, "timestamps": response.timestamps})
+    return event_stream(events())
+
+async def stream_query(query: str, initial_results: List[dict], rerank_top_k: int,
+                       on_done: Optional[Callable[[QueryResponse], None]] = None,
+                       coverage: Optional[Coverage] = None) -> StreamingResponse:
+    """Rerank, then stream events: "coverage" (single-video queries) and
+    "segments" first, then "token" and "timestamps" as the LLM answer
+    arrives, and "done" with the full answer last. A failed answer ends
+    with "error" instead of "done" and is not passed to on_done"""
+    with span("query", "rerank"):
+        reranked_results = (await run_in_threadpool(reranker.rerank, query, initial_results,
+                                                    rerank_top_k))[:rerank_top_k]
+    context = llm_client.format_context(reranked_results)
+
+    async def events():
+        if coverage is not None:
+            yield server_sent_event("coverage", coverage.dict())
+        yield server_sent_event("segments", reranked_results)
+        extractor = TimestampExtractor()
+        answer = ""
+        # Headers are already sent by now, so this only reaches the histograms
+        try:
+            with span("query", "llm"):
+                async for token in llm_client.stream_answer(query, context):
+                    answer += token
+                    yield server_sent_event("token", token)
+                    new_timestamps = extractor.feed(token)
+                    if new_timestamps:
+                        yield server_sent_event("timestamps", extractor.timestamps)
+        except AnswerStreamError as e:
+            yield server_sent_event("error", {"detail": str(e)})
+            return
+        if extractor.finish():
+            yield server_sent_event("timestamps", extractor.timestamps)
+        yield server_sent_event("done", {"answer": answer, "timestamps": extractor.timestamps})
+        if on_done is not None:
+            on_done(QueryResponse(answer=answer, relevant_segments=reranked_results,
+                                  timestamps=extractor.timestamps, coverage=coverage))
+
+    return event_stream(events())
+
+async def answer_query(query: str, initial_results: List[dict], rerank_top_k: int) -> QueryResponse:
+    """Rerank retrieved segments and generate the LLM answer"""
+    # Rerank results
+    with span("query", "rerank"):
+        reranked_results = (await run_in_threadpool(reranker.rerank, query, initial_results,
+                                                    rerank_top_k))[:rerank_top_k]
+    
+    # Generate answer with LLM
+    context = llm_client.format_context(reranked_results)
+    with span("query", "llm"):
+        answer = await llm_client.generate_answer(query, context)
+    
+    # Extract timestamps from answer
+    with span("query", "extract_timestamps"):
+        timestamps = llm_client.extract_timestamps(answer)
+    
+    return QueryResponse(
+        answer=answer,
+        relevant_segments=reranked_results,
+        timestamps=timestamps
+    )
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "timestamp": datetime.now()}
+    """Liveness: the process is up and serving HTTP (models may still be loading)"""
+    return {"status": "healthy", "role": ROLE, "timestamp": datetime.now()}
+
+def model_status() -> dict:
+    components = {}
+    for component in (video_processor, indexer, reranker):
+        if component is not None:
+            for model in component.models:
+                components[model.name] = model.status()
+    return components
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: every model this replica's role needs is loaded"""
+    ready = warm_up_done.is_set() and warm_up_error is None
+    body = {"status": "ready" if ready else "loading", "role": ROLE,
+            "error": warm_up_error, "models": model_status()}
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+@app.get("/stats")
+def stats():
+    """Runtime statistics for in-memory caches"""
+    return collect_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text format: per-stage latency histograms, model load times, cache and index sizes"""
+    return PlainTextResponse(metrics.render(model_status(), collect_stats()),
+                             media_type="text/plain; version=0.0.4")
+
+@app.get("/workers")
+def workers():
+    """Memory use of every worker process serving from this data directory"""
+    reports = worker_registry.report()
+    return {
+        "workers": reports,
+        "total_rss_bytes": sum(r['memory'].get('rss_bytes', 0) for r in reports),
+        "total_pss_bytes": sum(r['memory'].get('pss_bytes', 0) for r in reports)
+    }
+
+def collect_stats() -> dict:
+    return {
+        "process": memory_usage(),
+        "index_cache": indexer.index_cache.stats(),
+        # Scrapes must not trigger the corpus backfill on a fresh deployment
+        "corpus_index": indexer.corpus_stats(),
+        "embedding_cache": indexer.embedding_cache.stats() if indexer.embedding_cache else None,
+        "transcript_cache": (video_processor.transcript_cache.stats()
+                             if video_processor and video_processor.transcript_cache else None),
+        "ingestion_jobs": ingestion_queue.stats() if ingestion_queue else None,
+        "reranker": reranker.stats() if reranker else None,
+        "llm": llm_client.stats(),
+        "answer_cache": answer_cache.stats() if answer_cache else None
+    }
+
+@app.on_event("startup")
+def start_warm_up():
+    # Load models in the background so /health answers immediately
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    worker_registry.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    worker_registry.stop()
+    await llm_client.aclose()
+    if ingestion_queue is not None:
+        ingestion_queue.shutdown()
+    if video_processor is not None:
+        video_processor.shutdown()
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -15,6 +15,16 @@ st.set_page_config(
 
 st.title("🎥 Real-Time Adaptive RAG System for Long-Form Video QA")
 
+def read_events(response):
+    """Yield (event, data) pairs from a server-sent event stream as they arrive"""
+    buffer = ""
+    for chunk in response.iter_content(chunk_size=None, decode_unicode=True):
+        buffer += chunk
+        while "\n\n" in buffer:
+            message, buffer = buffer.split("\n\n", 1)
+            fields = dict(line.split(": ", 1) for line in message.splitlines())
+            yield fields["event"], json.loads(fields["data"])
+
 # Initialize session state
 if "processed_videos" not in st.session_state:
     st.session_state.processed_videos = {}
@@ -26,26 +36,48 @@ with st.sidebar:
     st.header("Video Processing")
     
     video_url = st.text_input("Enter YouTube Video URL:", "")
+    streaming = st.checkbox("Query while indexing", help="Index the video window by window so questions can be asked before it is fully processed")
     
     if st.button("Process Video"):
         if video_url:
-            with st.spinner("Processing video (this may take a while)..."):
-                try:
-                    response = requests.post(
-                        f"{BACKEND_URL}/process_video",
-                        json={"video_url": video_url}
-                    )
+            try:
+                response = requests.post(
+                    f"{BACKEND_URL}/process_video",
+                    json={"video_url": video_url, "streaming": streaming}
+                )
+                
+                if response.status_code == 202:
+                    job_id = response.json()["job_id"]
+                    progress_bar = st.progress(0, text="Queued...")
                     
-                    if response.status_code == 200:
-                        result = response.json()
-                        video_id = result["video_id"]
-                        st.session_state.processed_videos[video_id] = result
+                    # Poll the job until ingestion finishes
+                    while True:
+                        job = requests.get(f"{BACKEND_URL}/jobs/{job_id}").json()
+                        stage = job["stage"] or "queued"
+                        progress_bar.progress(int(job["progress"]), text=f"{stage.capitalize()}... {job['progress']:.0f}%")
+                        if job["status"] in ("completed", "failed"):
+                            break
+                        if streaming and job["num_segments"]:
+                            # Queryable now; indexing continues in the background
+                            break
+                        time.sleep(2)
+                    
+                    if job["status"] == "running":
+                        video_id = job["video_id"]
+                        st.session_state.processed_videos[video_id] = job
+                        st.session_state.current_video_id = video_id
+                        st.info(f"Video {video_id} is queryable while indexing continues")
+                    elif job["status"] == "completed":
+                        video_id = job["video_id"]
+                        st.session_state.processed_videos[video_id] = job
                         st.session_state.current_video_id = video_id
                         st.success(f"Video processed successfully! ID: {video_id}")
                     else:
-                        st.error(f"Error processing video: {response.json()['detail']}")
-                except Exception as e:
-                    st.error(f"Error connecting to backend: {str(e)}")
+                        st.error(f"Error processing video: {job['error']}")
+                else:
+                    st.error(f"Error processing video: {response.json()['detail']}")
+            except Exception as e:
+                st.error(f"Error connecting to backend: {str(e)}")
         else:
             st.warning("Please enter a YouTube URL")
 
@@ -62,55 +94,78 @@ if st.session_state.current_video_id:
     video_data = st.session_state.processed_videos[video_id]
     
     st.header(f"Video ID: {video_id}")
-    st.write(f"Number of segments: {len(video_data['segments'])}")
+    if video_data["status"] == "completed":
+        st.write(f"Number of segments: {video_data['num_segments']}")
+    coverage_placeholder = st.empty()
     
     # Query section
     st.subheader("Ask a Question")
     query = st.text_input("Enter your question about the video:")
     
     if st.button("Get Answer") and query:
-        with st.spinner("Searching for relevant content and generating answer..."):
-            start_time = time.time()
+        start_time = time.time()
+        
+        try:
+            response = requests.post(
+                f"{BACKEND_URL}/query/stream",
+                json={
+                    "video_id": video_id,
+                    "query": query,
+                    "top_k": 10,
+                    "rerank_top_k": 5
+                },
+                stream=True
+            )
             
-            try:
-                response = requests.post(
-                    f"{BACKEND_URL}/query",
-                    json={
-                        "video_id": video_id,
-                        "query": query,
-                        "top_k": 10,
-                        "rerank_top_k": 5
-                    }
-                )
+            if response.status_code == 200:
+                st.subheader("Answer:")
+                answer_placeholder = st.empty()
+                latency_placeholder = st.empty()
+                timestamps_placeholder = st.empty()
+                segments_container = st.container()
+                answer = ""
+                first_token_time = None
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    end_time = time.time()
-                    
-                    # Display answer
-                    st.subheader("Answer:")
-                    st.write(result["answer"])
-                    
-                    # Display latency
-                    st.write(f"Response time: {end_time - start_time:.2f} seconds")
-                    
-                    # Display relevant segments
-                    st.subheader("Relevant Video Segments:")
-                    for i, segment in enumerate(result["relevant_segments"]):
-                        with st.expander(f"Segment {i+1} (Time: {segment['start_time']:.2f}s - {segment['end_time']:.2f}s, Score: {segment['rerank_score']:.4f})"):
-                            st.write(segment["text"])
-                    
-                    # Display extracted timestamps
-                    if result["timestamps"]:
-                        st.subheader("Key Timestamps:")
-                        for ts in result["timestamps"]:
-                            st.write(f"- {timedelta(seconds=int(ts))}")
+                for event, data in read_events(response):
+                    if event == "coverage":
+                        if not data["complete"]:
+                            duration = f" of {timedelta(seconds=int(data['duration_seconds']))}" if data["duration_seconds"] else ""
+                            coverage_placeholder.write(f"Still indexing: answering over the first {timedelta(seconds=int(data['indexed_seconds']))}{duration}")
+                    elif event == "segments":
+                        # Display relevant segments while the answer is generated
+                        with segments_container:
+                            st.subheader("Relevant Video Segments:")
+                            for i, segment in enumerate(data):
+                                with st.expander(f"Segment {i+1} (Time: {segment['start_time']:.2f}s - {segment['end_time']:.2f}s, Score: {segment['rerank_score']:.4f})"):
+                                    st.write(segment["text"])
+                        answer_placeholder.write("Generating answer...")
+                    elif event == "token":
+                        if first_token_time is None:
+                            first_token_time = time.time()
+                        answer += data
+                        answer_placeholder.write(answer + "▌")
+                    elif event == "timestamps":
+                        # Display extracted timestamps as they appear in the answer
+                        with timestamps_placeholder.container():
+                            st.subheader("Key Timestamps:")
+                            for ts in data:
+                                st.write(f"- {timedelta(seconds=int(ts))}")
+                    elif event == "done":
+                        answer_placeholder.write(data["answer"])
+                    elif event == "error":
+                        answer_placeholder.write(answer)
+                        st.error(data["detail"])
                 
-                else:
-                    st.error(f"Error querying video: {response.json()['detail']}")
+                # Display latency
+                end_time = time.time()
+                if first_token_time is not None:
+                    latency_placeholder.write(f"First token: {first_token_time - start_time:.2f} seconds, full answer: {end_time - start_time:.2f} seconds")
             
-            except Exception as e:
-                st.error(f"Error connecting to backend: {str(e)}")
+            else:
+                st.error(f"Error querying video: {response.json()['detail']}")
+        
+        except Exception as e:
+            st.error(f"Error connecting to backend: {str(e)}")
 
 else:
     st.info("Please process a YouTube video using the sidebar to get started.")
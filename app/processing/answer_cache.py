@@ -0,0 +1,165 @@
+import faiss
+import numpy as np
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from .sparse_index import tokenize
+
+def normalize_query(query: str) -> str:
+    """Case, punctuation and whitespace-insensitive form of a question"""
+    return " ".join(tokenize(query))
+
+class _VideoAnswers:
+    """Cached answers of one video: exact lookup plus a small cosine index"""
+
+    def __init__(self, dimension: int, version: Tuple):
+        self.version = version
+        self.by_key: Dict[Tuple, int] = {}
+        self.entries: Dict[int, Dict] = {}
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+
+class AnswerCache:
+    """Per-video cache of final query responses.
+
+    A query hits exactly when its normalized text (and the request options
+    that shape the answer) match a cached one, or semantically when its
+    embedding has cosine similarity >= similarity_threshold with a cached
+    query of the same video and options. Entries expire after ttl_seconds,
+    the least recently used are evicted beyond max_entries, and a video's
+    entries are dropped once its index version changes (re-indexing).
+    """
+
+    def __init__(self, dimension: int, max_entries: int = None, ttl_seconds: float = None,
+                 similarity_threshold: float = None, neighbors: int = 4):
+        self.dimension = dimension
+        self.max_entries = max_entries or int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "10000"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+        self.similarity_threshold = similarity_threshold or float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.92"))
+        self.neighbors = neighbors
+        self._videos: Dict[str, _VideoAnswers] = {}
+        self._lru: "OrderedDict[int, str]" = OrderedDict()  # entry id -> video_id
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _bucket(self, video_id: str, version: Tuple) -> Optional[_VideoAnswers]:
+        bucket = self._videos.get(video_id)
+        if bucket is not None and bucket.version != version:
+            self._drop_video(video_id)
+            self.invalidations += 1
+            bucket = None
+        return bucket
+
+    def _drop_video(self, video_id: str):
+        bucket = self._videos.pop(video_id, None)
+        if bucket is not None:
+            for entry_id in bucket.entries:
+                self._lru.pop(entry_id, None)
+
+    def _remove(self, video_id: str, entry_id: int):
+        bucket = self._videos[video_id]
+        entry = bucket.entries.pop(entry_id)
+        bucket.by_key.pop(entry['key'], None)
+        bucket.index.remove_ids(np.array([entry_id], dtype=np.int64))
+        self._lru.pop(entry_id, None)
+        if not bucket.entries:
+            del self._videos[video_id]
+
+    def _fresh(self, video_id: str, entry_id: int) -> Optional[Dict]:
+        entry = self._videos[video_id].entries[entry_id]
+        if time.monotonic() - entry['created'] > self.ttl_seconds:
+            self._remove(video_id, entry_id)
+            self.expirations += 1
+            return None
+        self._lru.move_to_end(entry_id)
+        return entry
+
+    @staticmethod
+    def _normalized(embedding: np.ndarray) -> np.ndarray:
+        vector = np.array(embedding, dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def get_exact(self, video_id: str, version: Tuple, query: str, options: Hashable) -> Optional[Any]:
+        """Cached response for the same normalized question, if any (no embedding needed)"""
+        with self._lock:
+            bucket = self._bucket(video_id, version)
+            entry_id = bucket.by_key.get((options, normalize_query(query))) if bucket else None
+            entry = self._fresh(video_id, entry_id) if entry_id is not None else None
+            if entry is not None:
+                self.exact_hits += 1
+                return entry['response']
+            return None
+
+    def get_similar(self, video_id: str, version: Tuple, query_embedding: np.ndarray,
+                    options: Hashable) -> Optional[Any]:
+        """Cached response of the most similar question above the threshold, if any;
+        counts a miss otherwise (call after get_exact)"""
+        with self._lock:
+            bucket = self._bucket(video_id, version)
+            if bucket is not None and bucket.index.ntotal:
+                k = min(self.neighbors, bucket.index.ntotal)
+                similarities, ids = bucket.index.search(self._normalized(query_embedding), k)
+                for similarity, entry_id in zip(similarities[0], ids[0]):
+                    if similarity < self.similarity_threshold:
+                        break
+                    if entry_id < 0 or bucket.entries[entry_id]['key'][0] != options:
+                        continue
+                    entry = self._fresh(video_id, int(entry_id))
+                    if entry is not None:
+                        self.semantic_hits += 1
+                        return entry['response']
+                    break
+            self.misses += 1
+            return None
+
+    def put(self, video_id: str, version: Tuple, query: str, query_embedding: np.ndarray,
+            options: Hashable, response: Any):
+        with self._lock:
+            bucket = self._bucket(video_id, version)
+            if bucket is None:
+                bucket = self._videos[video_id] = _VideoAnswers(self.dimension, version)
+            key = (options, normalize_query(query))
+            if key in bucket.by_key:
+                self._remove(video_id, bucket.by_key[key])
+                bucket = self._videos.setdefault(video_id, bucket)
+            entry_id = self._next_id
+            self._next_id += 1
+            bucket.index.add_with_ids(self._normalized(query_embedding), np.array([entry_id], dtype=np.int64))
+            bucket.entries[entry_id] = {'key': key, 'response': response, 'created': time.monotonic()}
+            bucket.by_key[key] = entry_id
+            self._lru[entry_id] = video_id
+            while len(self._lru) > self.max_entries:
+                oldest_id, oldest_video = next(iter(self._lru.items()))
+                self._remove(oldest_video, oldest_id)
+                self.evictions += 1
+
+    def invalidate(self, video_id: str):
+        with self._lock:
+            if video_id in self._videos:
+                self._drop_video(video_id)
+                self.invalidations += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                'videos': len(self._videos),
+                'entries': len(self._lru),
+                'max_entries': self.max_entries,
+                'exact_hits': self.exact_hits,
+                'semantic_hits': self.semantic_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'hit_rate': hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+class TranscriptCache:
+    """Content-addressed store of raw Whisper transcriptions.
+
+    Entries are keyed by sha256(audio file bytes + Whisper model size), so
+    re-ingesting a video whose audio is already on disk skips Whisper and
+    only re-chunks, whatever URL or job asked for it. How the audio was
+    windowed (single, parallel or streaming) is not part of the key: any
+    full transcription of the same audio by the same model is reused.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("TRANSCRIPT_CACHE_DIR", "data/transcripts/raw")
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._digests: Dict[Tuple[str, int, int], str] = {}  # (path, size, mtime) -> file digest
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, audio_path: str, model_size: str) -> str:
+        stat = os.stat(audio_path)
+        file_key = (os.path.abspath(audio_path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(file_key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(audio_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(block)
+            digest = sha.hexdigest()
+            with self._lock:
+                self._digests[file_key] = digest
+        return hashlib.sha256(f"{digest}\0{model_size}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.path, f"{key}.json"), 'r') as f:
+                transcription = json.load(f)
+        except FileNotFoundError:
+            transcription = None
+        with self._lock:
+            if transcription is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return transcription
+
+    def put(self, key: str, transcription: Dict):
+        path = os.path.join(self.path, f"{key}.json")
+        tmp_path = path + f'.{os.getpid()}-{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(transcription, f)
+        os.replace(tmp_path, path)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': sum(1 for name in os.listdir(self.path) if name.endswith('.json')),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+class KeyedLocks:
+    """One lock per key, created on demand and dropped when nobody holds it.
+
+    Used to single-flight ingestion stages per video: a second job for the
+    same video waits for the first, then finds its artifacts cached. The
+    locks are per process; ingestions in other processes sharing the data
+    directory are not serialized (ingesting replicas run one worker).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks: Dict[str, list] = {}  # key -> [lock, holders and waiters]
+
+    @contextmanager
+    def hold(self, key: str):
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
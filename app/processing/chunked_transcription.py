@@ -0,0 +1,102 @@
+import numpy as np
+from typing import Dict, List, NamedTuple
+
+class AudioWindow(NamedTuple):
+    """A slice of audio to transcribe on its own, in seconds.
+
+    [start, end) is what gets transcribed. [core_start, core_end) is the part
+    this window is responsible for; the rest overlaps its neighbours and only
+    serves as context so words at the cut are not clipped.
+    """
+    start: float
+    end: float
+    core_start: float
+    core_end: float
+
+def frame_energy(audio: np.ndarray, sample_rate: int, frame_seconds: float = 0.05) -> np.ndarray:
+    """RMS energy of consecutive non-overlapping frames"""
+    frame = max(1, int(frame_seconds * sample_rate))
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    return np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1))
+
+def split_at_silence(audio: np.ndarray, sample_rate: int, window_seconds: float = 300.0,
+                     overlap_seconds: float = 2.0, search_seconds: float = 15.0,
+                     frame_seconds: float = 0.05) -> List[AudioWindow]:
+    """Split audio into overlapping windows cut at the quietest point near
+    every window_seconds boundary."""
+    duration = len(audio) / sample_rate
+    if duration <= window_seconds + search_seconds:
+        return [AudioWindow(0.0, duration, 0.0, duration)]
+
+    energy = frame_energy(audio, sample_rate, frame_seconds)
+    cuts = [0.0]
+    target = window_seconds
+    while target < duration - search_seconds:
+        lo = int(max(cuts[-1] + frame_seconds, target - search_seconds) / frame_seconds)
+        hi = int(min(duration, target + search_seconds) / frame_seconds)
+        quietest = lo + int(np.argmin(energy[lo:hi])) if hi > lo else lo
+        cut = (quietest + 0.5) * frame_seconds
+        cuts.append(cut)
+        target = cut + window_seconds
+    cuts.append(duration)
+
+    return [
+        AudioWindow(max(0.0, core_start - overlap_seconds),
+                    min(duration, core_end + overlap_seconds),
+                    core_start, core_end)
+        for core_start, core_end in zip(cuts[:-1], cuts[1:])
+    ]
+
+def stitch_transcriptions(results: List[Dict], windows: List[AudioWindow]) -> Dict:
+    """Merge per-window Whisper results into one transcription.
+
+    Timestamps are shifted by each window's start. A word is kept only by the
+    window whose core contains its midpoint, which drops the duplicates
+    transcribed twice in the overlaps. Segments are rebuilt from the
+    surviving words, so the output has the same shape as a single
+    model.transcribe() call.
+    """
+    segments = []
+    language = None
+    for i, (result, window) in enumerate(zip(results, windows)):
+        language = language or result.get('language')
+        segments.extend(stitch_window(result, window, last=i == len(windows) - 1, first_id=len(segments)))
+
+    return {
+        'text': "".join(segment['text'] for segment in segments),
+        'segments': segments,
+        'language': language
+    }
+
+def stitch_window(result: Dict, window: AudioWindow, last: bool, first_id: int = 0) -> List[Dict]:
+    """The segments one window contributes to the stitched transcription
+    (see stitch_transcriptions), numbered from first_id"""
+    segments = []
+    offset = window.start
+
+    def owned(start, end):
+        midpoint = (start + end) / 2
+        return window.core_start <= midpoint and (midpoint < window.core_end or last)
+
+    for segment in result['segments']:
+        words = [dict(word, start=word['start'] + offset, end=word['end'] + offset)
+                 for word in segment.get('words', [])]
+
+        if words:
+            words = [word for word in words if owned(word['start'], word['end'])]
+            if not words:
+                continue
+            text = "".join(word['word'] for word in words)
+            start, end = words[0]['start'], words[-1]['end']
+        else:
+            start, end = segment['start'] + offset, segment['end'] + offset
+            if not owned(start, end):
+                continue
+            text = segment['text']
+
+        segments.append(dict(segment, id=first_id + len(segments), start=start, end=end,
+                             text=text, words=words))
+    return segments
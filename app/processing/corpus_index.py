@@ -0,0 +1,296 @@
+import faiss
+import numpy as np
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterable, List, Optional, Tuple
+from .generations import Generations, remove_file
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of one process are serialized
+    fcntl = None
+
+class _ReadWriteLock:
+    """Many concurrent readers or one writer"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+
+    def acquire_read(self):
+        with self._cond:
+            while self._writer:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        with self._cond:
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writer = True
+
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+class CorpusIndex:
+    """Approximate (HNSW) index over the segments of every processed video.
+
+    Row i of the HNSW graph maps back to (video_ordinal[i], local_row[i]),
+    i.e. a row of that video's own index metadata. HNSW cannot delete
+    vectors, so re-adding a video tombstones its old rows and appends new
+    ones; searches skip dead rows and can be restricted to a set of videos
+    through a FAISS IDSelectorBitmap. Once more than compact_dead_fraction
+    of the rows are dead, the graph is rebuilt from the live rows.
+
+    Several processes may add videos to the same corpus: add_video holds a
+    lock file while it reloads the corpus from disk, appends and saves, so
+    no process overwrites another's videos. Each save writes a new
+    generation of the index and row files and then replaces
+    corpus.manifest.json, which names them, so readers never pair an index
+    with rows from another save. Every save rewrites the whole index (about
+    4 * dimension bytes plus the graph links per row) while holding the lock
+    file and the write lock, so searches in this process and adds from
+    other processes wait for it; add many videos with save=False and save
+    once where possible.
+    """
+
+    def __init__(self, dimension: int, path: str = 'data/indexes', m: int = 32,
+                 ef_construction: int = 80, ef_search: int = 128,
+                 compact_dead_fraction: float = 0.25):
+        self.dimension = dimension
+        self.path = path
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.compact_dead_fraction = compact_dead_fraction
+        # corpus.{generation}.index/.rows.npz, named by corpus.manifest.json
+        self._generations = Generations(path, 'corpus')
+        self._lock = _ReadWriteLock()
+        self._loaded_version = None
+        self._reset()
+        if self.exists():
+            self._load()
+
+    @property
+    def manifest_path(self) -> str:
+        return self._generations.manifest_path
+
+    @property
+    def lock_path(self) -> str:
+        return f'{self.path}/corpus.lock'
+
+    # Files of a corpus saved before manifests
+    @property
+    def legacy_index_path(self) -> str:
+        return f'{self.path}/corpus.index'
+
+    @property
+    def legacy_rows_path(self) -> str:
+        return f'{self.path}/corpus_rows.npz'
+
+    def _new_index(self) -> faiss.IndexHNSWFlat:
+        index = faiss.IndexHNSWFlat(self.dimension, self.m)
+        index.hnsw.efConstruction = self.ef_construction
+        return index
+
+    def _reset(self):
+        self.index = self._new_index()
+        self.video_ids: List[str] = []
+        self.video_ordinal = np.zeros(0, dtype=np.int32)
+        self.local_row = np.zeros(0, dtype=np.int32)
+        self.alive = np.zeros(0, dtype=bool)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path) or (
+            os.path.exists(self.legacy_index_path) and os.path.exists(self.legacy_rows_path))
+
+    @contextmanager
+    def file_lock(self):
+        """Exclusive across processes (and threads) sharing path, for a
+        read-modify-save of the corpus files. Not reentrant."""
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.lock_path, 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _version(self):
+        """Inode and mtime of the manifest (every save replaces it), or of
+        the row file for a corpus saved before manifests"""
+        version = self._generations.version()
+        if version is not None:
+            return version
+        try:
+            stat = os.stat(self.legacy_rows_path)
+            return (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            return None
+
+    def refresh(self):
+        """Reload from disk if another process saved a newer corpus"""
+        version = self._version()
+        if version is None or version == self._loaded_version:
+            return
+        self._lock.acquire_write()
+        try:
+            if self._version() != self._loaded_version:
+                self._load()
+        finally:
+            self._lock.release_write()
+
+    def _load(self):
+        for attempt in range(3):
+            try:
+                return self._load_files()
+            except FileNotFoundError:
+                # Saved twice between reading the manifest and opening the
+                # files it named; read it again
+                if attempt == 2:
+                    raise
+
+    def _load_files(self):
+        version, manifest = self._generations.read_manifest()
+        if manifest is not None:
+            index_path = self._generations.path(manifest['index'])
+            rows_path = self._generations.path(manifest['rows'])
+        else:
+            version = self._version()
+            index_path, rows_path = self.legacy_index_path, self.legacy_rows_path
+        with np.load(rows_path) as rows:
+            video_ids = json.loads(str(rows['video_ids']))
+            video_ordinal = rows['video_ordinal']
+            local_row = rows['local_row']
+            alive = rows['alive']
+        self.index = faiss.read_index(index_path)
+        self.video_ids, self.video_ordinal, self.local_row, self.alive = video_ids, video_ordinal, local_row, alive
+        self._loaded_version = version
+
+    def save(self):
+        """Write the corpus as a new generation. Callers hold file_lock(), or
+        another process's save in between is overwritten."""
+        os.makedirs(self.path, exist_ok=True)
+        generations = self._generations
+        generation = generations.new_generation()
+        manifest = {
+            'generation': generation,
+            'index': generations.file_name(generation, 'index'),
+            'rows': generations.file_name(generation, 'rows.npz')
+        }
+        faiss.write_index(self.index, generations.path(manifest['index']))
+        with open(generations.path(manifest['rows']), 'wb') as f:
+            np.savez(f, video_ids=np.array(json.dumps(self.video_ids)),
+                     video_ordinal=self.video_ordinal, local_row=self.local_row, alive=self.alive)
+        generations.publish(manifest)
+        self._loaded_version = self._version()
+        # Files saved before manifests are no longer read
+        remove_file(self.legacy_index_path)
+        remove_file(self.legacy_rows_path)
+
+    def add_video(self, video_id: str, embeddings: np.ndarray, save: bool = True):
+        """Add (or replace) all segment vectors of one video.
+
+        With save, the corpus is first reloaded from disk under file_lock(),
+        so videos other processes added since it was read are kept. Without,
+        only this copy changes (the caller saves, holding file_lock()).
+        """
+        if save:
+            with self.file_lock():
+                self.refresh()
+                self._add(video_id, embeddings, save=True)
+        else:
+            self._add(video_id, embeddings, save=False)
+
+    def _add(self, video_id: str, embeddings: np.ndarray, save: bool):
+        self._lock.acquire_write()
+        try:
+            if video_id in self.video_ids:
+                ordinal = self.video_ids.index(video_id)
+                self.alive[self.video_ordinal == ordinal] = False
+            else:
+                ordinal = len(self.video_ids)
+                self.video_ids.append(video_id)
+
+            n = len(embeddings)
+            self.index.add(np.ascontiguousarray(embeddings, dtype=np.float32))
+            self.video_ordinal = np.concatenate([self.video_ordinal, np.full(n, ordinal, dtype=np.int32)])
+            self.local_row = np.concatenate([self.local_row, np.arange(n, dtype=np.int32)])
+            self.alive = np.concatenate([self.alive, np.ones(n, dtype=bool)])
+            if len(self.alive) - np.count_nonzero(self.alive) > self.compact_dead_fraction * len(self.alive):
+                self._compact()
+            if save:
+                self.save()
+        finally:
+            self._lock.release_write()
+
+    def _compact(self):
+        """Rebuild the graph from the live rows only (holding the write lock).
+        Costs as much as adding them all again, so it only runs once dead
+        rows pass compact_dead_fraction."""
+        live = np.flatnonzero(self.alive)
+        index = self._new_index()
+        index.add(self.index.reconstruct_batch(live))
+        self.index = index
+        self.video_ordinal = self.video_ordinal[live]
+        self.local_row = self.local_row[live]
+        self.alive = np.ones(len(live), dtype=bool)
+
+    def search(self, query_embedding: np.ndarray, k: int,
+               video_ids: Optional[Iterable[str]] = None) -> List[Tuple[str, int, float]]:
+        """Approximate nearest rows as (video_id, local_row, distance), best first"""
+        self._lock.acquire_read()
+        try:
+            ntotal = self.index.ntotal
+            if ntotal == 0:
+                return []
+
+            mask = self.alive
+            if video_ids is not None:
+                ordinals = [self.video_ids.index(v) for v in video_ids if v in self.video_ids]
+                mask = mask & np.isin(self.video_ordinal, ordinals)
+            selected = int(np.count_nonzero(mask))
+            if selected == 0:
+                return []
+
+            # A restrictive filter leaves few valid neighbours per graph hop,
+            # so widen the beam in proportion to how much is filtered out
+            ef = max(self.ef_search, k, min(2048, int(k * ntotal / selected)))
+            params = faiss.SearchParametersHNSW()
+            params.efSearch = ef
+            if selected < ntotal:
+                bitmap = np.packbits(mask, bitorder='little')
+                selector = faiss.IDSelectorBitmap(ntotal, faiss.swig_ptr(bitmap))
+                params.sel = selector
+
+            query = np.ascontiguousarray(query_embedding, dtype=np.float32).reshape(1, -1)
+            distances, indices = self.index.search(query, k, params=params)
+
+            results = []
+            for idx, distance in zip(indices[0], distances[0]):
+                if idx < 0:
+                    continue
+                results.append((self.video_ids[self.video_ordinal[idx]], int(self.local_row[idx]), float(distance)))
+            return results
+        finally:
+            self._lock.release_read()
+
+    def stats(self):
+        return {
+            'videos': len(self.video_ids),
+            'rows': int(self.index.ntotal),
+            'live_rows': int(np.count_nonzero(self.alive))
+        }
@@ -0,0 +1,87 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# Generations are zero-padded hex nanosecond timestamps, so they sort by age
+GENERATION_DIGITS = 16
+
+def remove_file(path: str):
+    # Processes that mapped the file keep its pages until they unmap it.
+    # Where a mapped file cannot be removed (Windows) a later save retries.
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class Generations:
+    """Files of one saved index, published through a manifest.
+
+    Each save writes its files under fresh names ({prefix}.{generation}.*)
+    and then replaces {prefix}.manifest.json, which names them, in one
+    rename. A reader in any process therefore opens either the previous set
+    or the new one, never a mix. The previous generation is kept for readers
+    that have just read the old manifest; older ones are removed.
+    """
+
+    def __init__(self, directory: str, prefix: str):
+        self.directory = directory
+        self.prefix = prefix
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.directory, f'{self.prefix}.manifest.json')
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @staticmethod
+    def new_generation() -> str:
+        return f'{time.time_ns():0{GENERATION_DIGITS}x}'
+
+    def file_name(self, generation: str, suffix: str) -> str:
+        return f'{self.prefix}.{generation}.{suffix}'
+
+    def generation_of(self, name: str) -> Optional[str]:
+        """Generation of a {prefix}.{generation}.* file name, else None"""
+        prefix = f'{self.prefix}.'
+        if not name.startswith(prefix):
+            return None
+        generation = name[len(prefix):].split('.', 1)[0]
+        if len(generation) != GENERATION_DIGITS or any(c not in '0123456789abcdef' for c in generation):
+            return None
+        return generation
+
+    def version(self) -> Optional[Tuple]:
+        """Inode and mtime of the manifest (every save replaces it), or None"""
+        try:
+            stat = os.stat(self.manifest_path)
+            return (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            return None
+
+    def read_manifest(self) -> Tuple[Optional[Tuple], Optional[Dict]]:
+        """(version, manifest) read from one open file, or (None, None)"""
+        try:
+            with open(self.manifest_path, 'r') as f:
+                stat = os.fstat(f.fileno())
+                return (stat.st_ino, stat.st_mtime_ns), json.load(f)
+        except FileNotFoundError:
+            return None, None
+
+    def publish(self, manifest: Dict):
+        """Replace the manifest with one naming manifest['generation']'s files
+        (already written), then remove generations older than the previous one"""
+        previous = self.read_manifest()[1]
+        tmp_path = f'{self.manifest_path}.{os.getpid()}-{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+        generation = manifest['generation']
+        oldest_kept = min(generation, previous['generation']) if previous else generation
+        for name in os.listdir(self.directory):
+            old_generation = self.generation_of(name)
+            if old_generation is not None and old_generation < oldest_kept:
+                remove_file(self.path(name))
@@ -0,0 +1,158 @@
+import re
+from dataclasses import dataclass
+from functools import cached_property
+from typing import List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from .metadata_store import SegmentStore
+from .video_processor import VideoSegment
+
+# Whisper output is punctuated, so sentence ends are a cheap regex away
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+def split_sentences(segments: List[VideoSegment], first_row: int = 0) -> List[VideoSegment]:
+    """Sentences of each chunk, as VideoSegments whose segment_id is the
+    chunk's row (first_row for segments[0]). Chunks do not keep Whisper's
+    per-sentence times, so a sentence's span is interpolated from its word
+    offsets within the chunk."""
+    sentences = []
+    for row, segment in enumerate(segments, start=first_row):
+        parts = [part for part in _SENTENCE_END.split(segment.text.strip()) if part]
+        total_words = sum(len(part.split()) for part in parts) or 1
+        seconds_per_word = (segment.end - segment.start) / total_words
+        words = 0
+        for part in parts:
+            start = segment.start + words * seconds_per_word
+            words += len(part.split())
+            sentences.append(VideoSegment(text=part, start=start, end=segment.start + words * seconds_per_word,
+                                          segment_id=row))
+    return sentences
+
+def _flat_index(vectors: np.ndarray) -> faiss.Index:
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    if len(vectors):
+        index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+    return index
+
+def _flat_vectors(index: faiss.IndexFlat) -> np.ndarray:
+    """Read-only (ntotal, d) view of a flat index's vectors, without copying
+    them (a memory-mapped index stays mapped). Valid while index is alive."""
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype=np.float32)
+    vectors = faiss.rev_swig_ptr(index.get_xb(), index.ntotal * index.d).reshape(index.ntotal, index.d)
+    vectors.flags.writeable = False
+    return vectors
+
+@dataclass(frozen=True)
+class Hierarchy:
+    """Section and sentence levels linked to one video's chunk index.
+
+    Sections are windows of section_chunks consecutive chunks: section i
+    covers chunk rows sections.segment_ids[i] up to the next section's first
+    row, and its vector is the normalized mean of those chunks' vectors.
+    Sentence j belongs to chunk row sentences.segment_ids[j]. Both levels
+    are in chunk order, so a run of chunks maps to one run of sentences.
+    Immutable, like the VideoIndex holding it.
+    """
+    section_index: faiss.Index
+    sections: SegmentStore
+    sentence_index: faiss.Index
+    sentences: SegmentStore
+    num_chunks: int
+
+    @classmethod
+    def build(cls, video_id: str, chunk_embeddings: np.ndarray, chunk_start_times: np.ndarray,
+              chunk_end_times: np.ndarray, sentences: List[VideoSegment], sentence_embeddings: np.ndarray,
+              section_chunks: int = 4) -> "Hierarchy":
+        starts = np.arange(0, len(chunk_embeddings), max(1, section_chunks), dtype=np.int64)
+        bounds = np.append(starts, len(chunk_embeddings))
+        pooled = np.add.reduceat(chunk_embeddings, starts, axis=0) if len(starts) else chunk_embeddings[:0]
+        pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        sections = SegmentStore.from_columns(
+            video_id, starts,
+            [chunk_start_times[first] for first in starts],
+            [np.max(chunk_end_times[first:last]) for first, last in zip(bounds[:-1], bounds[1:])],
+            [""] * len(starts)
+        )
+        sentence_store = SegmentStore.from_columns(
+            video_id,
+            [sentence.segment_id for sentence in sentences],
+            [sentence.start for sentence in sentences],
+            [sentence.end for sentence in sentences],
+            [sentence.text for sentence in sentences]
+        )
+        return cls(_flat_index(pooled), sections, _flat_index(sentence_embeddings), sentence_store,
+                   len(chunk_embeddings))
+
+    def chunk_rows(self, section_ids: np.ndarray) -> np.ndarray:
+        """Sorted chunk rows of the given sections"""
+        firsts = self.sections.segment_ids
+        bounds = np.append(firsts, self.num_chunks)
+        section_ids = np.sort(section_ids)
+        if len(section_ids) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([np.arange(bounds[s], bounds[s + 1]) for s in section_ids])
+
+    def descend(self, section_ids: np.ndarray, nearest_chunks: np.ndarray,
+                allowed: Optional[np.ndarray] = None) -> np.ndarray:
+        """Sorted chunk rows whose sentences a query searches: the chunks of
+        its nearest sections (FAISS ids, -1 padded), plus as many of its
+        nearest chunks, so a chunk its section's mean vector hides is
+        still reached"""
+        rows = self.chunk_rows(section_ids[section_ids >= 0])
+        if allowed is not None:
+            rows = np.intersect1d(rows, allowed, assume_unique=True)
+        return np.union1d(rows, nearest_chunks[:len(rows)])
+
+    def sections_of(self, chunk_rows: np.ndarray) -> np.ndarray:
+        """Sections containing any of the given chunk rows"""
+        return np.unique(np.searchsorted(self.sections.segment_ids, chunk_rows, side='right') - 1)
+
+    def sentence_runs(self, chunk_rows: np.ndarray) -> List[Tuple[int, int]]:
+        """Sentence rows of the given sorted chunk rows, as [low, high) runs"""
+        if len(chunk_rows) == 0:
+            return []
+        # Contiguous runs of chunks map to contiguous runs of sentences
+        breaks = np.flatnonzero(np.diff(chunk_rows) != 1) + 1
+        run_starts = chunk_rows[np.r_[0, breaks]]
+        run_ends = chunk_rows[np.r_[breaks - 1, len(chunk_rows) - 1]] + 1
+        parents = self.sentences.segment_ids
+        lows = np.searchsorted(parents, run_starts)
+        highs = np.searchsorted(parents, run_ends)
+        return [(low, high) for low, high in zip(lows.tolist(), highs.tolist()) if high > low]
+
+    def sentence_rows(self, chunk_rows: np.ndarray) -> np.ndarray:
+        """Sentence rows belonging to the given sorted chunk rows"""
+        runs = self.sentence_runs(chunk_rows)
+        if not runs:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([np.arange(low, high) for low, high in runs])
+
+    @cached_property
+    def _sentence_vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Sentence vectors (a view of the index) and their squared norms"""
+        vectors = _flat_vectors(self.sentence_index)
+        return vectors, np.einsum('ij,ij->i', vectors, vectors)
+
+    def search_sentences(self, query_embedding: np.ndarray, chunk_rows: np.ndarray,
+                         k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(distances, rows) of the k sentences of the given sorted chunk rows
+        nearest to the query, nearest first, as squared L2 like the index.
+        Only those sentences are scored: a FAISS ID selector would still
+        visit every row of the index."""
+        runs = self.sentence_runs(chunk_rows)
+        if not runs or k <= 0:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+        vectors, norms = self._sentence_vectors
+        query = np.ascontiguousarray(query_embedding, dtype=np.float32).reshape(-1)
+        # |x - q|^2 = |x|^2 - 2 x.q + |q|^2, over each contiguous run of rows
+        distances = np.concatenate([norms[low:high] - 2 * (vectors[low:high] @ query) for low, high in runs])
+        distances += query @ query
+        rows = np.concatenate([np.arange(low, high, dtype=np.int64) for low, high in runs])
+        if k < len(distances):
+            top = np.argpartition(distances, k - 1)[:k]
+            distances, rows = distances[top], rows[top]
+        order = np.argsort(distances, kind='stable')
+        return distances[order], rows[order]
@@ -0,0 +1,74 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+class IndexCache:
+    """LRU registry of loaded per-video indexes bounded by a memory budget"""
+
+    def __init__(self, max_bytes: Optional[int] = None, sizeof: Callable[[Any], int] = None):
+        if max_bytes is None:
+            max_bytes = int(os.getenv("INDEX_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or (lambda entry: 0)
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, video_id: str, version: Any = None) -> Optional[Any]:
+        """Return the cached entry for a video, or None if missing or stale"""
+        with self._lock:
+            if video_id in self._entries and self._versions[video_id] == version:
+                self._entries.move_to_end(video_id)
+                self.hits += 1
+                return self._entries[video_id]
+            self.misses += 1
+            self._remove(video_id)
+            return None
+
+    def put(self, video_id: str, entry: Any, version: Any = None):
+        """Insert an entry and evict least recently used ones over budget"""
+        size = self.sizeof(entry)
+        with self._lock:
+            self._remove(video_id)
+            if size > self.max_bytes:
+                return
+            self._entries[video_id] = entry
+            self._sizes[video_id] = size
+            self._versions[video_id] = version
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, video_id: str):
+        """Drop a video's entry, e.g. after its index was rewritten"""
+        with self._lock:
+            self._remove(video_id)
+
+    def _remove(self, video_id: str):
+        if video_id in self._entries:
+            del self._entries[video_id]
+            del self._versions[video_id]
+            self.current_bytes -= self._sizes.pop(video_id)
+
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters and current memory usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
@@ -1,86 +1,788 @@
 import faiss
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple, Callable
+from dataclasses import dataclass, replace
 import json
 import os
-from .video_processor import VideoSegment
+import threading
+from .video_processor import VideoSegment, ProgressCallback
+from .index_cache import IndexCache
+from .sparse_index import BM25Index, reciprocal_rank_fusion, top_k_positive
+from .corpus_index import CorpusIndex
+from .generations import Generations, remove_file
+from .metadata_store import SegmentStore
+from .hierarchy import Hierarchy, split_sentences
+from .embedding_cache import EmbeddingCache
+from .model_loader import LazyModel
+from .inference_backend import default_backend, load_embedder
+from .metrics import span
+
+SEARCH_MODES = ("dense", "hybrid", "hierarchical")
+
+INDEX_DIR = 'data/indexes'
+
+# Maps flat indexes, which IO_FLAG_MMAP alone copies; missing in older faiss
+_IO_FLAG_MMAP_IFC = getattr(faiss, 'IO_FLAG_MMAP_IFC', 0)
+
+def index_read_flags(mmap: bool) -> int:
+    """faiss.read_index flags. With mmap the vectors stay in the file's pages,
+    so every worker process searching the same index shares one copy
+    through the OS page cache. Mapped indexes are read-only: adding to one
+    aborts."""
+    if not mmap:
+        return 0
+    if not _IO_FLAG_MMAP_IFC:
+        print(f"Warning: faiss {faiss.__version__} has no IO_FLAG_MMAP_IFC, so flat indexes "
+              "are loaded into private memory in every worker; upgrade faiss-cpu to share them")
+    return faiss.IO_FLAG_MMAP | _IO_FLAG_MMAP_IFC
+
+@dataclass(frozen=True)
+class VideoIndex:
+    """Immutable handle to one video's loaded index and segment metadata.
+
+    Handles are never modified after creation, so any number of threads can
+    search the same or different videos at once. Re-indexing a video builds
+    a new handle instead of mutating the one in use.
+    """
+    video_id: str
+    index: faiss.Index
+    metadata: SegmentStore
+    version: Tuple = ()
+    sparse: Optional[BM25Index] = None
+    # Set while a streaming ingestion is still growing the index:
+    # {'indexed_seconds', 'duration_seconds', 'complete'}
+    coverage: Optional[Dict] = None
+    # Section and sentence levels for mode="hierarchical"
+    hierarchy: Optional[Hierarchy] = None
+    # Vectors are memory-mapped from the saved files (see index_read_flags)
+    mapped: bool = False
+
+def _estimate_index_bytes(video_index: VideoIndex) -> int:
+    """Approximate private resident size of a loaded video index. Pages of
+    memory-mapped files are shared by every worker and the OS can drop
+    them, so they do not count against the cache budget."""
+    indexes, stores = [video_index.index], [video_index.metadata]
+    if video_index.hierarchy is not None:
+        hierarchy = video_index.hierarchy
+        indexes += [hierarchy.section_index, hierarchy.sentence_index]
+        stores += [hierarchy.sections, hierarchy.sentences]
+    vector_bytes = 0 if video_index.mapped else sum(index.ntotal * index.d * 4 for index in indexes)
+    metadata_bytes = sum(store.private_nbytes for store in stores)
+    sparse_bytes = video_index.sparse.nbytes if video_index.sparse is not None else 0
+    return vector_bytes + metadata_bytes + sparse_bytes
 
 class MultiVectorIndexer:
-    def __init__(self, model_name='all-MiniLM-L6-v2'):
-        self.embedding_model = SentenceTransformer(model_name)
+    def __init__(self, model_name='all-MiniLM-L6-v2', cache_max_bytes: int = None,
+                 corpus_enabled: bool = True, embedding_cache: Optional[EmbeddingCache] = None,
+                 encode_batch_size: int = 128, backend: Optional[str] = None,
+                 mmap_indexes: bool = True, hierarchical: bool = False,
+                 section_chunks: int = 4):
+        self.model_name = model_name
+        # torch, torch-int8, onnx or onnx-int8 (see inference_backend)
+        self.backend = backend or default_backend()
+        self._embedding_model = LazyModel("embedding", lambda: load_embedder(model_name, self.backend))
+        # Cached vectors are only reused by the backend that produced them
+        self.cache_namespace = model_name if self.backend == "torch" else f"{model_name}@{self.backend}"
         self.dimension = 384  # Dimension of all-MiniLM-L6-v2 embeddings
-        self.index = None
-        self.metadata = []
+        self.embedding_cache = embedding_cache
+        self.encode_batch_size = encode_batch_size
+        # Most recently created/loaded handle, for single-threaded callers
+        # that call search() without passing a handle
+        self.active_index: Optional[VideoIndex] = None
+        self.index_cache = IndexCache(cache_max_bytes, sizeof=_estimate_index_bytes)
+        # Memory-map saved indexes so worker processes share their pages
+        self.read_flags = index_read_flags(mmap_indexes)
+        self.mapped = bool(self.read_flags & _IO_FLAG_MMAP_IFC)
+        # Also index sentences, and sections of section_chunks chunks, for
+        # mode="hierarchical" (about twice the embedding work per ingestion)
+        self.hierarchical = hierarchical
+        self.section_chunks = section_chunks
+        # Cross-video ANN index, kept in step with create_index when enabled
+        self.corpus_enabled = corpus_enabled
+        self._corpus: Optional[CorpusIndex] = None
+        self._corpus_lock = threading.Lock()
+    
+    @property
+    def embedding_model(self) -> SentenceTransformer:
+        return self._embedding_model.get()
+    
+    @property
+    def models(self) -> List[LazyModel]:
+        return [self._embedding_model]
+    
+    def warm_up(self):
+        """Load the embedding model (and corpus index, if enabled) now"""
+        self.embedding_model
+        if self.corpus_enabled:
+            self.corpus
+    
+    @property
+    def corpus(self) -> CorpusIndex:
+        """Cross-video HNSW index, backfilled from per-video indexes on first use"""
+        if not self.corpus_enabled:
+            # Not kept in step with create_index, so it would serve stale results
+            raise ValueError("The corpus index is disabled (corpus_enabled=False)")
+        with self._corpus_lock:
+            if self._corpus is None:
+                corpus = CorpusIndex(self.dimension)
+                if not corpus.exists():
+                    with corpus.file_lock():
+                        # Another replica may have backfilled it meanwhile
+                        corpus.refresh()
+                        if not corpus.exists():
+                            self._backfill_corpus(corpus)
+                self._corpus = corpus
+        return self._corpus
+    
+    def corpus_stats(self) -> Optional[Dict]:
+        """Corpus index stats, or None while it is not loaded (unlike corpus,
+        this never loads it or starts the backfill)"""
+        corpus = self._corpus
+        return corpus.stats() if corpus is not None else None
+    
+    def _backfill_corpus(self, corpus: CorpusIndex):
+        """Add every per-video index already on disk to an empty corpus
+        (holding its file_lock)"""
+        for video_id in self.saved_video_ids():
+            video_index = self.get_index(video_id)
+            if video_index is not None:
+                index = video_index.index
+                corpus.add_video(video_id, index.reconstruct_n(0, index.ntotal), save=False)
+        if corpus.video_ids:
+            corpus.save()
+    
+    @staticmethod
+    def saved_video_ids() -> List[str]:
+        """Videos with an index on disk, saved with a manifest or before manifests"""
+        if not os.path.isdir(INDEX_DIR):
+            return []
+        video_ids = set()
+        for name in os.listdir(INDEX_DIR):
+            if name.endswith('.manifest.json') and name != 'corpus.manifest.json':
+                video_ids.add(name[:-len('.manifest.json')])
+            elif name.endswith('.index') and name.count('.') == 1 and name != 'corpus.index':
+                video_ids.add(name[:-len('.index')])
+        return sorted(video_ids)
         
-    def generate_embeddings(self, segments: List[VideoSegment]) -> np.ndarray:
-        """Generate embeddings for text segments"""
+    def generate_embeddings(self, segments: List[VideoSegment],
+                            progress_callback: Optional[ProgressCallback] = None,
+                            batch_size: int = 1024,
+                            stats_callback: Optional[Callable[[Dict], None]] = None) -> np.ndarray:
+        """Generate embeddings for text segments.
+
+        With an embedding cache, only texts not seen before (for this model)
+        are encoded; stats_callback receives this call's hit/miss counts.
+        """
         texts = [seg.text for seg in segments]
-        return self.embedding_model.encode(texts)
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        
+        # Resolve cached vectors, then encode each distinct missing text once
+        missing = list(range(len(texts)))
+        keys = []
+        if self.embedding_cache is not None:
+            keys = [EmbeddingCache.key(self.cache_namespace, text) for text in texts]
+            cached = self.embedding_cache.get_many(list(dict.fromkeys(keys)), self.dimension)
+            missing = []
+            for i, key in enumerate(keys):
+                if key in cached:
+                    embeddings[i] = cached[key]
+                else:
+                    missing.append(i)
+        
+        first_of = {}
+        for i in missing:
+            first_of.setdefault(texts[i], i)
+        to_encode = list(first_of.values())
+        
+        # Encode in slices so progress can be reported between them
+        for start in range(0, len(to_encode), batch_size):
+            batch = to_encode[start:start + batch_size]
+            vectors = self.embedding_model.encode([texts[i] for i in batch],
+                                                  batch_size=self.encode_batch_size)
+            embeddings[batch] = vectors
+            if self.embedding_cache is not None:
+                self.embedding_cache.put_many([keys[i] for i in batch], vectors)
+            if progress_callback is not None:
+                progress_callback("embed", min(start + batch_size, len(to_encode)) / len(to_encode))
+        for i in missing:
+            embeddings[i] = embeddings[first_of[texts[i]]]
+        
+        if self.embedding_cache is not None:
+            hits = len(texts) - len(missing)
+            stats = {
+                'hits': hits,
+                'misses': len(missing),
+                'encoded': len(to_encode),
+                'hit_rate': hits / len(texts) if texts else 0.0
+            }
+            print(f"Embedding cache: {hits}/{len(texts)} hits, encoded {len(to_encode)} texts")
+            if stats_callback is not None:
+                stats_callback(stats)
+        return embeddings
     
-    def create_index(self, segments: List[VideoSegment], video_id: str):
+    def create_index(self, segments: List[VideoSegment], video_id: str,
+                     progress_callback: Optional[ProgressCallback] = None,
+                     stats_callback: Optional[Callable[[Dict], None]] = None) -> VideoIndex:
         """Create FAISS index with metadata"""
+        progress = progress_callback or (lambda stage, fraction: None)
+        
         print("Generating embeddings...")
-        embeddings = self.generate_embeddings(segments)
+        progress("embed", 0.0)
+        with span("ingest", "embed"):
+            embeddings = self.generate_embeddings(segments, progress_callback,
+                                                  stats_callback=stats_callback)
         
         print("Creating FAISS index...")
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.index.add(embeddings.astype(np.float32))
+        progress("index", 0.0)
+        with span("ingest", "build_index"):
+            index = faiss.IndexFlatL2(self.dimension)
+            index.add(embeddings.astype(np.float32))
         
         # Store metadata
-        self.metadata = []
-        for i, seg in enumerate(segments):
-            self.metadata.append({
-                'segment_id': seg.segment_id,
-                'start_time': seg.start,
-                'end_time': seg.end,
-                'text': seg.text,
-                'video_id': video_id
-            })
+        metadata = SegmentStore.from_columns(
+            video_id,
+            [seg.segment_id for seg in segments],
+            [seg.start for seg in segments],
+            [seg.end for seg in segments],
+            [seg.text for seg in segments]
+        )
+        
+        print("Creating BM25 index...")
+        with span("ingest", "build_bm25"):
+            sparse = BM25Index.build([seg.text for seg in segments])
         
+        hierarchy = None
+        if self.hierarchical:
+            print("Creating section and sentence indexes...")
+            sentences, sentence_embeddings = self.embed_sentences(segments, stats_callback=stats_callback)
+            with span("ingest", "build_hierarchy"):
+                hierarchy = Hierarchy.build(video_id, embeddings, metadata.start_times, metadata.end_times,
+                                            sentences, sentence_embeddings, self.section_chunks)
+        
+        video_index = VideoIndex(video_id, index, metadata, sparse=sparse, hierarchy=hierarchy)
+        # Load (or backfill) the corpus before this video is on disk, or the
+        # backfill would include it and add_video below would add it again
+        corpus = self.corpus if self.corpus_enabled else None
         print("Saving index...")
-        self.save_index(video_id)
-    
-    def save_index(self, video_id: str):
-        """Save index and metadata to disk"""
-        os.makedirs('data/indexes', exist_ok=True)
-        
-        # Save FAISS index
-        faiss.write_index(self.index, f'data/indexes/{video_id}.index')
-        
-        # Save metadata
-        with open(f'data/indexes/{video_id}_metadata.json', 'w') as f:
-            json.dump(self.metadata, f, indent=2)
-    
-    def load_index(self, video_id: str) -> bool:
-        """Load index and metadata from disk"""
-        index_path = f'data/indexes/{video_id}.index'
-        metadata_path = f'data/indexes/{video_id}_metadata.json'
-        
-        if os.path.exists(index_path) and os.path.exists(metadata_path):
-            self.index = faiss.read_index(index_path)
-            with open(metadata_path, 'r') as f:
-                self.metadata = json.load(f)
-            return True
-        return False
-    
-    def search(self, query: str, k: int = 5) -> List[Dict]:
-        """Search for similar segments"""
-        if self.index is None:
+        with span("ingest", "save"):
+            self.save_index(video_index)
+        self.index_cache.invalidate(video_id)
+        if corpus is not None:
+            with span("ingest", "corpus"):
+                corpus.add_video(video_id, embeddings)
+        self.active_index = video_index
+        progress("index", 1.0)
+        return video_index
+    
+    def embed_sentences(self, segments: List[VideoSegment], first_row: int = 0,
+                        stats_callback: Optional[Callable[[Dict], None]] = None
+                        ) -> Tuple[List[VideoSegment], np.ndarray]:
+        """Sentences of the chunks (see hierarchy.split_sentences) and their embeddings"""
+        sentences = split_sentences(segments, first_row)
+        with span("ingest", "embed_sentences"):
+            embeddings = self.generate_embeddings(sentences, stats_callback=stats_callback)
+        return sentences, embeddings
+    
+    def save_index(self, video_index: VideoIndex):
+        """Save index, metadata and BM25 as a new generation of files
+        ({video_id}.{generation}.*), published by replacing
+        {video_id}.manifest.json (see Generations), so a reader in any
+        process never pairs a new .index with old metadata.
+        """
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        video_id = video_index.video_id
+        generations = self._generations(video_id)
+        generation = generations.new_generation()
+        manifest = {
+            'generation': generation,
+            'index': generations.file_name(generation, 'index'),
+            'segments': generations.file_name(generation, 'segments'),
+            'sparse': generations.file_name(generation, 'bm25.npz') if video_index.sparse is not None else None,
+            # Coverage of a streaming ingestion; an index without one is complete
+            'coverage': video_index.coverage,
+            'hierarchy': None
+        }
+        faiss.write_index(video_index.index, generations.path(manifest['index']))
+        video_index.metadata.save(generations.path(manifest['segments']))
+        if video_index.sparse is not None:
+            video_index.sparse.save(generations.path(manifest['sparse']))
+        hierarchy = video_index.hierarchy
+        if hierarchy is not None:
+            manifest['hierarchy'] = {'num_chunks': hierarchy.num_chunks}
+            for level, index, store in (('sections', hierarchy.section_index, hierarchy.sections),
+                                        ('sentences', hierarchy.sentence_index, hierarchy.sentences)):
+                files = {'index': generations.file_name(generation, f'{level}.index'),
+                         'segments': generations.file_name(generation, f'{level}.segments')}
+                faiss.write_index(index, generations.path(files['index']))
+                store.save(generations.path(files['segments']))
+                manifest['hierarchy'][level] = files
+        
+        generations.publish(manifest)
+        # Files of indexes saved before manifests are no longer read
+        for name in (f'{video_id}.index', f'{video_id}.segments', f'{video_id}_metadata.json',
+                     f'{video_id}_bm25.npz', f'{video_id}.coverage.json'):
+            remove_file(os.path.join(INDEX_DIR, name))
+    
+    def publish_index(self, video_index: VideoIndex) -> VideoIndex:
+        """Save a handle and make it the one queries get, without a reload"""
+        self.save_index(video_index)
+        version = self._version(video_index.video_id)
+        video_index = replace(video_index, version=version)
+        self.index_cache.put(video_index.video_id, video_index, version)
+        self.active_index = video_index
+        return video_index
+    
+    def open_live_index(self, video_id: str) -> "LiveIndex":
+        """Writer for a video indexed incrementally while it is ingested"""
+        return LiveIndex(self, video_id)
+    
+    def load_index(self, video_id: str) -> Optional[VideoIndex]:
+        """Load index and metadata, from the in-memory cache when possible.
+
+        Returns a VideoIndex handle to pass to search(), or None if the video
+        has not been indexed.
+        """
+        video_index = self.get_index(video_id)
+        if video_index is not None:
+            self.active_index = video_index
+        return video_index
+    
+    @staticmethod
+    def _generations(video_id: str) -> Generations:
+        return Generations(INDEX_DIR, video_id)
+    
+    @classmethod
+    def _version(cls, video_id: str) -> Tuple:
+        """Identity of the saved index: the manifest's inode and mtime (every
+        save replaces it), or the modification times of the files of an
+        index saved before manifests"""
+        version = cls._generations(video_id).version()
+        if version is not None:
+            return version
+        paths = [f'{INDEX_DIR}/{video_id}.index', f'{INDEX_DIR}/{video_id}.segments',
+                 f'{INDEX_DIR}/{video_id}_metadata.json', f'{INDEX_DIR}/{video_id}.coverage.json']
+        version = []
+        for path in paths:
+            try:
+                version.append(os.stat(path).st_mtime_ns)
+            except FileNotFoundError:
+                version.append(0)
+        return tuple(version)
+    
+    def get_index(self, video_id: str) -> Optional[VideoIndex]:
+        """Like load_index, without making the handle the active one"""
+        # Files rewritten by another process get a new version and miss the cache
+        video_index = self.index_cache.get(video_id, self._version(video_id))
+        if video_index is not None:
+            return video_index
+        for attempt in range(3):
+            try:
+                video_index = self._open_index(video_id)
+                break
+            except FileNotFoundError:
+                # Another process saved twice between our reading the
+                # manifest and opening the files it named; read it again
+                if attempt == 2:
+                    raise
+        if video_index is not None:
+            self.index_cache.put(video_id, video_index, video_index.version)
+        return video_index
+    
+    def _open_index(self, video_id: str) -> Optional[VideoIndex]:
+        generations = self._generations(video_id)
+        version, manifest = generations.read_manifest()
+        if manifest is None:
+            return self._open_legacy_index(video_id)
+        index = faiss.read_index(generations.path(manifest['index']), self.read_flags)
+        metadata = SegmentStore.open(generations.path(manifest['segments']))
+        if manifest['sparse'] is not None:
+            sparse = BM25Index.load(generations.path(manifest['sparse']))
+        else:
+            sparse = BM25Index.build(list(metadata.texts()))
+        # Indexes saved without sections and sentences only search flat
+        hierarchy = None
+        levels = manifest.get('hierarchy')
+        if levels is not None:
+            def level(name):
+                return (faiss.read_index(generations.path(levels[name]['index']), self.read_flags),
+                        SegmentStore.open(generations.path(levels[name]['segments'])))
+            hierarchy = Hierarchy(*level('sections'), *level('sentences'), levels['num_chunks'])
+        return VideoIndex(video_id, index, metadata, version, sparse, manifest['coverage'], hierarchy,
+                          self.mapped)
+    
+    def _open_legacy_index(self, video_id: str) -> Optional[VideoIndex]:
+        """Index saved before manifests, as separately renamed files"""
+        index_path = f'{INDEX_DIR}/{video_id}.index'
+        segments_path = f'{INDEX_DIR}/{video_id}.segments'
+        # Indexes saved before the binary segment store still have JSON metadata
+        json_path = f'{INDEX_DIR}/{video_id}_metadata.json'
+        metadata_path = segments_path if os.path.exists(segments_path) else json_path
+        if not (os.path.exists(index_path) and os.path.exists(metadata_path)):
+            return None
+        version = self._version(video_id)
+        index = faiss.read_index(index_path, self.read_flags)
+        if metadata_path == segments_path:
+            metadata = SegmentStore.open(segments_path)
+        else:
+            with open(json_path, 'r') as f:
+                metadata = SegmentStore.from_rows(video_id, json.load(f))
+        # Indexes saved before BM25 support get their sparse index built on load
+        sparse_path = f'{INDEX_DIR}/{video_id}_bm25.npz'
+        if os.path.exists(sparse_path):
+            sparse = BM25Index.load(sparse_path)
+        else:
+            sparse = BM25Index.build(list(metadata.texts()))
+        coverage_path = f'{INDEX_DIR}/{video_id}.coverage.json'
+        coverage = None
+        if os.path.exists(coverage_path):
+            with open(coverage_path, 'r') as f:
+                coverage = json.load(f)
+        return VideoIndex(video_id, index, metadata, version, sparse, coverage, mapped=self.mapped)
+    
+    def encode_query(self, query: str) -> np.ndarray:
+        """Query embedding as a (1, dimension) float32 array"""
+        return self.embedding_model.encode([query]).astype(np.float32)
+    
+    def search(self, query: str, k: int = 5, video_index: VideoIndex = None,
+               mode: str = "dense", candidates: int = None,
+               query_embedding: Optional[np.ndarray] = None,
+               time_range: Optional[Tuple[Optional[float], Optional[float]]] = None,
+               neighbors: int = 0, merge_adjacent: bool = False, sections: int = 3) -> List[Dict]:
+        """Search for similar segments in the given video index.
+
+        mode="dense" ranks by L2 distance ('score' is the distance, lower is
+        better). mode="hybrid" takes the top `candidates` from both the dense
+        index and BM25 and fuses the two rankings with reciprocal rank fusion;
+        'score' is then the fused score (higher is better), with the inputs in
+        'dense_score' and 'bm25_score'. mode="hierarchical" searches coarse to
+        fine: the `sections` nearest sections (section_chunks consecutive
+        chunks each), then only the chunks and sentences inside them; chunks
+        are fused by their own distance and their best sentence's, and
+        'sentence' holds that sentence with its (approximate) times. Indexes
+        built without sections and sentences fall back to dense. A
+        query_embedding from encode_query skips encoding the query again.
+
+        time_range=(start, end) in seconds (either may be None) only searches
+        segments overlapping that span; the filter is applied inside the
+        FAISS search, so k results come back whenever k segments match.
+        neighbors=n widens each hit to the n segments before and after it,
+        and merge_adjacent joins hits whose windows overlap or touch into one
+        passage ('segment_ids' lists the segments a passage spans).
+        """
+        return self.search_batch([query], k, video_index, mode, candidates, query_embeddings=query_embedding,
+                                 time_range=time_range, neighbors=neighbors, merge_adjacent=merge_adjacent,
+                                 sections=sections)[0]
+    
+    def search_batch(self, queries: List[str], k: int = 5, video_index: VideoIndex = None,
+                     mode: str = "dense", candidates: int = None,
+                     query_embeddings: Optional[np.ndarray] = None,
+                     time_range: Optional[Tuple[Optional[float], Optional[float]]] = None,
+                     neighbors: int = 0, merge_adjacent: bool = False, sections: int = 3) -> List[List[Dict]]:
+        """search() for many queries at once: one encode call for all of them
+        and one FAISS search over the query matrix. Returns one result list
+        per query, in order."""
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        if video_index is None:
+            video_index = self.active_index
+        if video_index is None:
             raise ValueError("Index not initialized. Call create_index or load_index first.")
+        if not queries:
+            return []
+        if mode == "hierarchical" and video_index.hierarchy is None:
+            mode = "dense"
         
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode([query])
+        # Rows inside the time range, as a FAISS selector
+        params, allowed = None, None
+        if time_range is not None:
+            time_range = (-np.inf if time_range[0] is None else time_range[0],
+                          np.inf if time_range[1] is None else time_range[1])
+            allowed = video_index.metadata.intervals.overlapping(*time_range)
+            if len(allowed) == 0:
+                return [[] for _ in queries]
+            if allowed[-1] - allowed[0] + 1 == len(allowed):
+                selector = faiss.IDSelectorRange(int(allowed[0]), int(allowed[-1]) + 1)
+            else:
+                selector = faiss.IDSelectorBatch(allowed)
+            params = faiss.SearchParameters()
+            params.sel = selector
         
-        # Search
-        distances, indices = self.index.search(query_embedding.astype(np.float32), k)
+        # Generate query embeddings
+        if query_embeddings is None:
+            with span("query", "encode"):
+                query_embeddings = self.embedding_model.encode(list(queries), batch_size=self.encode_batch_size)
+        query_embeddings = np.ascontiguousarray(query_embeddings, dtype=np.float32)
         
-        # Prepare results
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < len(self.metadata):
-                result = self.metadata[idx].copy()
-                result['score'] = float(distances[0][i])
+        if mode == "hybrid":
+            candidates = candidates or max(4 * k, 50)
+            with span("query", "faiss_search"):
+                distances, indices = video_index.index.search(query_embeddings, candidates, params=params)
+            with span("query", "bm25_fusion"):
+                batch_hits = [self._hybrid_hits(query, distances[i], indices[i], k, video_index, candidates, allowed)
+                              for i, query in enumerate(queries)]
+        elif mode == "hierarchical":
+            batch_hits = self._hierarchical_hits(query_embeddings, k, video_index, sections,
+                                                 candidates or max(4 * k, 50), allowed)
+        else:
+            # Search
+            with span("query", "faiss_search"):
+                distances, indices = video_index.index.search(query_embeddings, k, params=params)
+            
+            # FAISS pads with -1 when k exceeds the index size
+            batch_hits = [
+                [(int(idx), {'score': float(distance)}) for distance, idx in zip(row_distances, row_indices)
+                 if 0 <= idx < len(video_index.metadata)]
+                for row_distances, row_indices in zip(distances, indices)
+            ]
+        
+        return [self._results(video_index, hits, neighbors, merge_adjacent, time_range) for hits in batch_hits]
+    
+    def _hybrid_hits(self, query: str, distances: np.ndarray, indices: np.ndarray, k: int,
+                     video_index: VideoIndex, candidates: int,
+                     allowed: Optional[np.ndarray] = None) -> List[Tuple[int, Dict]]:
+        """Fuse one query's dense candidates with BM25 using reciprocal rank fusion"""
+        valid = indices >= 0
+        dense_ids, dense_distances = indices[valid], distances[valid]
+        
+        bm25_scores = video_index.sparse.scores(query)
+        if allowed is not None:
+            in_range = np.zeros_like(bm25_scores)
+            in_range[allowed] = bm25_scores[allowed]
+            bm25_scores = in_range
+        sparse_ids = top_k_positive(bm25_scores, candidates)
+        
+        fused_ids, fused_scores = reciprocal_rank_fusion([dense_ids, sparse_ids], k)
+        dense_lookup = dict(zip(dense_ids.tolist(), dense_distances.tolist()))
+        
+        return [(idx, {'score': fused_score, 'dense_score': dense_lookup.get(idx),
+                       'bm25_score': float(bm25_scores[idx])})
+                for idx, fused_score in zip(fused_ids.tolist(), fused_scores.tolist())]
+    
+    def _hierarchical_hits(self, query_embeddings: np.ndarray, k: int, video_index: VideoIndex,
+                           sections: int, candidates: int,
+                           allowed: Optional[np.ndarray] = None) -> List[List[Tuple[int, Dict]]]:
+        """Coarse-to-fine hits: nearest sections and chunks, then the
+        sentences inside those chunks only; chunks are ranked by RRF of their
+        own rank and their best sentence's rank"""
+        hierarchy = video_index.hierarchy
+        section_params, chunk_params = None, None
+        if allowed is not None:
+            section_params = faiss.SearchParameters()
+            section_params.sel = faiss.IDSelectorBatch(hierarchy.sections_of(allowed))
+            chunk_params = faiss.SearchParameters()
+            chunk_params.sel = faiss.IDSelectorBatch(allowed)
+        with span("query", "section_search"):
+            _, section_ids = hierarchy.section_index.search(query_embeddings, sections, params=section_params)
+            # A chunk holds many sentences, so the chunk level is small enough to search whole
+            all_chunk_distances, all_chunk_ids = video_index.index.search(query_embeddings, candidates,
+                                                                          params=chunk_params)
+        
+        batch_hits = []
+        with span("query", "faiss_search"):
+            for query_embedding, nearest, chunk_distances, chunk_ids in zip(query_embeddings, section_ids,
+                                                                            all_chunk_distances, all_chunk_ids):
+                valid = chunk_ids >= 0
+                chunk_ids, chunk_distances = chunk_ids[valid], chunk_distances[valid]
+                rows = hierarchy.descend(nearest, chunk_ids, allowed)
+                sentence_distances, sentence_ids = hierarchy.search_sentences(query_embedding, rows, candidates)
+                # Each chunk ranked by its best sentence
+                parents = hierarchy.sentences.segment_ids[sentence_ids]
+                best = np.sort(np.unique(parents, return_index=True)[1])
+                best_sentence = dict(zip(parents[best].tolist(),
+                                         zip(sentence_ids[best].tolist(), sentence_distances[best].tolist())))
+                chunk_lookup = dict(zip(chunk_ids.tolist(), chunk_distances.tolist()))
+                
+                fused_ids, fused_scores = reciprocal_rank_fusion([chunk_ids, parents[best]], k)
+                hits = []
+                for idx, fused_score in zip(fused_ids.tolist(), fused_scores.tolist()):
+                    scores = {'score': fused_score, 'dense_score': chunk_lookup.get(idx)}
+                    if idx in best_sentence:
+                        row, distance = best_sentence[idx]
+                        scores['sentence_score'] = distance
+                        scores['sentence'] = {'text': hierarchy.sentences.text(row),
+                                              'start_time': float(hierarchy.sentences.start_times[row]),
+                                              'end_time': float(hierarchy.sentences.end_times[row])}
+                    hits.append((idx, scores))
+                batch_hits.append(hits)
+        return batch_hits
+    
+    def _results(self, video_index: VideoIndex, hits: List[Tuple[int, Dict]], neighbors: int = 0,
+                 merge_adjacent: bool = False, time_range: Optional[Tuple[float, float]] = None) -> List[Dict]:
+        """Result dicts for ranked (row, scores) hits, widened to neighbouring
+        segments and merged into non-overlapping passages when asked"""
+        metadata = video_index.metadata
+        if not neighbors and not merge_adjacent:
+            results = []
+            for idx, scores in hits:
+                result = metadata[idx]
+                result.update(scores)
                 results.append(result)
+            return results
+        
+        # Windows are [first, last] positions in start-time order, then the
+        # hit's rank, row and scores
+        intervals = metadata.intervals
+        windows = []
+        for rank, (idx, scores) in enumerate(hits):
+            position = int(intervals.rank[idx])
+            windows.append([max(0, position - neighbors), min(len(metadata) - 1, position + neighbors),
+                            rank, idx, scores])
+        if merge_adjacent:
+            # A merged passage takes the rank and scores of its best hit
+            merged = []
+            for window in sorted(windows, key=lambda w: w[0]):
+                if merged and window[0] <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], window[1])
+                    if window[2] < merged[-1][2]:
+                        merged[-1][2:] = window[2:]
+                else:
+                    merged.append(list(window))
+            windows = sorted(merged, key=lambda w: w[2])
         
-        return results
\ No newline at end of file
+        results = []
+        for first, last, _, idx, scores in windows:
+            rows = intervals.order[first:last + 1]
+            if time_range is not None:
+                # Neighbours stay inside the requested time range
+                rows = rows[(metadata.end_times[rows] > time_range[0]) & (metadata.start_times[rows] < time_range[1])]
+            result = metadata[idx]
+            result.update(scores)
+            result['segment_ids'] = [int(metadata.segment_ids[row]) for row in rows]
+            result['start_time'] = float(metadata.start_times[rows].min())
+            result['end_time'] = float(metadata.end_times[rows].max())
+            result['text'] = " ".join(metadata.text(row) for row in rows)
+            results.append(result)
+        return results
+    
+    def search_corpus(self, query: str, k: int = 5, video_ids: Optional[List[str]] = None,
+                      exact_threshold: int = 4096) -> List[Dict]:
+        """Search across videos: all of them, or only the given video_ids.
+
+        Filters that cover at most exact_threshold segments are answered
+        exactly from the per-video flat indexes; everything else goes through
+        the approximate corpus index. 'score' is the L2 distance. Raises
+        ValueError when the corpus index is disabled.
+        """
+        if not self.corpus_enabled:
+            raise ValueError("The corpus index is disabled (corpus_enabled=False)")
+        query_embedding = self.embedding_model.encode([query]).astype(np.float32)
+        
+        if video_ids is not None:
+            handles = [h for h in (self.get_index(v) for v in dict.fromkeys(video_ids)) if h is not None]
+            if sum(h.index.ntotal for h in handles) <= exact_threshold:
+                return self._exact_multi_search(query_embedding, k, handles)
+        
+        corpus = self.corpus
+        corpus.refresh()
+        results = []
+        for video_id, row, distance in corpus.search(query_embedding, k, video_ids):
+            video_index = self.get_index(video_id)
+            # Skip rows of a video that was re-indexed since the corpus was read
+            if video_index is None or row >= len(video_index.metadata):
+                continue
+            result = video_index.metadata[row]
+            result['score'] = distance
+            results.append(result)
+        
+        return results
+    
+    def _exact_multi_search(self, query_embedding: np.ndarray, k: int,
+                            handles: List[VideoIndex]) -> List[Dict]:
+        """Brute-force search over a few videos, merged by distance"""
+        hits = []
+        for video_index in handles:
+            n = min(k, video_index.index.ntotal)
+            if n == 0:
+                continue
+            distances, indices = video_index.index.search(query_embedding, n)
+            hits.extend((float(d), video_index, int(i)) for d, i in zip(distances[0], indices[0]) if i >= 0)
+        
+        results = []
+        for distance, video_index, row in sorted(hits, key=lambda hit: hit[0])[:k]:
+            result = video_index.metadata[row]
+            result['score'] = distance
+            results.append(result)
+        return results
+
+class LiveIndex:
+    """Grows one video's index while a streaming ingestion is still running.
+
+    append() embeds the new chunks, adds them to a private flat index and
+    publishes a fresh VideoIndex (a copy of that index, the metadata and
+    BM25 so far, and the coverage) to disk and the index cache. Queries
+    always search a complete handle; copying a flat index is one memcpy per
+    window. Sentences are embedded once, as their chunks arrive; sections
+    are re-pooled from all chunk vectors on every publish. finish() marks
+    the index complete and adds it to the corpus.
+    """
+
+    def __init__(self, indexer: MultiVectorIndexer, video_id: str):
+        self.indexer = indexer
+        self.video_id = video_id
+        self.index = faiss.IndexFlatL2(indexer.dimension)
+        self.segments: List[VideoSegment] = []
+        self.embeddings: List[np.ndarray] = []
+        self.sentences: List[VideoSegment] = []
+        self.sentence_embeddings: List[np.ndarray] = []
+        self.indexed_seconds = 0.0
+        self.duration_seconds: Optional[float] = None
+        # Before the first partial index is saved, so a backfill skips this video
+        self.corpus = indexer.corpus if indexer.corpus_enabled else None
+    
+    def append(self, segments: List[VideoSegment], indexed_seconds: float,
+               duration_seconds: Optional[float] = None,
+               stats_callback: Optional[Callable[[Dict], None]] = None) -> Optional[VideoIndex]:
+        """Index more chunks; returns the published handle (None while still empty)"""
+        if segments:
+            with span("ingest", "embed"):
+                embeddings = self.indexer.generate_embeddings(segments, stats_callback=stats_callback)
+            with span("ingest", "build_index"):
+                self.index.add(embeddings.astype(np.float32))
+            if self.indexer.hierarchical:
+                sentences, sentence_embeddings = self.indexer.embed_sentences(
+                    segments, first_row=len(self.segments), stats_callback=stats_callback)
+                self.sentences.extend(sentences)
+                self.sentence_embeddings.append(sentence_embeddings)
+            self.segments.extend(segments)
+            self.embeddings.append(embeddings)
+        self.indexed_seconds = max(self.indexed_seconds, indexed_seconds)
+        if duration_seconds is not None:
+            self.duration_seconds = duration_seconds
+        return self._publish(complete=False)
+    
+    def finish(self) -> Optional[VideoIndex]:
+        """Publish the final handle, marked complete"""
+        video_index = self._publish(complete=True)
+        if video_index is not None and self.corpus is not None:
+            with span("ingest", "corpus"):
+                self.corpus.add_video(self.video_id, np.concatenate(self.embeddings))
+        return video_index
+    
+    def _publish(self, complete: bool) -> Optional[VideoIndex]:
+        if not self.segments:
+            return None
+        metadata = SegmentStore.from_columns(
+            self.video_id,
+            [seg.segment_id for seg in self.segments],
+            [seg.start for seg in self.segments],
+            [seg.end for seg in self.segments],
+            [seg.text for seg in self.segments]
+        )
+        with span("ingest", "build_bm25"):
+            sparse = BM25Index.build([seg.text for seg in self.segments])
+        hierarchy = None
+        if self.indexer.hierarchical:
+            with span("ingest", "build_hierarchy"):
+                hierarchy = Hierarchy.build(self.video_id, np.concatenate(self.embeddings), metadata.start_times,
+                                            metadata.end_times, self.sentences,
+                                            np.concatenate(self.sentence_embeddings), self.indexer.section_chunks)
+        coverage = {
+            'indexed_seconds': self.duration_seconds if complete and self.duration_seconds else self.indexed_seconds,
+            'duration_seconds': self.duration_seconds,
+            'complete': complete
+        }
+        video_index = VideoIndex(self.video_id, faiss.clone_index(self.index), metadata,
+                                 sparse=sparse, coverage=coverage, hierarchy=hierarchy)
+        with span("ingest", "save"):
+            return self.indexer.publish_index(video_index)
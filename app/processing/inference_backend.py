@@ -0,0 +1,295 @@
+import json
+import os
+import re
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# "torch" is the stock sentence-transformers path. "torch-int8" applies
+# PyTorch dynamic int8 quantization to the Linear layers in memory. "onnx"
+# and "onnx-int8" run an exported (optionally int8-quantized) graph with
+# ONNX Runtime; exports are cached under ONNX_CACHE_DIR. Every backend but
+# "torch" is checked against PyTorch (see parity) before it is used.
+INFERENCE_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+# Exported graphs must reproduce the PyTorch outputs on PARITY_SAMPLES:
+# fp32 within an absolute tolerance, int8 (lossy) by cosine similarity for
+# embeddings and by correlation for cross-encoder scores
+FP32_ATOL = 1e-3
+INT8_MIN_SIMILARITY = 0.98
+PARITY_SAMPLES = [
+    "The speaker explains how gradient descent updates the weights.",
+    "Later in the video they compare three approaches to caching.",
+    "Questions from the audience cover deployment and monitoring.",
+    "Thanks for watching, see you next time.",
+]
+PARITY_QUERY = "how are the weights updated"
+
+def _parity_pairs() -> List[Tuple[str, str]]:
+    return [(PARITY_QUERY, text) for text in PARITY_SAMPLES]
+
+_export_lock = threading.Lock()
+
+def default_backend() -> str:
+    backend = os.getenv("INFERENCE_BACKEND", "torch")
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown INFERENCE_BACKEND: {backend}")
+    return backend
+
+def _num_threads() -> Optional[int]:
+    threads = os.getenv("INFERENCE_THREADS")
+    return int(threads) if threads else None
+
+def _artifact_dir(kind: str, model_name: str) -> str:
+    cache_dir = os.getenv("ONNX_CACHE_DIR", "data/models")
+    return os.path.join(cache_dir, kind, re.sub(r"[^A-Za-z0-9_.-]", "_", model_name))
+
+def _quantize_torch(module):
+    import torch
+    return torch.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8)
+
+def load_embedder(model_name: str, backend: Optional[str] = None):
+    """Sentence embedder exposing SentenceTransformer.encode for the chosen backend"""
+    from sentence_transformers import SentenceTransformer
+    backend = backend or default_backend()
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    if backend.startswith("onnx"):
+        return OnnxEmbedder(model_name, quantized=backend == "onnx-int8")
+    model = SentenceTransformer(model_name, device="cpu")
+    if backend == "torch-int8":
+        expected = model.encode(PARITY_SAMPLES, convert_to_numpy=True)
+        model = _quantize_torch(model)
+        model.parity = _check_parity(expected, model.encode(PARITY_SAMPLES, convert_to_numpy=True),
+                                     f"torch-int8 {model_name}")
+    return model
+
+def load_cross_encoder(model_name: str, backend: Optional[str] = None, max_length: int = 512):
+    """Cross-encoder exposing CrossEncoder.predict for the chosen backend"""
+    from sentence_transformers import CrossEncoder
+    backend = backend or default_backend()
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    if backend.startswith("onnx"):
+        return OnnxCrossEncoder(model_name, quantized=backend == "onnx-int8", max_length=max_length)
+    model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+    if backend == "torch-int8":
+        expected = model.predict(_parity_pairs(), convert_to_numpy=True)
+        model.model = _quantize_torch(model.model)
+        model.parity = _check_parity(expected, model.predict(_parity_pairs(), convert_to_numpy=True),
+                                     f"torch-int8 {model_name}")
+    return model
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b = b / np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    return (a * b).sum(axis=1)
+
+def parity(reference: np.ndarray, candidate: np.ndarray, quantized: bool) -> Dict:
+    """Compare backend outputs with the PyTorch reference; 'ok' is False when
+    they differ by more than the tolerance for that precision"""
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    report = {'max_abs_diff': float(np.abs(reference - candidate).max())}
+    if not quantized:
+        report['ok'] = report['max_abs_diff'] <= FP32_ATOL
+    elif reference.ndim == 2:
+        report['min_cosine'] = float(_cosine(reference, candidate).min())
+        report['ok'] = report['min_cosine'] >= INT8_MIN_SIMILARITY
+    else:
+        report['correlation'] = float(np.corrcoef(reference, candidate)[0, 1])
+        report['ok'] = report['correlation'] >= INT8_MIN_SIMILARITY
+    return report
+
+def _check_parity(reference: np.ndarray, candidate: np.ndarray, name: str, quantized: bool = True) -> Dict:
+    """parity() report, raising ValueError when the outputs do not match"""
+    report = parity(reference, candidate, quantized)
+    print(f"{name} parity: {report}")
+    if not report['ok']:
+        raise ValueError(f"{name} does not match PyTorch: {report}")
+    return report
+
+class _OnnxModel:
+    """An exported transformer graph plus its tokenizer, exported on first use.
+
+    The fp32 graph is exported from the PyTorch model and the int8 graph is
+    derived from it with ONNX Runtime dynamic quantization. Only the
+    requested precision is kept: it is checked against the PyTorch outputs
+    and published with its config (config.json or config_int8.json) by
+    atomic renames. Later processes load the cached files directly.
+    """
+
+    kind = ""
+    output_name = ""
+
+    def __init__(self, model_name: str, quantized: bool = False, max_length: int = 512):
+        self.model_name = model_name
+        self.quantized = quantized
+        self.directory = _artifact_dir(self.kind, model_name)
+        self.model_path = os.path.join(self.directory, "model_int8.onnx" if quantized else "model.onnx")
+        self.config_path = os.path.join(self.directory, "config_int8.json" if quantized else "config.json")
+        with _export_lock:
+            if not (os.path.exists(self.model_path) and os.path.exists(self.config_path)):
+                self._export(max_length)
+        with open(self.config_path, 'r') as f:
+            self.config = json.load(f)
+        self.parity = self.config['parity']['int8' if quantized else 'fp32']
+        self._load()
+
+    def _load(self):
+        import onnxruntime
+        from transformers import AutoTokenizer
+        self.tokenizer = AutoTokenizer.from_pretrained(self.directory)
+        options = onnxruntime.SessionOptions()
+        threads = _num_threads()
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _run(self, encoded: Dict) -> np.ndarray:
+        feed = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        return self.session.run([self.output_name], feed)[0]
+
+    def _export(self, max_length: int):
+        import torch
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_suffix = f'.{os.getpid()}-{threading.get_ident()}.tmp'
+        precision = "int8" if self.quantized else "fp32"
+        print(f"Exporting {self.model_name} to ONNX ({precision}) in {self.directory}...")
+
+        reference, hf_model, tokenizer, config = self._reference_model(max_length)
+        tokenizer.save_pretrained(self.directory)
+        encoded = self._tokenize(tokenizer, self._samples(), config['max_length'], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in encoded]
+        axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        axes[self.output_name] = {0: "batch"} if self.output_name == "logits" else {0: "batch", 1: "sequence"}
+        fp32_tmp = os.path.join(self.directory, "model.onnx") + tmp_suffix
+        model_tmp = self.model_path + tmp_suffix
+        try:
+            with torch.no_grad():
+                torch.onnx.export(hf_model, tuple(encoded[name] for name in input_names), fp32_tmp,
+                                  input_names=input_names, output_names=[self.output_name],
+                                  dynamic_axes=axes, opset_version=14)
+            if self.quantized:
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+                quantize_dynamic(fp32_tmp, model_tmp, weight_type=QuantType.QInt8)
+
+            # Check the graph before publishing it
+            final_path, self.model_path, self.config = self.model_path, model_tmp, config
+            self._load_from(tokenizer)
+            config['parity'] = {precision: _check_parity(self._reference_outputs(reference), self._predict_samples(),
+                                                         f"ONNX {precision} {self.model_name}", self.quantized)}
+            config_tmp = self.config_path + tmp_suffix
+            with open(config_tmp, 'w') as f:
+                json.dump(config, f, indent=2)
+            os.replace(model_tmp, final_path)
+            os.replace(config_tmp, self.config_path)
+            self.model_path = final_path
+        finally:
+            for path in (fp32_tmp, model_tmp):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _load_from(self, tokenizer):
+        import onnxruntime
+        self.tokenizer = tokenizer
+        self.session = onnxruntime.InferenceSession(self.model_path, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    @staticmethod
+    def _tokenize(tokenizer, texts, max_length: int, return_tensors: str = "np"):
+        return tokenizer(*texts, padding=True, truncation=True, max_length=max_length, return_tensors=return_tensors)
+
+class OnnxEmbedder(_OnnxModel):
+    """ONNX Runtime replacement for SentenceTransformer.encode (pooling and
+    normalization reproduced from the sentence-transformers model)"""
+
+    kind = "embedding"
+    output_name = "last_hidden_state"
+
+    def _samples(self):
+        return (PARITY_SAMPLES,)
+
+    def _reference_model(self, max_length: int):
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(self.model_name, device="cpu")
+        pooling = next((m for m in model if type(m).__name__ == "Pooling"), None)
+        config = {
+            'max_length': min(max_length, model.max_seq_length),
+            'pooling': pooling.get_pooling_mode_str() if pooling is not None else "mean",
+            'normalize': any(type(m).__name__ == "Normalize" for m in model),
+            'dimension': model.get_sentence_embedding_dimension()
+        }
+        return model, model[0].auto_model, model.tokenizer, config
+
+    def _reference_outputs(self, reference) -> np.ndarray:
+        return reference.encode(PARITY_SAMPLES, convert_to_numpy=True)
+
+    def _predict_samples(self) -> np.ndarray:
+        return self.encode(PARITY_SAMPLES)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config['dimension']
+
+    def encode(self, sentences: Sequence[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        # Batch texts of similar length together to minimise padding
+        order = np.argsort([-len(s) for s in sentences], kind="stable")
+        output = np.zeros((len(sentences), self.config['dimension']), dtype=np.float32)
+        for start in range(0, len(sentences), batch_size):
+            batch = order[start:start + batch_size]
+            encoded = self._tokenize(self.tokenizer, ([sentences[i] for i in batch],), self.config['max_length'])
+            hidden = self._run(encoded)
+            if self.config['pooling'] == "cls":
+                pooled = hidden[:, 0]
+            else:
+                mask = encoded['attention_mask'][..., None].astype(np.float32)
+                pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            if self.config['normalize']:
+                pooled = pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+            output[batch] = pooled
+        return output
+
+class OnnxCrossEncoder(_OnnxModel):
+    """ONNX Runtime replacement for CrossEncoder.predict"""
+
+    kind = "reranker"
+    output_name = "logits"
+
+    def _pairs(self) -> List[Tuple[str, str]]:
+        return _parity_pairs()
+
+    def _samples(self):
+        pairs = self._pairs()
+        return ([q for q, _ in pairs], [p for _, p in pairs])
+
+    def _reference_model(self, max_length: int):
+        from sentence_transformers import CrossEncoder
+        model = CrossEncoder(self.model_name, max_length=max_length, device="cpu")
+        activation = type(model.default_activation_function).__name__
+        config = {
+            'max_length': max_length,
+            'activation': "sigmoid" if activation == "Sigmoid" else "identity"
+        }
+        return model, model.model, model.tokenizer, config
+
+    def _reference_outputs(self, reference) -> np.ndarray:
+        return reference.predict(self._pairs(), convert_to_numpy=True)
+
+    def _predict_samples(self) -> np.ndarray:
+        return self.predict(self._pairs())
+
+    def predict(self, sentences: Sequence[Tuple[str, str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        scores = np.zeros(len(sentences), dtype=np.float32)
+        for start in range(0, len(sentences), batch_size):
+            batch = sentences[start:start + batch_size]
+            encoded = self._tokenize(self.tokenizer, ([q for q, _ in batch], [p for _, p in batch]),
+                                     self.config['max_length'])
+            logits = self._run(encoded)[:, 0]
+            if self.config['activation'] == "sigmoid":
+                logits = 1 / (1 + np.exp(-logits))
+            scores[start:start + len(batch)] = logits
+        return scores
@@ -0,0 +1,172 @@
+import threading
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional
+from pydantic import BaseModel
+from .video_processor import video_key
+
+# Share of overall progress covered by each ingestion stage, in pipeline order
+STAGE_WEIGHTS = OrderedDict([
+    ('download', 10),
+    ('transcribe', 60),
+    ('chunk', 5),
+    ('embed', 20),
+    ('index', 5),
+])
+
+class QueueFullError(Exception):
+    """Raised when too many ingestion jobs are already waiting"""
+
+class IngestionJob(BaseModel):
+    job_id: str
+    video_url: str
+    streaming: bool = False  # queryable while still being indexed
+    status: str = "queued"  # queued | running | completed | failed
+    stage: Optional[str] = None
+    progress: float = 0.0  # percent of the whole pipeline
+    video_id: Optional[str] = None
+    num_segments: Optional[int] = None
+    indexed_seconds: Optional[float] = None  # streaming: audio covered by the index so far
+    duration_seconds: Optional[float] = None
+    embedding_cache: Optional[Dict] = None  # hits/misses summed over this ingestion's embedding passes
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+class IngestionQueue:
+    """Runs VideoProcessor/MultiVectorIndexer ingestion as background jobs.
+
+    At most max_concurrent jobs run at once on a worker thread pool; up to
+    max_pending more wait in the queue before submit() is refused.
+    """
+
+    def __init__(self, video_processor, indexer, max_concurrent: int = 2,
+                 max_pending: int = 16, max_history: int = 1000):
+        self.video_processor = video_processor
+        self.indexer = indexer
+        self.max_concurrent = max_concurrent
+        self.max_pending = max_pending
+        self.max_history = max_history
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent,
+                                           thread_name_prefix="ingest")
+        self.jobs: Dict[str, IngestionJob] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, video_url: str, streaming: bool = False) -> IngestionJob:
+        """Queue a video for ingestion and return its job immediately.
+
+        Streaming jobs index the video window by window, so it can be
+        queried (over the part indexed so far) before the job completes.
+        A video that is already queued or running, under any URL naming the
+        same YouTube id, returns that job instead of starting a second
+        ingestion. Jobs live in this process only.
+        """
+        now = datetime.now()
+        job = IngestionJob(job_id=uuid.uuid4().hex, video_url=video_url, streaming=streaming,
+                           created_at=now, updated_at=now)
+        key = video_key(video_url)
+        with self._lock:
+            for active in self.jobs.values():
+                if active.status in ("queued", "running") and video_key(active.video_url) == key:
+                    return active.copy()
+            if self._count("queued") >= self.max_pending:
+                raise QueueFullError(f"{self.max_pending} ingestion jobs already queued")
+            self.jobs[job.job_id] = job
+            self._prune_history()
+            snapshot = job.copy()
+        self.executor.submit(self._run, job)
+        return snapshot
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """Snapshot of a job's current state"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return job.copy() if job is not None else None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {status: self._count(status)
+                    for status in ("queued", "running", "completed", "failed")}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: IngestionJob):
+        self._update(job, status="running")
+        if job.streaming:
+            self._run_streaming(job)
+            return
+        try:
+            segments, video_id = self.video_processor.process_video(
+                job.video_url, progress_callback=lambda stage, fraction: self._progress(job, stage, fraction)
+            )
+            self._update(job, video_id=video_id)
+            self.indexer.create_index(
+                segments, video_id,
+                progress_callback=lambda stage, fraction: self._progress(job, stage, fraction),
+                stats_callback=lambda stats: self._add_cache_stats(job, stats)
+            )
+            self._update(job, status="completed", progress=100.0, num_segments=len(segments))
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job, status="failed", error=str(e))
+
+    def _run_streaming(self, job: IngestionJob):
+        live = None
+        try:
+            for video_id, segments, covered, duration in self.video_processor.process_video_streaming(
+                job.video_url, progress_callback=lambda stage, fraction: self._progress(job, stage, fraction)
+            ):
+                if live is None:
+                    live = self.indexer.open_live_index(video_id)
+                live.append(segments, covered, duration,
+                            stats_callback=lambda stats: self._add_cache_stats(job, stats))
+                self._update(job, video_id=video_id, num_segments=len(live.segments),
+                             indexed_seconds=live.indexed_seconds, duration_seconds=duration)
+            if live is not None:
+                live.finish()
+            self._update(job, status="completed", progress=100.0,
+                         indexed_seconds=job.duration_seconds)
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job, status="failed", error=str(e))
+
+    def _progress(self, job: IngestionJob, stage: str, fraction: float):
+        done = 0
+        for name, weight in STAGE_WEIGHTS.items():
+            if name == stage:
+                break
+            done += weight
+        total = sum(STAGE_WEIGHTS.values())
+        percent = 100.0 * (done + STAGE_WEIGHTS.get(stage, 0) * fraction) / total
+        self._update(job, stage=stage, progress=round(percent, 1))
+
+    def _add_cache_stats(self, job: IngestionJob, stats: Dict):
+        # Called once per embedding pass: chunks, sentences, every streaming window
+        with self._lock:
+            totals = dict(job.embedding_cache or {'hits': 0, 'misses': 0, 'encoded': 0})
+            for name in ('hits', 'misses', 'encoded'):
+                totals[name] += stats[name]
+            lookups = totals['hits'] + totals['misses']
+            totals['hit_rate'] = totals['hits'] / lookups if lookups else 0.0
+            job.embedding_cache = totals
+            job.updated_at = datetime.now()
+
+    def _update(self, job: IngestionJob, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.updated_at = datetime.now()
+
+    def _count(self, status: str) -> int:
+        return sum(1 for job in self.jobs.values() if job.status == status)
+
+    def _prune_history(self):
+        # Forget the oldest finished jobs once the history grows too long
+        finished = [job_id for job_id, job in self.jobs.items()
+                    if job.status in ("completed", "failed")]
+        for job_id in finished[:max(0, len(self.jobs) - self.max_history)]:
+            del self.jobs[job_id]
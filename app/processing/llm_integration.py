@@ -1,24 +1,147 @@
-import requests
+import asyncio
+import hashlib
+import aiohttp
 import json
-from typing import List, Dict
+import random
+import threading
+from typing import AsyncIterator, List, Dict, Optional
 import re
 import os
 
+# Timestamps look like 123s or 123.45s; a trailing run of digits and dots
+# may still grow into one when the next token arrives
+TIMESTAMP_PATTERNS = [
+    r'(\d+\.\d+)s',  # 123.45s
+    r'(\d+)s',       # 123s
+]
+_OPEN_NUMBER = re.compile(r'[\d.]+$')
+
+# Answers that report a failed completion start with this
+ANSWER_ERROR_PREFIX = "Error generating answer"
+
+def find_timestamps(text: str) -> List[float]:
+    timestamps = []
+    for pattern in TIMESTAMP_PATTERNS:
+        matches = re.findall(pattern, text)
+        for match in matches:
+            timestamps.append(float(match))
+    return timestamps
+
+class TimestampExtractor:
+    """Extracts timestamps from an answer while it is still being streamed.
+
+    Text is scanned up to the last character that cannot be part of a number,
+    so a timestamp split across tokens ("12" + ".5s") is only reported once it
+    is complete. After finish() the result equals extract_timestamps() on the
+    full answer.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._scanned = 0
+        self._found = set()
+
+    def feed(self, token: str) -> List[float]:
+        """Add streamed text; returns timestamps not reported before"""
+        self._text += token
+        open_number = _OPEN_NUMBER.search(self._text, self._scanned)
+        return self._scan(open_number.start() if open_number else len(self._text))
+
+    def finish(self) -> List[float]:
+        return self._scan(len(self._text))
+
+    def _scan(self, end: int) -> List[float]:
+        new = set(find_timestamps(self._text[self._scanned:end])) - self._found
+        self._found |= new
+        self._scanned = end
+        return sorted(new)
+
+    @property
+    def timestamps(self) -> List[float]:
+        return sorted(self._found)
+
+class RetryableStatusError(Exception):
+    """HTTP 429 or 5xx from the LLM API"""
+
+    def __init__(self, response: aiohttp.ClientResponse):
+        super().__init__(f"HTTP {response.status} from {response.url}")
+        self.retry_after = response.headers.get("Retry-After", "")
+
+class AnswerStreamError(Exception):
+    """A streamed answer failed; the tokens already yielded are incomplete"""
+
+class _LoopState:
+    """Connection pool, concurrency limit and in-flight requests of one event loop"""
+
+    def __init__(self, session: aiohttp.ClientSession, max_concurrency: int):
+        self.session = session
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight: Dict[str, asyncio.Future] = {}
+
 class LLMClient:
-    def __init__(self, api_key: str = None, model: str = "llama3-70b-8192"):
+    """Async client for an OpenAI-compatible chat completions API.
+
+    Requests go through one keep-alive connection pool with connect/read
+    timeouts, at most max_concurrency at a time. 429 and 5xx responses and
+    transport errors are retried with exponential backoff and jitter
+    (honouring Retry-After). Concurrent calls with an identical prompt share
+    a single upstream request.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, api_key: str = None, model: str = "llama3-70b-8192",
+                 timeout: Optional[float] = None, max_concurrency: Optional[int] = None,
+                 max_retries: Optional[int] = None, backoff_seconds: float = 0.5):
         self.api_key = api_key or os.getenv("GROQ_API_KEY")
         self.model = model
-        self.base_url = "https://api.groq.com/openai/v1/chat/completions"
+        # Any OpenAI-compatible chat completions endpoint (e.g. a local mock server)
+        self.base_url = os.getenv("LLM_BASE_URL", "https://api.groq.com/openai/v1/chat/completions")
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+        self.max_retries = int(os.getenv("LLM_MAX_RETRIES", "3")) if max_retries is None else max_retries
+        self.backoff_seconds = backoff_seconds
+        self._states: Dict[asyncio.AbstractEventLoop, _LoopState] = {}
+        self._states_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.coalesced = 0
+        self.failures = 0
     
     def format_context(self, passages: List[Dict]) -> str:
         """Format retrieved passages into context for LLM"""
+        # Name the video as well when passages come from more than one
+        multi_video = len({passage.get('video_id') for passage in passages}) > 1
         context = ""
         for i, passage in enumerate(passages):
-            context += f"[Segment {i+1}, Time: {passage['start_time']:.2f}-{passage['end_time']:.2f}s]: {passage['text']}\n\n"
+            video = f"Video: {passage['video_id']}, " if multi_video else ""
+            context += f"[Segment {i+1}, {video}Time: {passage['start_time']:.2f}-{passage['end_time']:.2f}s]: {passage['text']}\n\n"
         return context
     
-    def generate_answer(self, query: str, context: str) -> str:
-        """Generate answer using LLM with provided context"""
+    def _state(self) -> _LoopState:
+        # aiohttp sessions and asyncio primitives belong to one event loop
+        loop = asyncio.get_running_loop()
+        with self._states_lock:
+            state = self._states.get(loop)
+            if state is None:
+                session = aiohttp.ClientSession(
+                    headers={
+                        "Authorization": f"Bearer {self.api_key}",
+                        "Content-Type": "application/json"
+                    },
+                    timeout=aiohttp.ClientTimeout(total=self.timeout, sock_connect=min(self.timeout, 10.0)),
+                    connector=aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=30)
+                )
+                state = self._states[loop] = _LoopState(session, self.max_concurrency)
+            return state
+
+    def _count(self, field: str, n: int = 1):
+        with self._stats_lock:
+            setattr(self, field, getattr(self, field) + n)
+
+    def _payload(self, query: str, context: str, stream: bool = False) -> Dict:
+        """JSON payload of a chat completion request"""
         prompt = f"""Based on the following video content, answer the question comprehensively. 
         Always cite the specific timestamps where the information comes from.
 
@@ -29,11 +152,6 @@ class LLMClient:
 
         Answer:"""
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
         payload = {
             "model": self.model,
             "messages": [
@@ -49,26 +167,119 @@ class LLMClient:
             "temperature": 0.1,
             "max_tokens": 1024
         }
-        
+        if stream:
+            payload["stream"] = True
+        return payload
+    
+    async def _backoff(self, attempt: int, error: Exception):
+        delay = self.backoff_seconds * (2 ** attempt) * (0.5 + random.random())
+        if isinstance(error, RetryableStatusError) and error.retry_after.replace(".", "", 1).isdigit():
+            delay = max(delay, float(error.retry_after))
+        self._count("retries")
+        await asyncio.sleep(delay)
+
+    async def _post(self, payload: Dict) -> Dict:
+        """One completion, retried on 429/5xx and transport errors"""
+        state = self._state()
+        async with state.semaphore:
+            for attempt in range(self.max_retries + 1):
+                self._count("requests")
+                try:
+                    async with state.session.post(self.base_url, json=payload) as response:
+                        if response.status in self.RETRY_STATUSES:
+                            raise RetryableStatusError(response)
+                        response.raise_for_status()
+                        return await response.json()
+                except (RetryableStatusError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    if attempt == self.max_retries:
+                        raise
+                    await self._backoff(attempt, e)
+
+    def _finished(self, state: _LoopState, key: str, task: asyncio.Future):
+        state.in_flight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # retrieved here in case every waiter was cancelled
+
+    async def generate_answer(self, query: str, context: str) -> str:
+        """Generate answer using LLM with provided context"""
+        payload = self._payload(query, context)
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+        state = self._state()
+        task = state.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._post(payload))
+            state.in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(state, key, done))
+        else:
+            self._count("coalesced")
         try:
-            response = requests.post(self.base_url, headers=headers, json=payload)
-            response.raise_for_status()
-            result = response.json()
+            # Shielded so one caller disconnecting does not cancel the others
+            result = await asyncio.shield(task)
             return result['choices'][0]['message']['content']
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._count("failures")
+            return f"{ANSWER_ERROR_PREFIX}: {str(e)}"
+    
+    async def stream_answer(self, query: str, context: str) -> AsyncIterator[str]:
+        """Generate the answer as a stream of text deltas (server-sent events from the API)
+
+        A failure, before or after the first delta (including a stream that
+        ends without [DONE]), raises AnswerStreamError instead of being
+        yielded as text."""
+        state = self._state()
+        payload = self._payload(query, context, stream=True)
+        try:
+            async with state.semaphore:
+                for attempt in range(self.max_retries + 1):
+                    self._count("requests")
+                    try:
+                        # The timeout bounds each read, not the whole (long) stream
+                        async with state.session.post(self.base_url, json=payload, timeout=aiohttp.ClientTimeout(
+                                sock_connect=min(self.timeout, 10.0), sock_read=self.timeout)) as response:
+                            if response.status in self.RETRY_STATUSES:
+                                raise RetryableStatusError(response)
+                            response.raise_for_status()
+                            # Only failures before the first token are retried
+                            async for raw_line in response.content:
+                                line = raw_line.decode('utf-8').strip()
+                                if not line.startswith("data:"):
+                                    continue
+                                data = line[len("data:"):].strip()
+                                if data == "[DONE]":
+                                    return
+                                delta = json.loads(data)['choices'][0].get('delta', {}).get('content')
+                                if delta:
+                                    yield delta
+                            # The connection closed mid-answer
+                            raise aiohttp.ClientPayloadError("Answer stream ended before [DONE]")
+                    except (RetryableStatusError, aiohttp.ClientConnectorError) as e:
+                        if attempt == self.max_retries:
+                            raise
+                        await self._backoff(attempt, e)
         except Exception as e:
-            return f"Error generating answer: {str(e)}"
+            self._count("failures")
+            raise AnswerStreamError(f"{ANSWER_ERROR_PREFIX}: {str(e)}") from e
+    
+    async def aclose(self):
+        """Close the connection pool of the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._states_lock:
+            state = self._states.pop(loop, None)
+        if state is not None:
+            await state.session.close()
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                'requests': self.requests,
+                'retries': self.retries,
+                'coalesced': self.coalesced,
+                'failures': self.failures,
+                'in_flight': sum(len(state.in_flight) for state in list(self._states.values()))
+            }
     
     def extract_timestamps(self, answer: str) -> List[float]:
         """Extract timestamps from LLM answer for potential video navigation"""
-        patterns = [
-            r'(\d+\.\d+)s',  # 123.45s
-            r'(\d+)s',       # 123s
-        ]
-        
-        timestamps = []
-        for pattern in patterns:
-            matches = re.findall(pattern, answer)
-            for match in matches:
-                timestamps.append(float(match))
-        
-        return sorted(set(timestamps))
\ No newline at end of file
+        return sorted(set(find_timestamps(answer)))
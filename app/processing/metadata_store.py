@@ -0,0 +1,196 @@
+import json
+import mmap
+import os
+import struct
+import numpy as np
+from typing import Dict, Iterator, List, Sequence
+
+MAGIC = b"VRSEG001"
+_HEADER = struct.Struct("<8sQQQ")  # magic, segment count, text blob bytes, video_id bytes
+
+def _pad8(n: int) -> int:
+    return (n + 7) & ~7
+
+class IntervalIndex:
+    """Sorted interval index over segment time spans.
+
+    Rows are ordered by start time, with a running maximum of end times
+    alongside, so the rows overlapping [start, end) are found with two
+    binary searches plus a check of the (usually empty) slice whose spans
+    start early but end late. Chronologically stored segments, the normal
+    case, come out as one contiguous row range.
+    """
+
+    def __init__(self, start_times: np.ndarray, end_times: np.ndarray):
+        self.order = np.argsort(start_times, kind='stable')
+        self.starts = np.asarray(start_times)[self.order]
+        self.ends = np.asarray(end_times)[self.order]
+        self.max_ends = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+        self.chronological = bool(np.all(self.order[1:] > self.order[:-1]))
+        # Position of each row in start-time order
+        self.rank = np.empty_like(self.order)
+        self.rank[self.order] = np.arange(len(self.order))
+
+    def overlapping(self, start: float, end: float) -> np.ndarray:
+        """Sorted row numbers of the segments overlapping [start, end)"""
+        hi = int(np.searchsorted(self.starts, end, side='left'))
+        lo = int(np.searchsorted(self.max_ends, start, side='right'))
+        if lo >= hi:
+            return np.zeros(0, dtype=np.int64)
+        positions = np.arange(lo, hi)[self.ends[lo:hi] > start]
+        return np.sort(self.order[positions])
+
+    def neighbors(self, row: int, n: int) -> np.ndarray:
+        """The row with up to n rows on either side in time order"""
+        position = int(self.rank[row])
+        return self.order[max(0, position - n):position + n + 1]
+
+class SegmentStore:
+    """Columnar, read-only segment metadata for one video.
+
+    On disk ({video_id}.segments) the file holds a small header followed by
+    segment_id (int64), start_time and end_time (float64), text offsets
+    (int64, n + 1 entries) and one UTF-8 blob of all texts. Opening the file
+    memory-maps it and the columns are zero-copy NumPy views, so nothing is
+    parsed up front and pages are shared through the OS page cache. Indexing
+    the store builds the result dict for that one row only.
+    """
+
+    def __init__(self, video_id: str, segment_ids: np.ndarray, start_times: np.ndarray,
+                 end_times: np.ndarray, text_offsets: np.ndarray, text_blob, buffer=None):
+        self.video_id = video_id
+        self.segment_ids = segment_ids
+        self.start_times = start_times
+        self.end_times = end_times
+        self.text_offsets = text_offsets
+        self.text_blob = text_blob
+        self._buffer = buffer  # keeps the mmap alive while views exist
+        self._intervals = None
+
+    @classmethod
+    def from_columns(cls, video_id: str, segment_ids: Sequence[int], start_times: Sequence[float],
+                     end_times: Sequence[float], texts: Sequence[str]) -> "SegmentStore":
+        """In-memory store built from per-column values"""
+        encoded = [text.encode('utf-8') for text in texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in encoded], out=offsets[1:])
+        return cls(
+            video_id,
+            np.asarray(segment_ids, dtype=np.int64),
+            np.asarray(start_times, dtype=np.float64),
+            np.asarray(end_times, dtype=np.float64),
+            offsets,
+            np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        )
+
+    @classmethod
+    def from_rows(cls, video_id: str, rows: Sequence[Dict]) -> "SegmentStore":
+        """In-memory store from metadata dicts (the legacy JSON layout)"""
+        return cls.from_columns(
+            video_id,
+            [row['segment_id'] for row in rows],
+            [row['start_time'] for row in rows],
+            [row['end_time'] for row in rows],
+            [row['text'] for row in rows]
+        )
+
+    @classmethod
+    def open(cls, path: str) -> "SegmentStore":
+        """Memory-map a .segments file"""
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n, blob_len, id_len = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a segment store")
+        offset = _HEADER.size
+        video_id = buffer[offset:offset + id_len].decode('utf-8')
+        offset += _pad8(id_len)
+
+        def column(dtype, count):
+            nonlocal offset
+            array = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes
+            return array
+
+        segment_ids = column(np.int64, n)
+        start_times = column(np.float64, n)
+        end_times = column(np.float64, n)
+        text_offsets = column(np.int64, n + 1)
+        text_blob = column(np.uint8, blob_len)
+        return cls(video_id, segment_ids, start_times, end_times, text_offsets, text_blob, buffer)
+
+    def save(self, path: str):
+        video_id = self.video_id.encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, len(self), len(self.text_blob), len(video_id)))
+            f.write(video_id.ljust(_pad8(len(video_id)), b"\0"))
+            for column in (self.segment_ids, self.start_times, self.end_times, self.text_offsets):
+                f.write(np.ascontiguousarray(column).tobytes())
+            f.write(np.ascontiguousarray(self.text_blob).tobytes())
+
+    def __len__(self) -> int:
+        return len(self.segment_ids)
+
+    def text(self, i: int) -> str:
+        return self.text_blob[self.text_offsets[i]:self.text_offsets[i + 1]].tobytes().decode('utf-8')
+
+    def texts(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self.text(i)
+
+    def __getitem__(self, i: int) -> Dict:
+        """Metadata dict of one segment (a new dict on every call)"""
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return {
+            'segment_id': int(self.segment_ids[i]),
+            'start_time': float(self.start_times[i]),
+            'end_time': float(self.end_times[i]),
+            'text': self.text(i),
+            'video_id': self.video_id
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def intervals(self) -> IntervalIndex:
+        """Time interval index over the segments, built on first use"""
+        if self._intervals is None:
+            self._intervals = IntervalIndex(self.start_times, self.end_times)
+        return self._intervals
+
+    @property
+    def nbytes(self) -> int:
+        return (self.segment_ids.nbytes + self.start_times.nbytes + self.end_times.nbytes
+                + self.text_offsets.nbytes + self.text_blob.nbytes)
+
+    @property
+    def private_nbytes(self) -> int:
+        """nbytes not backed by a memory-mapped file"""
+        return 0 if self._buffer is not None else self.nbytes
+
+def migrate_json_metadata(index_dir: str = 'data/indexes', remove_json: bool = False) -> List[str]:
+    """Convert every {video_id}_metadata.json under index_dir to a .segments store.
+
+    Returns the video_ids that were converted. JSON files are left in place
+    unless remove_json is set.
+    """
+    migrated = []
+    for name in sorted(os.listdir(index_dir)):
+        if not name.endswith('_metadata.json'):
+            continue
+        video_id = name[:-len('_metadata.json')]
+        json_path = os.path.join(index_dir, name)
+        store_path = os.path.join(index_dir, f'{video_id}.segments')
+        with open(json_path, 'r') as f:
+            rows = json.load(f)
+        SegmentStore.from_rows(video_id, rows).save(store_path + '.tmp')
+        os.replace(store_path + '.tmp', store_path)
+        if remove_json:
+            os.remove(json_path)
+        migrated.append(video_id)
+    return migrated
@@ -0,0 +1,130 @@
+import bisect
+import contextvars
+import math
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# METRICS_ENABLED=0 turns every span into a shared no-op context manager
+ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+_NOOP = nullcontext()
+
+# Stage durations of the current HTTP request, for its Server-Timing header
+_request_spans: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = \
+    contextvars.ContextVar("request_spans", default=None)
+
+class Histogram:
+    """Cumulative Prometheus histogram with one series per label set"""
+
+    def __init__(self, name: str, help: str, label_names: Tuple[str, ...], buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[Tuple[str, ...], List] = {}  # labels -> [bucket counts, count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0, 0.0]
+            i = bisect.bisect_left(self.buckets, value)  # first bound >= value
+            if i < len(self.buckets):
+                series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def totals(self) -> Dict[Tuple[str, ...], Tuple[int, float]]:
+        """(count, sum) per label set"""
+        with self._lock:
+            return {labels: (s[1], s[2]) for labels, s in self._series.items()}
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, [list(s[0]), s[1], s[2]]) for labels, s in self._series.items())
+        for labels, (counts, count, total) in series:
+            base = ",".join(f'{name}="{value}"' for name, value in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_count{{{base}}} {count}")
+            lines.append(f"{self.name}_sum{{{base}}} {total}")
+        return lines
+
+STAGE_SECONDS = Histogram("video_rag_stage_seconds", "Duration of one pipeline stage", ("pipeline", "stage"))
+REQUEST_SECONDS = Histogram("video_rag_request_seconds", "HTTP request duration", ("method", "route", "status"))
+
+class _Span:
+    __slots__ = ("pipeline", "stage", "start")
+
+    def __init__(self, pipeline: str, stage: str):
+        self.pipeline = pipeline
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        STAGE_SECONDS.observe((self.pipeline, self.stage), seconds)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((self.stage, seconds))
+        return False
+
+def span(pipeline: str, stage: str):
+    """Context manager timing one stage of the "query" or "ingest" pipeline"""
+    if not ENABLED:
+        return _NOOP
+    return _Span(pipeline, stage)
+
+def start_request() -> Optional[List[Tuple[str, float]]]:
+    """Collect the spans of the current request (call from the HTTP middleware)"""
+    if not ENABLED:
+        return None
+    spans = []
+    _request_spans.set(spans)
+    return spans
+
+def server_timing(spans: Iterable[Tuple[str, float]], total_seconds: float) -> str:
+    """Server-Timing header value; repeated stages are summed"""
+    durations: Dict[str, float] = {}
+    for stage, seconds in spans:
+        durations[stage] = durations.get(stage, 0.0) + seconds
+    durations["total"] = total_seconds
+    return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in durations.items())
+
+def _gauge_lines(name: str, help: str, samples: List[Tuple[Dict[str, str], float]]) -> List[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        base = ",".join(f'{key}="{label}"' for key, label in labels.items())
+        lines.append(f"{name}{{{base}}} {value}" if base else f"{name} {value}")
+    return lines
+
+def render(model_status: Dict[str, Dict], component_stats: Dict[str, Optional[Dict]]) -> str:
+    """Prometheus text exposition: stage and request histograms, model load
+    times, and every numeric field of the components' stats() as a gauge"""
+    lines = STAGE_SECONDS.expose() + REQUEST_SECONDS.expose()
+    lines += _gauge_lines("video_rag_model_loaded", "1 once the model is loaded",
+                          [({"model": name}, int(status['loaded'])) for name, status in model_status.items()])
+    lines += _gauge_lines("video_rag_model_load_seconds", "Time taken to load the model",
+                          [({"model": name}, status['load_seconds']) for name, status in model_status.items()
+                           if status['load_seconds'] is not None])
+    for component, stats in component_stats.items():
+        for key, value in (stats or {}).items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or math.isnan(value):
+                continue
+            lines += _gauge_lines(f"video_rag_{component}_{key}", f"{component} {key.replace('_', ' ')}",
+                                  [({}, value)])
+    return "\n".join(lines) + "\n"
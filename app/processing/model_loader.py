@@ -0,0 +1,41 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+class LazyModel:
+    """Loads a model on first use, exactly once, from whichever thread asks first.
+
+    Components hold one of these per model instead of loading in __init__,
+    so constructing them is free and processes only pay for the models they
+    actually use.
+    """
+
+    def __init__(self, name: str, load: Callable[[], Any]):
+        self.name = name
+        self._load = load
+        self._model = None
+        self._lock = threading.Lock()
+        self.load_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def get(self) -> Any:
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    start = time.perf_counter()
+                    try:
+                        model = self._load()
+                    except Exception as e:
+                        self.error = str(e)
+                        raise
+                    self.load_seconds = time.perf_counter() - start
+                    self.error = None
+                    self._model = model
+        return self._model
+
+    def status(self) -> Dict:
+        return {'loaded': self.loaded, 'load_seconds': self.load_seconds, 'error': self.error}
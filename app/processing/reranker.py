@@ -1,26 +1,207 @@
 from sentence_transformers import CrossEncoder
-from typing import List, Dict
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List, Dict, Optional, Tuple
+import hashlib
+import os
+import queue
+import threading
+import time
+from .model_loader import LazyModel
+from .inference_backend import default_backend, load_cross_encoder
+
+class _PairBatcher:
+    """Merges the (query, passage) pairs of concurrent requests into shared
+    CrossEncoder.predict calls.
+
+    One worker thread runs the model. Whatever requests queued up while the
+    previous batch was running go into the next forward pass together (up to
+    max_batch_pairs), optionally waiting max_wait_seconds for more to arrive.
+    """
+
+    def __init__(self, predict, max_batch_pairs: int, max_wait_seconds: float):
+        self._predict = predict
+        self.max_batch_pairs = max_batch_pairs
+        self.max_wait_seconds = max_wait_seconds
+        self._queue: "queue.Queue[Tuple[List[Tuple[str, str]], Future]]" = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.pairs = 0
+
+    def score(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rerank-batcher", daemon=True)
+                self._thread.start()
+        future = Future()
+        self._queue.put((pairs, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            requests = [self._queue.get()]
+            size = len(requests[0][0])
+            deadline = time.monotonic() + self.max_wait_seconds
+            while size < self.max_batch_pairs:
+                try:
+                    timeout = deadline - time.monotonic()
+                    item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                requests.append(item)
+                size += len(item[0])
+
+            pairs = [pair for request_pairs, _ in requests for pair in request_pairs]
+            try:
+                scores = self._predict(pairs)
+            except Exception as e:
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.pairs += len(pairs)
+            offset = 0
+            for request_pairs, future in requests:
+                future.set_result([float(s) for s in scores[offset:offset + len(request_pairs)]])
+                offset += len(request_pairs)
 
 class Reranker:
-    def __init__(self, model_name='cross-encoder/ms-marco-MiniLM-L-6-v2'):
-        self.model = CrossEncoder(model_name, max_length=512)
-    
-    def rerank(self, query: str, passages: List[Dict]) -> List[Dict]:
+    """Cross-encoder reranking with cross-request batching, a pair score
+    cache and optional pruning of weak first-stage candidates.
+
+    Pair scores are cached (LRU, keyed by a hash of query and passage text)
+    so repeated questions only score new passages. With prune_margin set,
+    candidates whose dense distance is more than prune_margin above the best
+    candidate's are dropped before scoring (min_candidates are always kept).
+    """
+
+    def __init__(self, model_name='cross-encoder/ms-marco-MiniLM-L-6-v2', batch_pairs: int = None,
+                 max_wait_ms: float = None, cache_size: int = None, prune_margin: Optional[float] = None,
+                 backend: Optional[str] = None):
+        self.model_name = model_name
+        # torch, torch-int8, onnx or onnx-int8 (see inference_backend)
+        self.backend = backend or default_backend()
+        self._model = LazyModel("reranker", lambda: load_cross_encoder(model_name, self.backend, max_length=512))
+        self.batch_pairs = batch_pairs or int(os.getenv("RERANK_BATCH_PAIRS", "256"))
+        max_wait_ms = float(os.getenv("RERANK_MAX_WAIT_MS", "0")) if max_wait_ms is None else max_wait_ms
+        self.cache_size = int(os.getenv("RERANK_CACHE_SIZE", "50000")) if cache_size is None else cache_size
+        if prune_margin is None and os.getenv("RERANK_PRUNE_MARGIN"):
+            prune_margin = float(os.getenv("RERANK_PRUNE_MARGIN"))
+        self.prune_margin = prune_margin
+        self._batcher = _PairBatcher(self._predict, self.batch_pairs, max_wait_ms / 1000)
+        self._cache: "OrderedDict[bytes, float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.pruned = 0
+
+    @property
+    def model(self) -> CrossEncoder:
+        return self._model.get()
+
+    @property
+    def models(self) -> List[LazyModel]:
+        return [self._model]
+
+    def warm_up(self):
+        """Load the cross-encoder now"""
+        self.model
+
+    def _predict(self, pairs: List[Tuple[str, str]]):
+        return self.model.predict(pairs, batch_size=min(len(pairs), self.batch_pairs))
+
+    @staticmethod
+    def _pair_key(query: str, text: str) -> bytes:
+        return hashlib.blake2b(f"{query}\0{text}".encode('utf-8'), digest_size=16).digest()
+
+    def prune(self, passages: List[Dict], min_candidates: int = 0) -> List[Dict]:
+        """Drop candidates whose dense distance is far above the leader's.
+
+        Uses 'dense_score' for hybrid results and 'score' (the L2 distance)
+        otherwise; candidates without a dense distance are kept.
+        """
+        if self.prune_margin is None or len(passages) <= min_candidates:
+            return passages
+        distances = [p.get('dense_score') if 'dense_score' in p else p.get('score') for p in passages]
+        known = [d for d in distances if d is not None]
+        if not known:
+            return passages
+        cutoff = min(known) + self.prune_margin
+        kept = [p for p, d in zip(passages, distances) if d is None or d <= cutoff]
+        if len(kept) < min_candidates:
+            # Top up with the closest of the pruned candidates
+            pruned = sorted((d, i) for i, d in enumerate(distances) if d is not None and d > cutoff)
+            keep = {i for _, i in pruned[:min_candidates - len(kept)]}
+            kept = [p for i, (p, d) in enumerate(zip(passages, distances))
+                    if d is None or d <= cutoff or i in keep]
+        self.pruned += len(passages) - len(kept)
+        return kept
+
+    def score_pairs(self, query: str, texts: List[str]) -> List[float]:
+        """Cross-encoder scores of (query, text) pairs, from the cache where possible"""
+        return self._score([(query, text) for text in texts])
+
+    def _score(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        keys = [self._pair_key(query, text) for query, text in pairs]
+        scores: List[Optional[float]] = [None] * len(pairs)
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                score = self._cache.get(key)
+                if score is not None:
+                    self._cache.move_to_end(key)
+                    scores[i] = score
+        missing = [i for i, score in enumerate(scores) if score is None]
+        with self._cache_lock:
+            self.cache_hits += len(pairs) - len(missing)
+            self.cache_misses += len(missing)
+
+        if missing:
+            new_scores = self._batcher.score([pairs[i] for i in missing])
+            with self._cache_lock:
+                for i, score in zip(missing, new_scores):
+                    scores[i] = score
+                    if self.cache_size:
+                        self._cache[keys[i]] = score
+                        self._cache.move_to_end(keys[i])
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return scores
+
+    def rerank(self, query: str, passages: List[Dict], min_candidates: int = 0) -> List[Dict]:
         """Rerank passages based on relevance to query"""
-        if not passages:
-            return []
-        
-        # Prepare pairs for cross-encoder
-        pairs = [(query, passage['text']) for passage in passages]
-        
-        # Get scores
-        scores = self.model.predict(pairs)
-        
-        # Add scores to passages and sort
-        for i, passage in enumerate(passages):
-            passage['rerank_score'] = float(scores[i])
-        
-        # Sort by rerank score (descending)
-        reranked = sorted(passages, key=lambda x: x['rerank_score'], reverse=True)
-        
-        return reranked
\ No newline at end of file
+        return self.rerank_batch([query], [passages], min_candidates)[0]
+
+    def rerank_batch(self, queries: List[str], passage_lists: List[List[Dict]],
+                     min_candidates: int = 0) -> List[List[Dict]]:
+        """Rerank each query's passages, scoring all pairs in shared forward passes"""
+        passage_lists = [self.prune(passages, min_candidates) for passages in passage_lists]
+
+        # Get scores for every (query, passage) pair at once
+        pairs = [(query, passage['text']) for query, passages in zip(queries, passage_lists)
+                 for passage in passages]
+        scores = self._score(pairs) if pairs else []
+
+        # Add scores to passages and sort each list (descending)
+        reranked_lists = []
+        offset = 0
+        for passages in passage_lists:
+            for passage, score in zip(passages, scores[offset:offset + len(passages)]):
+                passage['rerank_score'] = score
+            offset += len(passages)
+            reranked_lists.append(sorted(passages, key=lambda x: x['rerank_score'], reverse=True))
+
+        return reranked_lists
+
+    def stats(self) -> Dict:
+        with self._cache_lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                'cache_entries': len(self._cache),
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses,
+                'cache_hit_rate': self.cache_hits / lookups if lookups else 0.0,
+                'pruned': self.pruned,
+                'batches': self._batcher.batches,
+                'pairs_per_batch': self._batcher.pairs / self._batcher.batches if self._batcher.batches else 0.0
+            }
@@ -0,0 +1,115 @@
+import re
+import numpy as np
+from typing import Dict, List
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens used for both documents and queries"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of segments, stored as a CSR posting matrix.
+
+    Uses the same scoring as rank_bm25.BM25Okapi (including its epsilon floor
+    for negative IDF), but every posting's term weight is precomputed at build
+    time, so scoring a query is one gather and one np.bincount instead of a
+    Python loop over documents.
+    """
+
+    def __init__(self, vocabulary: Dict[str, int], term_ptr: np.ndarray,
+                 doc_ids: np.ndarray, weights: np.ndarray, num_docs: int):
+        self.vocabulary = vocabulary
+        self.term_ptr = term_ptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.num_docs = num_docs
+
+    @classmethod
+    def build(cls, texts: List[str], k1: float = 1.5, b: float = 0.75,
+              epsilon: float = 0.25) -> "BM25Index":
+        vocabulary = {}
+        term_rows, doc_rows = [], []
+        doc_lengths = np.zeros(len(texts), dtype=np.float32)
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths[doc_id] = len(tokens)
+            for token in tokens:
+                term_rows.append(vocabulary.setdefault(token, len(vocabulary)))
+                doc_rows.append(doc_id)
+
+        # Collapse (term, doc) occurrences into term frequencies, sorted by term
+        pairs = np.array(term_rows, dtype=np.int64) * max(1, len(texts)) + np.array(doc_rows, dtype=np.int64)
+        pairs, tf = np.unique(pairs, return_counts=True)
+        terms = pairs // max(1, len(texts))
+        doc_ids = (pairs % max(1, len(texts))).astype(np.int32)
+        tf = tf.astype(np.float32)
+
+        num_terms = len(vocabulary)
+        df = np.bincount(terms, minlength=num_terms).astype(np.float32)
+        idf = np.log(len(texts) - df + 0.5) - np.log(df + 0.5)
+        if num_terms:
+            idf[idf < 0] = epsilon * idf.mean()
+
+        avgdl = doc_lengths.mean() if len(texts) else 0.0
+        norm = k1 * (1 - b + b * doc_lengths[doc_ids] / max(avgdl, 1e-9))
+        weights = (idf[terms] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+
+        term_ptr = np.zeros(num_terms + 1, dtype=np.int64)
+        np.cumsum(df.astype(np.int64), out=term_ptr[1:])
+        return cls(vocabulary, term_ptr, doc_ids, weights, len(texts))
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for the query"""
+        term_ids = [self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary]
+        if not term_ids:
+            return np.zeros(self.num_docs, dtype=np.float32)
+        starts, ends = self.term_ptr[term_ids], self.term_ptr[np.array(term_ids) + 1]
+        postings = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+        return np.bincount(self.doc_ids[postings], weights=self.weights[postings],
+                           minlength=self.num_docs).astype(np.float32)
+
+    def top_k(self, query: str, k: int):
+        """(doc_ids, scores) of the k best documents with a non-zero score"""
+        scores = self.scores(query)
+        doc_ids = top_k_positive(scores, k)
+        return doc_ids, scores[doc_ids]
+
+    @property
+    def nbytes(self) -> int:
+        return self.term_ptr.nbytes + self.doc_ids.nbytes + self.weights.nbytes + 64 * len(self.vocabulary)
+
+    def save(self, path: str):
+        terms = np.empty(len(self.vocabulary), dtype=object)
+        for term, term_id in self.vocabulary.items():
+            terms[term_id] = term
+        with open(path, 'wb') as f:
+            np.savez(f, terms=terms.astype(str), term_ptr=self.term_ptr, doc_ids=self.doc_ids,
+                     weights=self.weights, num_docs=np.array(self.num_docs))
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path) as data:
+            vocabulary = {term: i for i, term in enumerate(data['terms'].tolist())}
+            return cls(vocabulary, data['term_ptr'], data['doc_ids'], data['weights'],
+                       int(data['num_docs']))
+
+def top_k_positive(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest positive scores, best first"""
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+def reciprocal_rank_fusion(rankings: List[np.ndarray], k: int, rrf_k: int = 60):
+    """Fuse ranked doc-id arrays with RRF; returns (doc_ids, fused_scores) of the top k"""
+    rankings = [np.asarray(ranking, dtype=np.int64) for ranking in rankings]
+    if not any(len(ranking) for ranking in rankings):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    ids = np.concatenate(rankings)
+    contributions = np.concatenate([1.0 / (rrf_k + np.arange(1, len(ranking) + 1))
+                                    for ranking in rankings])
+    unique_ids, inverse = np.unique(ids, return_inverse=True)
+    fused = np.bincount(inverse, weights=contributions)
+    top = np.argsort(-fused, kind="stable")[:k]
+    return unique_ids[top], fused[top].astype(np.float32)
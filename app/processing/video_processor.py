@@ -1,11 +1,85 @@
 import os
-import yt_dlp
-import whisper
-from typing import List, Dict, Tuple
+import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Tuple, Callable, Optional, Iterable, Iterator
 import json
 from datetime import datetime
-import spacy
+from urllib.parse import urlparse, parse_qs
 from pydantic import BaseModel
+from .chunked_transcription import AudioWindow, split_at_silence, stitch_transcriptions, stitch_window
+from .model_loader import LazyModel
+from .metrics import span
+from .artifact_cache import TranscriptCache, KeyedLocks
+
+# whisper, spacy and yt_dlp are imported where they are used, so processes
+# that never ingest (and VideoSegment importers) do not pay for them
+
+# Called as progress_callback(stage, fraction_of_stage_done)
+ProgressCallback = Callable[[str, float], None]
+
+# Whisper's input rate; downloads are stored as 16 kHz mono WAV to match
+SAMPLE_RATE = 16000
+AUDIO_EXTENSIONS = ("wav", "mp3")  # mp3: downloads from before the WAV format
+
+_YOUTUBE_ID = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+def video_key(video_url: str) -> str:
+    """The YouTube video id when the URL names it (watch?v=, youtu.be/,
+    shorts/, embed/, live/ or a bare id), else the stripped URL. Lets
+    ingestion recognise one video behind different URLs before yt-dlp
+    resolves the id."""
+    url = video_url.strip()
+    if _YOUTUBE_ID.match(url):
+        return url
+    parsed = urlparse(url if '//' in url else f'https://{url}')
+    host = (parsed.hostname or '').lower()
+    parts = parsed.path.strip('/').split('/')
+    candidate = None
+    if host == 'youtu.be':
+        candidate = parts[0]
+    elif host in ('youtube.com', 'youtube-nocookie.com') or host.endswith(('.youtube.com', '.youtube-nocookie.com')):
+        if parts == ['watch']:
+            candidate = parse_qs(parsed.query).get('v', [None])[0]
+        elif len(parts) >= 2 and parts[0] in ('shorts', 'embed', 'live', 'v'):
+            candidate = parts[1]
+    return candidate if candidate and _YOUTUBE_ID.match(candidate) else url
+
+def load_audio(path: str):
+    """Audio as 16 kHz mono float32 samples.
+
+    16 kHz mono 16-bit WAV is read directly; anything else is decoded and
+    resampled by ffmpeg through whisper.load_audio.
+    """
+    if path.endswith(".wav"):
+        import wave
+        import numpy as np
+        with wave.open(path, 'rb') as f:
+            if (f.getframerate(), f.getnchannels(), f.getsampwidth()) == (SAMPLE_RATE, 1, 2):
+                pcm = np.frombuffer(f.readframes(f.getnframes()), dtype='<i2')
+                return pcm.astype(np.float32) / 32768.0
+    from whisper.audio import load_audio as decode_audio
+    return decode_audio(path)
+
+# Whisper model held by each transcription worker process
+_worker_model = None
+
+def _load_whisper(model_size: str):
+    import whisper
+    return whisper.load_model(model_size)
+
+def _init_whisper_worker(model_size: str):
+    global _worker_model
+    _worker_model = _load_whisper(model_size)
+
+def _transcribe_in_worker(audio, options: Dict) -> Dict:
+    # Paths are decoded in the worker rather than pickled over as samples
+    if isinstance(audio, str):
+        audio = load_audio(audio)
+    return _worker_model.transcribe(audio, **options)
+
+def _worker_ready() -> bool:
+    return _worker_model is not None
 
 class VideoSegment(BaseModel):
     text: str
@@ -13,13 +87,161 @@ class VideoSegment(BaseModel):
     end: float
     segment_id: int
 
+# Pipeline components sentence splitting does not need; the parser alone
+# decides doc.sents, so dropping these leaves sentence boundaries unchanged
+UNUSED_SPACY_COMPONENTS = ["tagger", "attribute_ruler", "lemmatizer", "ner"]
+
+def load_sentence_splitter(sentence_splitter: str = "parser"):
+    """spaCy pipeline that only produces sentence boundaries.
+
+    "parser" keeps en_core_web_sm's dependency parser (same boundaries as the
+    full pipeline); "sentencizer" uses the much faster rule-based splitter,
+    whose boundaries can differ slightly.
+    """
+    import spacy
+    if sentence_splitter == "parser":
+        return spacy.load("en_core_web_sm", exclude=UNUSED_SPACY_COMPONENTS)
+    if sentence_splitter == "sentencizer":
+        nlp = spacy.blank("en")
+        nlp.add_pipe("sentencizer")
+        return nlp
+    raise ValueError(f"Unknown sentence_splitter: {sentence_splitter}")
+
+class SemanticChunker:
+    """Streaming sentence-aware chunker over Whisper segments.
+
+    Segment texts go through nlp.pipe in batches and finished chunks are
+    yielded as soon as they are complete. State carries over between feed()
+    calls, so a transcript can be chunked piece by piece; call flush() at the
+    end for the trailing chunk.
+    """
+
+    def __init__(self, nlp, max_words: int = 150, batch_size: int = 256, n_process: int = 1):
+        self.nlp = nlp
+        self.max_words = max_words
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.current_segment = []
+        self.current_start = 0
+        self.current_end = 0
+        self.segment_id = 0
+
+    def feed(self, raw_segments: Iterable[Dict]) -> Iterator[VideoSegment]:
+        """Chunk more Whisper segments, yielding every chunk completed so far"""
+        texts = ((segment['text'].strip(), (segment['start'], segment['end']))
+                 for segment in raw_segments)
+        docs = self.nlp.pipe(texts, as_tuples=True, batch_size=self.batch_size,
+                             n_process=self.n_process)
+        
+        for doc, (start, end) in docs:
+            for sent in doc.sents:
+                sentence = sent.text.strip()
+                words = sentence.split()
+                
+                # If adding this sentence would exceed max words, save current segment
+                # (the length on the left counts sentences, as it always has;
+                # kept so chunk boundaries stay stable across versions)
+                if len(self.current_segment) + len(words) > self.max_words and self.current_segment:
+                    yield self._emit()
+                
+                # Add sentence to current segment
+                if not self.current_segment:
+                    self.current_start = start
+                
+                self.current_segment.append(sentence)
+                self.current_end = end
+
+    def flush(self) -> List[VideoSegment]:
+        """Return the trailing partial chunk, if any"""
+        if self.current_segment:
+            return [self._emit()]
+        return []
+
+    def _emit(self) -> VideoSegment:
+        segment = VideoSegment(
+            text=" ".join(self.current_segment),
+            start=self.current_start,
+            end=self.current_end,
+            segment_id=self.segment_id
+        )
+        self.segment_id += 1
+        self.current_segment = []
+        return segment
+
 class VideoProcessor:
-    def __init__(self, model_size="base"):
-        self.model = whisper.load_model(model_size)
-        self.nlp = spacy.load("en_core_web_sm")
+    def __init__(self, model_size="base", transcribe_workers: int = 0,
+                 transcribe_mode: str = "single", window_seconds: float = 300.0,
+                 overlap_seconds: float = 2.0, sentence_splitter: str = "parser",
+                 chunk_batch_size: int = 256, chunk_n_process: int = 1,
+                 stream_window_seconds: float = 60.0,
+                 transcript_cache: Optional[TranscriptCache] = None):
+        """transcribe_workers > 0 runs Whisper in that many worker processes
+        (each with its own model) instead of in the calling thread.
+
+        transcribe_mode="parallel" splits audio at silence into overlapping
+        windows of about window_seconds and transcribes them concurrently on
+        those workers; "single" transcribes the whole file in one call.
+
+        sentence_splitter, chunk_batch_size and chunk_n_process configure
+        the spaCy pass of semantic_chunking (see load_sentence_splitter).
+
+        stream_window_seconds is the window length of process_video_streaming,
+        i.e. roughly how much audio each incremental index update covers.
+
+        With a transcript_cache, Whisper only runs on audio it has not
+        transcribed before. Downloads are skipped when the audio is already
+        on disk, and concurrent ingestions of one video are single-flighted.
+        """
+        if transcribe_mode not in ("single", "parallel"):
+            raise ValueError(f"Unknown transcribe_mode: {transcribe_mode}")
+        self.model_size = model_size
+        self.transcribe_mode = transcribe_mode
+        self.window_seconds = window_seconds
+        self.overlap_seconds = overlap_seconds
+        self.stream_window_seconds = stream_window_seconds
+        self.transcript_cache = transcript_cache
+        self._in_flight = KeyedLocks()
+        self.transcribe_workers = transcribe_workers
+        self.transcribe_pool = None
+        if transcribe_workers > 0:
+            self.transcribe_pool = ProcessPoolExecutor(
+                max_workers=transcribe_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_whisper_worker,
+                initargs=(model_size,)
+            )
+        # Models load on first use (or in warm_up), not at construction
+        self._whisper = LazyModel("whisper", lambda: _load_whisper(model_size))
+        self._nlp = LazyModel("spacy", lambda: load_sentence_splitter(sentence_splitter))
+        self.chunk_batch_size = chunk_batch_size
+        self.chunk_n_process = chunk_n_process
+    
+    @property
+    def model(self):
+        return self._whisper.get()
+    
+    @property
+    def nlp(self):
+        return self._nlp.get()
+    
+    @property
+    def models(self) -> List[LazyModel]:
+        """Models this processor loads in the API process"""
+        return [self._nlp] if self.transcribe_pool is not None else [self._whisper, self._nlp]
+    
+    def warm_up(self):
+        """Load spaCy and Whisper now (starting the worker processes, if any)"""
+        self.nlp
+        if self.transcribe_pool is None:
+            self.model
+        else:
+            futures = [self.transcribe_pool.submit(_worker_ready) for _ in range(self.transcribe_workers)]
+            for future in futures:
+                future.result()
         
     def download_video_audio(self, video_url: str, output_path: str = "data/videos") -> Tuple[str, str]:
-        """Download audio from YouTube video"""
+        """Download audio from YouTube video as 16 kHz mono WAV, unless it is already on disk"""
+        import yt_dlp
         os.makedirs(output_path, exist_ok=True)
         
         ydl_opts = {
@@ -27,95 +249,198 @@ class VideoProcessor:
             'outtmpl': f'{output_path}/%(id)s.%(ext)s',
             'postprocessors': [{
                 'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
+                'preferredcodec': 'wav',
             }],
+            # Resample once here so loading never needs ffmpeg again
+            'postprocessor_args': {'extractaudio': ['-ar', str(SAMPLE_RATE), '-ac', '1']},
             'quiet': True
         }
         
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(video_url, download=True)
+            # Resolve the video id first (metadata only), then download if needed
+            info = ydl.extract_info(video_url, download=False)
             video_id = info['id']
-            audio_path = f"{output_path}/{video_id}.mp3"
+            with self._in_flight.hold(f"download:{video_id}"):
+                audio_path = self.cached_audio(video_id, output_path)
+                if audio_path is None:
+                    ydl.process_ie_result(info, download=True)
+                    audio_path = f"{output_path}/{video_id}.wav"
+                else:
+                    print(f"Using downloaded audio {audio_path}")
             
         return audio_path, video_id
     
-    def transcribe_audio(self, audio_path: str) -> Dict:
-        """Transcribe audio using Whisper"""
-        result = self.model.transcribe(audio_path, word_timestamps=True)
+    @staticmethod
+    def cached_audio(video_id: str, output_path: str = "data/videos") -> Optional[str]:
+        """Path of previously downloaded audio for the video, if any"""
+        for extension in AUDIO_EXTENSIONS:
+            path = f"{output_path}/{video_id}.{extension}"
+            if os.path.exists(path):
+                return path
+        return None
+    
+    def transcribe_audio(self, audio_path: str, mode: str = None) -> Dict:
+        """Transcribe audio using Whisper, or return the cached transcription"""
+        if self.transcript_cache is None:
+            return self._transcribe(audio_path, mode)
+        key = self.transcript_cache.key(audio_path, self.model_size)
+        with self._in_flight.hold(f"transcribe:{key}"):
+            transcription = self.transcript_cache.get(key)
+            if transcription is not None:
+                print("Using cached transcription")
+                return transcription
+            transcription = self._transcribe(audio_path, mode)
+            self.transcript_cache.put(key, transcription)
+        return transcription
+    
+    def _transcribe(self, audio_path: str, mode: str = None) -> Dict:
+        if (mode or self.transcribe_mode) == "parallel":
+            return self.transcribe_audio_parallel(audio_path)
+        if self.transcribe_pool is not None:
+            return self.transcribe_pool.submit(
+                _transcribe_in_worker, audio_path, {'word_timestamps': True}
+            ).result()
+        result = self.model.transcribe(load_audio(audio_path), word_timestamps=True)
         return result
     
+    def transcribe_audio_parallel(self, audio_path: str) -> Dict:
+        """Transcribe silence-separated overlapping windows across the worker
+        pool and stitch them back into a single transcription"""
+        audio = load_audio(audio_path)
+        windows = split_at_silence(audio, SAMPLE_RATE, self.window_seconds, self.overlap_seconds)
+        results = list(self._transcribe_windows(audio, windows))
+        return stitch_transcriptions(results, windows)
+    
     def semantic_chunking(self, transcription: Dict, max_words: int = 150) -> List[VideoSegment]:
         """Chunk transcription semantically using spaCy"""
-        segments = []
-        
-        # Create segments based on Whisper's segments
-        for i, segment in enumerate(transcription['segments']):
-            segments.append(VideoSegment(
-                text=segment['text'].strip(),
-                start=segment['start'],
-                end=segment['end'],
-                segment_id=i
-            ))
-        
-        # Further chunk based on semantic boundaries
-        semantic_segments = []
-        current_segment = []
-        current_start = 0
-        current_end = 0
-        segment_id = 0
-        
-        for segment in segments:
-            doc = self.nlp(segment.text)
-            sentences = [sent.text.strip() for sent in doc.sents]
-            
-            for sentence in sentences:
-                words = sentence.split()
-                
-                # If adding this sentence would exceed max words, save current segment
-                if len(current_segment) + len(words) > max_words and current_segment:
-                    semantic_segments.append(VideoSegment(
-                        text=" ".join(current_segment),
-                        start=current_start,
-                        end=current_end,
-                        segment_id=segment_id
-                    ))
-                    segment_id += 1
-                    current_segment = []
-                
-                # Add sentence to current segment
-                if not current_segment:
-                    current_start = segment.start
-                
-                current_segment.append(sentence)
-                current_end = segment.end
-        
-        # Add the last segment if it exists
-        if current_segment:
-            semantic_segments.append(VideoSegment(
-                text=" ".join(current_segment),
-                start=current_start,
-                end=current_end,
-                segment_id=segment_id
-            ))
-        
+        chunker = SemanticChunker(self.nlp, max_words, self.chunk_batch_size, self.chunk_n_process)
+        semantic_segments = list(chunker.feed(transcription['segments']))
+        semantic_segments.extend(chunker.flush())
         return semantic_segments
     
-    def process_video(self, video_url: str) -> Tuple[List[VideoSegment], str]:
+    def process_video(self, video_url: str,
+                      progress_callback: Optional[ProgressCallback] = None) -> Tuple[List[VideoSegment], str]:
         """Full processing pipeline for a video"""
+        progress = progress_callback or (lambda stage, fraction: None)
+        
         print("Downloading video audio...")
-        audio_path, video_id = self.download_video_audio(video_url)
+        progress("download", 0.0)
+        with span("ingest", "download"):
+            audio_path, video_id = self.download_video_audio(video_url)
+        progress("download", 1.0)
         
         print("Transcribing audio...")
-        transcription = self.transcribe_audio(audio_path)
+        progress("transcribe", 0.0)
+        with span("ingest", "transcribe"):
+            transcription = self.transcribe_audio(audio_path)
+        progress("transcribe", 1.0)
         
         print("Chunking transcription semantically...")
-        segments = self.semantic_chunking(transcription)
+        progress("chunk", 0.0)
+        with span("ingest", "chunk"):
+            segments = self.semantic_chunking(transcription)
+        
+        self.save_segments(segments, video_id)
+        progress("chunk", 1.0)
+        
+        return segments, video_id
+
+    def process_video_streaming(self, video_url: str, max_words: int = 150,
+                                progress_callback: Optional[ProgressCallback] = None
+                                ) -> Iterator[Tuple[str, List[VideoSegment], float, float]]:
+        """Streaming pipeline: transcribe the audio in windows of about
+        stream_window_seconds and chunk each window as soon as it is done.
+
+        Yields (video_id, new chunks, seconds covered, duration) once per
+        window, in order. A chunk is only yielded once complete, so "seconds
+        covered" is the end of the last chunk so far; the last window flushes
+        the trailing chunk and covers the whole duration.
+        """
+        progress = progress_callback or (lambda stage, fraction: None)
+        
+        print("Downloading video audio...")
+        progress("download", 0.0)
+        with span("ingest", "download"):
+            audio_path, video_id = self.download_video_audio(video_url)
+        progress("download", 1.0)
         
-        # Save segments to JSON
+        audio = load_audio(audio_path)
+        duration = len(audio) / SAMPLE_RATE
+        key = None
+        if self.transcript_cache is not None:
+            key = self.transcript_cache.key(audio_path, self.model_size)
+        with self._in_flight.hold(f"transcribe:{key or audio_path}"):
+            cached = self.transcript_cache.get(key) if key is not None else None
+            if cached is not None:
+                # Already transcribed: re-chunk and index everything at once
+                print("Using cached transcription")
+                with span("ingest", "chunk"):
+                    segments = self.semantic_chunking(cached, max_words)
+                self.save_segments(segments, video_id)
+                progress("transcribe", 1.0)
+                yield video_id, segments, duration, duration
+                return
+            
+            windows = split_at_silence(audio, SAMPLE_RATE, self.stream_window_seconds, self.overlap_seconds)
+            print(f"Transcribing and chunking {len(windows)} windows...")
+            progress("transcribe", 0.0)
+            
+            chunker = SemanticChunker(self.nlp, max_words, self.chunk_batch_size, self.chunk_n_process)
+            segments = []
+            raw_segments = []
+            language = None
+            covered = 0.0
+            results = self._transcribe_windows(audio, windows)
+            for i, window in enumerate(windows):
+                with span("ingest", "transcribe"):
+                    result = next(results)
+                last = i == len(windows) - 1
+                language = language or result.get('language')
+                raw = stitch_window(result, window, last, first_id=len(raw_segments))
+                raw_segments.extend(raw)
+                with span("ingest", "chunk"):
+                    new_segments = list(chunker.feed(raw))
+                    if last:
+                        new_segments.extend(chunker.flush())
+                segments.extend(new_segments)
+                if last:
+                    covered = duration
+                elif new_segments:
+                    covered = new_segments[-1].end
+                progress("transcribe", (i + 1) / len(windows))
+                yield video_id, new_segments, covered, duration
+            
+            if key is not None:
+                self.transcript_cache.put(key, {
+                    'text': "".join(segment['text'] for segment in raw_segments),
+                    'segments': raw_segments,
+                    'language': language
+                })
+        self.save_segments(segments, video_id)
+
+    def _transcribe_windows(self, audio, windows: List[AudioWindow]) -> Iterator[Dict]:
+        """Whisper results of each window, in order. With a worker pool every
+        window is queued up front and results are yielded as they arrive;
+        without one, windows are transcribed one after another."""
+        slices = [audio[int(w.start * SAMPLE_RATE):int(w.end * SAMPLE_RATE)] for w in windows]
+        options = {'word_timestamps': True}
+        if self.transcribe_pool is not None:
+            futures = [self.transcribe_pool.submit(_transcribe_in_worker, audio_slice, options)
+                       for audio_slice in slices]
+            for future in futures:
+                yield future.result()
+        else:
+            for audio_slice in slices:
+                yield self.model.transcribe(audio_slice, **options)
+
+    def save_segments(self, segments: List[VideoSegment], video_id: str):
+        """Save chunked segments to data/transcripts/{video_id}.json"""
         os.makedirs("data/transcripts", exist_ok=True)
         output_path = f"data/transcripts/{video_id}.json"
         with open(output_path, 'w') as f:
             json.dump([seg.dict() for seg in segments], f, indent=2)
-        
-        return segments, video_id
\ No newline at end of file
+
+    def shutdown(self):
+        """Stop transcription worker processes, if any"""
+        if self.transcribe_pool is not None:
+            self.transcribe_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,124 @@
+import json
+import os
+import resource
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# /proc/self/smaps_rollup fields (kB) reported by memory_usage()
+_SMAPS_FIELDS = {
+    'Rss': 'rss_bytes',
+    'Pss': 'pss_bytes',
+    'Shared_Clean': 'shared_clean_bytes',
+    'Shared_Dirty': 'shared_dirty_bytes',
+    'Private_Clean': 'private_clean_bytes',
+    'Private_Dirty': 'private_dirty_bytes',
+    'Anonymous': 'anonymous_bytes'
+}
+
+def memory_usage() -> Dict[str, int]:
+    """Resident memory of this process in bytes.
+
+    On Linux: rss, pss (each shared page divided by the number of processes
+    mapping it, so summing pss over workers gives their real footprint),
+    shared and private clean/dirty pages, and anonymous memory. Elsewhere
+    only the peak RSS is available.
+    """
+    try:
+        usage = {}
+        with open('/proc/self/smaps_rollup', 'r') as f:
+            for line in f:
+                fields = line.split()
+                key = _SMAPS_FIELDS.get(fields[0].rstrip(':'))
+                if key is not None:
+                    usage[key] = int(fields[1]) * 1024
+        return usage
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kB on Linux, bytes on macOS
+        return {'max_rss_bytes': peak if os.uname().sysname == 'Darwin' else peak * 1024}
+
+class WorkerRegistry:
+    """Memory reports of every worker process sharing a data directory.
+
+    Each worker (uvicorn --workers, or several replicas on one volume)
+    rewrites {host}-{pid}.json under path every interval seconds; report()
+    reads them all, so any worker can answer for the others. Reports not
+    refreshed for three intervals belong to exited workers and are removed.
+    """
+
+    def __init__(self, path: Optional[str] = None, interval: float = 10.0,
+                 role: Optional[str] = None, extra: Optional[Callable[[], Dict]] = None):
+        self.path = path or os.getenv("WORKER_REPORT_DIR", "data/workers")
+        os.makedirs(self.path, exist_ok=True)
+        self.interval = interval
+        self.role = role
+        self.extra = extra or (lambda: {})
+        self.host = socket.gethostname()
+        self.started_at = time.time()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def report_path(self) -> str:
+        return os.path.join(self.path, f"{self.host}-{os.getpid()}.json")
+
+    def start(self):
+        """Publish now and then every interval seconds from a daemon thread"""
+        self.publish()
+        self._thread = threading.Thread(target=self._run, name="worker-report", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.publish()
+            except OSError as e:
+                print(f"Could not write worker report: {e}")
+
+    def publish(self) -> Dict:
+        report = {
+            'host': self.host,
+            'pid': os.getpid(),
+            'role': self.role,
+            'started_at': self.started_at,
+            'updated_at': time.time(),
+            'memory': memory_usage(),
+            **self.extra()
+        }
+        tmp_path = self.report_path + f'.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(report, f)
+        os.replace(tmp_path, self.report_path)
+        return report
+
+    def report(self) -> List[Dict]:
+        """Latest report of every live worker, this one refreshed first"""
+        self.publish()
+        reports = []
+        now = time.time()
+        for name in sorted(os.listdir(self.path)):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.path, name)
+            try:
+                with open(path, 'r') as f:
+                    report = json.load(f)
+            except (OSError, ValueError):
+                continue  # removed or being replaced
+            if now - report['updated_at'] > 3 * self.interval:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            reports.append(report)
+        return reports
+
+    def stop(self):
+        self._stop.set()
+        try:
+            os.remove(self.report_path)
+        except FileNotFoundError:
+            pass
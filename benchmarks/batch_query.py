@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Throughput of answering many questions one by one vs as a batch.
+
+Runs the retrieval and reranking part of /query for --queries questions
+against one synthetic video, first one question at a time (encode one
+query, search one row, rerank alone, as separate /query calls do) and then
+through search_batch and rerank_batch as /query_batch does, and checks that
+both return the same segments.
+
+Usage: python -m benchmarks.batch_query [--hours 1] [--queries 300]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.processing.indexer import MultiVectorIndexer
+from app.processing.reranker import Reranker
+from benchmarks.synthetic import make_queries, make_video_segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hours", type=float, default=1.0)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rerank-top-k", type=int, default=3)
+    parser.add_argument("--mode", choices=["dense", "hybrid"], default="dense")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="video_rag_batch_"))
+    indexer = MultiVectorIndexer(corpus_enabled=False)
+    video_index = indexer.create_index(make_video_segments(args.hours * 3600, seed=0), "bench")
+    queries = make_queries(args.queries, seed=1)
+    indexer.search_batch(queries[:8], k=args.top_k, video_index=video_index)  # warm up
+    Reranker(cache_size=0).warm_up()
+
+    # Fresh rerankers without a score cache, so neither run benefits from the other
+    reranker = Reranker(cache_size=0)
+    start = time.perf_counter()
+    single = []
+    for query in queries:
+        results = indexer.search(query, k=args.top_k, video_index=video_index, mode=args.mode)
+        single.append(reranker.rerank(query, results, args.rerank_top_k)[:args.rerank_top_k])
+    single_seconds = time.perf_counter() - start
+
+    reranker = Reranker(cache_size=0)
+    start = time.perf_counter()
+    results = indexer.search_batch(queries, k=args.top_k, video_index=video_index, mode=args.mode)
+    batched = [r[:args.rerank_top_k] for r in reranker.rerank_batch(queries, results, args.rerank_top_k)]
+    batch_seconds = time.perf_counter() - start
+
+    same = sum([s['segment_id'] for s in a] == [s['segment_id'] for s in b] for a, b in zip(single, batched))
+    print(json.dumps({
+        'queries': args.queries,
+        'segments': len(video_index.metadata),
+        'one_by_one': {'seconds': round(single_seconds, 3),
+                       'queries_per_second': round(args.queries / single_seconds, 1)},
+        'batched': {'seconds': round(batch_seconds, 3),
+                    'queries_per_second': round(args.queries / batch_seconds, 1)},
+        'speedup': round(single_seconds / batch_seconds, 2),
+        'identical_results': same
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
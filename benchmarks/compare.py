@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmarks.suite reports and flag regressions.
+
+Every numeric field present in both reports is compared. Latencies and
+durations (*_ms*, *_seconds) are better lower; rates (*per_second*,
+realtime_factor) are better higher; other fields (counts, sizes) are listed
+but never flagged. Exits 1 when any metric is worse by more than --threshold.
+
+Usage: python -m benchmarks.compare BASELINE.json CANDIDATE.json [--threshold 0.1]
+"""
+
+import argparse
+import json
+import sys
+
+# Report fields describing the run rather than its performance
+SKIPPED = {'args', 'cpu_count', 'content_seconds', 'audio_seconds'}
+
+
+def flatten(report, prefix=""):
+    for key, value in report.items():
+        if key in SKIPPED:
+            continue
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from flatten(value, path)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, value
+
+
+def direction(path):
+    """+1 if higher is better, -1 if lower is better, 0 if neither"""
+    name = path.rsplit(".", 1)[-1]
+    if "per_second" in name or name == "realtime_factor":
+        return 1
+    if "_ms" in name or name.endswith("_seconds") or path.split(".")[-2:-1] == ["server_ms"]:
+        return -1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    old, new = dict(flatten(baseline)), dict(flatten(candidate))
+    metrics, regressions = {}, []
+    for path in old.keys() & new.keys():
+        change = (new[path] - old[path]) / old[path] if old[path] else None
+        metrics[path] = {'baseline': old[path], 'candidate': new[path],
+                         'change': round(change, 4) if change is not None else None}
+        sign = direction(path)
+        if change is not None and sign and -sign * change > args.threshold:
+            regressions.append(path)
+
+    print(json.dumps({
+        'baseline': {'commit': baseline.get('commit'), 'dirty': baseline.get('dirty')},
+        'candidate': {'commit': candidate.get('commit'), 'dirty': candidate.get('dirty')},
+        'threshold': args.threshold,
+        'regressions': sorted(regressions),
+        'metrics': dict(sorted(metrics.items()))
+    }, indent=2))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Concurrent query load test for per-video VideoIndex handles.
+
+Indexes several synthetic videos, then runs many searches across them on a
+thread pool while one video is repeatedly re-indexed. Every result must come
+from the requested video and match the serial baseline, otherwise the run
+exits non-zero.
+
+Usage: python -m benchmarks.concurrent_query_load [--videos 8] [--queries 2000]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.processing.indexer import MultiVectorIndexer
+from benchmarks.synthetic import TOPICS, make_queries, make_video_segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--videos", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=600, help="seconds of content per video")
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="video_rag_load_"))
+    indexer = MultiVectorIndexer()
+    video_ids = [f"video{i:03d}" for i in range(args.videos)]
+    segments = {}
+    for i, video_id in enumerate(video_ids):
+        segments[video_id] = make_video_segments(args.duration, seed=i, topic=i % len(TOPICS))
+        indexer.create_index(segments[video_id], video_id)
+
+    rng = random.Random(0)
+    workload = [(rng.choice(video_ids), query) for query in make_queries(args.queries, seed=1)]
+
+    def run_query(item):
+        video_id, query = item
+        video_index = indexer.load_index(video_id)
+        results = indexer.search(query, k=args.k, video_index=video_index)
+        return [(r['video_id'], r['segment_id']) for r in results]
+
+    # Serial baseline
+    start = time.perf_counter()
+    expected = [run_query(item) for item in workload]
+    serial_seconds = time.perf_counter() - start
+
+    # Concurrent run with a writer re-indexing one video the whole time
+    stop = threading.Event()
+    reindexed = [0]
+
+    def writer():
+        while not stop.is_set():
+            indexer.create_index(segments[video_ids[0]], video_ids[0])
+            reindexed[0] += 1
+
+    writer_thread = threading.Thread(target=writer, daemon=True)
+    writer_thread.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        actual = list(pool.map(run_query, workload))
+    concurrent_seconds = time.perf_counter() - start
+    stop.set()
+    writer_thread.join()
+
+    mismatches = sum(
+        1 for (video_id, _), got, want in zip(workload, actual, expected)
+        if got != want or any(vid != video_id for vid, _ in got)
+    )
+    report = {
+        'videos': args.videos,
+        'queries': args.queries,
+        'workers': args.workers,
+        'reindexes_during_run': reindexed[0],
+        'serial_qps': args.queries / serial_seconds,
+        'concurrent_qps': args.queries / concurrent_seconds,
+        'mismatches': mismatches,
+        'index_cache': indexer.index_cache.stats()
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Recall vs latency of the HNSW CorpusIndex against exact flat search.
+
+Uses clustered random unit vectors (one cluster mix per "video") so it can
+run at hundreds of thousands of segments without an embedding model.
+Reports recall@k and per-query latency for several efSearch values, for
+unfiltered queries and for queries filtered to a subset of videos.
+
+Usage: python -m benchmarks.corpus_ann [--segments 200000] [--videos 500]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.processing.corpus_index import CorpusIndex
+
+
+def clustered_vectors(rng, n, dimension, clusters):
+    centers = rng.normal(size=(clusters, dimension)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.6 * rng.normal(size=(n, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--segments", type=int, default=200000)
+    parser.add_argument("--videos", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--filter-fraction", type=float, default=0.1,
+                        help="share of videos a filtered query is restricted to")
+    parser.add_argument("--ef", default="16,32,64,128,256")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = clustered_vectors(rng, args.segments, args.dimension, clusters=256)
+    owners = np.sort(rng.integers(0, args.videos, args.segments))
+    queries = clustered_vectors(rng, args.queries, args.dimension, clusters=256)
+
+    corpus = CorpusIndex(args.dimension, path=tempfile.mkdtemp(prefix="video_rag_corpus_"))
+    start = time.perf_counter()
+    for video in range(args.videos):
+        corpus.add_video(f"video{video}", vectors[owners == video], save=False)
+    build_seconds = time.perf_counter() - start
+
+    flat = faiss.IndexFlatL2(args.dimension)
+    flat.add(vectors)
+    video_names = np.array([f"video{v}" for v in range(args.videos)])
+    local_rows = np.concatenate([np.arange(np.count_nonzero(owners == v)) for v in range(args.videos)])
+    filter_videos = rng.choice(args.videos, max(1, int(args.videos * args.filter_fraction)), replace=False)
+
+    def exact(query, allowed=None):
+        if allowed is None:
+            _, ids = flat.search(query.reshape(1, -1), args.k)
+            ids = ids[0]
+        else:
+            rows = np.flatnonzero(np.isin(owners, allowed))
+            distances = ((vectors[rows] - query) ** 2).sum(axis=1)
+            ids = rows[np.argsort(distances)[:args.k]]
+        return {(video_names[owners[i]], int(local_rows[i])) for i in ids}
+
+    report = {'segments': args.segments, 'videos': args.videos, 'k': args.k,
+              'build_seconds': build_seconds}
+    for label, allowed in (("unfiltered", None), ("filtered", filter_videos)):
+        truth = [exact(q, allowed) for q in queries]
+        start = time.perf_counter()
+        for q in queries:
+            exact(q, allowed)
+        flat_ms = (time.perf_counter() - start) * 1000 / args.queries
+        rows = []
+        video_ids = None if allowed is None else [video_names[v] for v in allowed]
+        for ef in [int(e) for e in args.ef.split(",")]:
+            corpus.ef_search = ef
+            recall_hits = 0
+            start = time.perf_counter()
+            for q, expected in zip(queries, truth):
+                hits = corpus.search(q, args.k, video_ids)
+                recall_hits += len({(v, r) for v, r, _ in hits} & expected)
+            hnsw_ms = (time.perf_counter() - start) * 1000 / args.queries
+            rows.append({'ef_search': ef, f'recall@{args.k}': recall_hits / (args.k * args.queries),
+                         'latency_ms': hnsw_ms})
+        report[label] = {'flat_latency_ms': flat_ms, 'hnsw': rows}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Hierarchical (section -> chunk + sentence) vs flat chunk retrieval: quality, latency, ingest cost.
+
+A synthetic transcript is chunked with the real semantic chunker and
+indexed twice, flat and with section and sentence levels. Two workloads:
+
+  precise  a random sentence with a third of its words dropped; the chunk
+           holding it is the answer (recall@k, MRR) and its start time the
+           timestamp (error against the hit's 'sentence', or the chunk start
+           for flat modes; sentence times are interpolated within their
+           chunk on both sides)
+  broad    "what does the video say about X and Y" from the topic
+           vocabularies; precision@k is the share of hits mentioning both
+
+vectors_scored counts the vectors a query is compared with: every chunk
+for flat search; for hierarchical, every section and chunk (both levels
+are small) plus the sentences of the chunks it descends into.
+
+Usage: python -m benchmarks.hierarchical_retrieval [--hours 10] [--queries 300] [--sections 1,2,3]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.processing.indexer import MultiVectorIndexer
+from app.processing.sparse_index import tokenize
+from app.processing.video_processor import VideoProcessor
+from benchmarks.synthetic import make_queries, make_transcript
+
+
+def precise_queries(hierarchy, n, rng):
+    workload = []
+    for _ in range(n):
+        row = rng.randrange(hierarchy.sentence_index.ntotal)
+        words = hierarchy.sentences.text(row).split()
+        kept = [w for w in words if rng.random() > 1 / 3] or words
+        workload.append((" ".join(kept), int(hierarchy.sentences.segment_ids[row]),
+                         float(hierarchy.sentences.start_times[row])))
+    return workload
+
+
+def timed_search(indexer, video_index, queries, **kwargs):
+    results, seconds = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(indexer.search(query, video_index=video_index, **kwargs))
+        seconds.append(time.perf_counter() - start)
+    latencies = np.array(seconds) * 1000
+    return results, {'latency_ms_p50': round(float(np.percentile(latencies, 50)), 3),
+                     'latency_ms_p99': round(float(np.percentile(latencies, 99)), 3)}
+
+
+def vectors_scored(indexer, video_index, queries, sections, k):
+    hierarchy = video_index.hierarchy
+    if sections is None:
+        return video_index.index.ntotal
+    query_embeddings = indexer.embedding_model.encode(queries).astype(np.float32)
+    _, section_ids = hierarchy.section_index.search(query_embeddings, sections)
+    _, chunk_ids = video_index.index.search(query_embeddings, max(4 * k, 50))
+    counts = []
+    for nearest, chunks in zip(section_ids, chunk_ids):
+        rows = hierarchy.descend(nearest, chunks[chunks >= 0])
+        counts.append(hierarchy.section_index.ntotal + video_index.index.ntotal + len(hierarchy.sentence_rows(rows)))
+    return round(float(np.mean(counts)), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hours", type=float, default=10.0)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--ks", default="1,3,5,10")
+    parser.add_argument("--sections", default="1,2,3", help="sections descended into per query")
+    parser.add_argument("--section-chunks", type=int, default=4)
+    args = parser.parse_args()
+    ks = [int(k) for k in args.ks.split(",")]
+    k = max(ks)
+
+    os.chdir(tempfile.mkdtemp(prefix="video_rag_hierarchy_"))
+    segments = VideoProcessor().semantic_chunking(make_transcript(args.hours * 3600, seed=0))
+    report = {'chunks': len(segments), 'queries': args.queries, 'ingest': {}, 'modes': {}}
+    handles = {}
+    for name, hierarchical in (('flat', False), ('hierarchical', True)):
+        indexer = MultiVectorIndexer(corpus_enabled=False, hierarchical=hierarchical,
+                                     section_chunks=args.section_chunks)
+        indexer.warm_up()
+        start = time.perf_counter()
+        handles[name] = indexer, indexer.create_index(segments, f"bench_{name}")
+        report['ingest'][f'{name}_seconds'] = round(time.perf_counter() - start, 3)
+    indexer, video_index = handles['hierarchical']
+    report['sections'] = video_index.hierarchy.section_index.ntotal
+    report['sentences'] = video_index.hierarchy.sentence_index.ntotal
+
+    rng = random.Random(0)
+    precise = precise_queries(video_index.hierarchy, args.queries, rng)
+    broad = make_queries(args.queries, seed=1)
+    broad_words = [tokenize(q.split("about ", 1)[1]) for q in broad]
+    precise_text = [q for q, _, _ in precise]
+    for q in precise_text[:10] + broad[:10]:  # warm up
+        indexer.search(q, k=k, video_index=video_index, mode="hierarchical")
+
+    modes = [('dense', {'mode': 'dense'}, None), ('hybrid', {'mode': 'hybrid'}, None)]
+    modes += [(f'hierarchical_s{s}', {'mode': 'hierarchical', 'sections': s}, s)
+              for s in (int(s) for s in args.sections.split(","))]
+    for name, kwargs, sections in modes:
+        results, latency = timed_search(indexer, video_index, precise_text, k=k, **kwargs)
+        ranks, errors = [], []
+        for hits, (_, target, timestamp) in zip(results, precise):
+            ids = [h['segment_id'] for h in hits]
+            ranks.append(ids.index(target) + 1 if target in ids else None)
+            if ids and ids[0] == target:
+                errors.append(abs(hits[0].get('sentence', {}).get('start_time', hits[0]['start_time']) - timestamp))
+        broad_results, broad_latency = timed_search(indexer, video_index, broad, k=5, **kwargs)
+        precision = [np.mean([all(w in tokenize(h['text']) for w in words) for h in hits]) if hits else 0.0
+                     for hits, words in zip(broad_results, broad_words)]
+        report['modes'][name] = {
+            'precise': {
+                'recall': {f'@{n}': round(sum(r is not None and r <= n for r in ranks) / len(ranks), 4) for n in ks},
+                'mrr': round(float(np.mean([1 / r if r else 0.0 for r in ranks])), 4),
+                'timestamp_error_s_p50': round(float(np.median(errors)), 1) if errors else None,
+                **latency
+            },
+            'broad': {'precision@5': round(float(np.mean(precision)), 4), **broad_latency},
+            'vectors_scored': vectors_scored(indexer, video_index, precise_text, sections, k)
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
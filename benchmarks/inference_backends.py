@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Encode and rerank throughput per CPU core for each inference backend.
+
+Loads the embedder and cross-encoder with every backend in --backends
+(exporting ONNX graphs into --cache-dir on first use), then measures
+segments encoded per second and (query, segment) pairs scored per second
+with 1 and --threads threads, divided by the thread count. Outputs are
+compared with the torch backend on the same inputs: minimum cosine
+similarity for embeddings, correlation and top-5 agreement for rerank scores.
+
+Usage: python -m benchmarks.inference_backends [--backends torch torch-int8 onnx onnx-int8] [--threads 4]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.processing.inference_backend import INFERENCE_BACKENDS, load_cross_encoder, load_embedder, parity
+from benchmarks.synthetic import make_queries, make_video_segments
+
+
+def set_threads(threads):
+    import torch
+    torch.set_num_threads(threads)
+    os.environ["INFERENCE_THREADS"] = str(threads)
+
+
+def throughput(fn, items, repeats):
+    fn(items[:32])  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(items)
+    return len(items) * repeats / (time.perf_counter() - start)
+
+
+def top_agreement(reference, scores, group, k=5):
+    agree = []
+    for start in range(0, len(reference), group):
+        a = set(np.argsort(-reference[start:start + group])[:k])
+        b = set(np.argsort(-scores[start:start + group])[:k])
+        agree.append(len(a & b) / k)
+    return float(np.mean(agree))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=list(INFERENCE_BACKENDS))
+    parser.add_argument("--threads", type=int, default=os.cpu_count())
+    parser.add_argument("--segments", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=16)
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--cache-dir", default="data/models")
+    args = parser.parse_args()
+    os.environ["ONNX_CACHE_DIR"] = args.cache_dir
+
+    texts = [s.text for s in make_video_segments(3 * 3600, seed=0)][:args.segments]
+    pairs = [(query, texts[(i * 37 + j) % len(texts)])
+             for i, query in enumerate(make_queries(args.queries, seed=1)) for j in range(args.candidates)]
+
+    report = {'segments': len(texts), 'pairs': len(pairs), 'backends': {}}
+    reference = {}
+    for backend in args.backends:
+        result = {}
+        for threads in sorted({1, args.threads}):
+            set_threads(threads)
+            embedder = load_embedder("all-MiniLM-L6-v2", backend)
+            cross_encoder = load_cross_encoder("cross-encoder/ms-marco-MiniLM-L-6-v2", backend)
+            encode_rate = throughput(lambda t: embedder.encode(t, batch_size=128), texts, args.repeats)
+            rerank_rate = throughput(lambda p: cross_encoder.predict(p, batch_size=64), pairs, args.repeats)
+            result[f'threads_{threads}'] = {
+                'encode_per_second_per_core': round(encode_rate / threads, 1),
+                'rerank_pairs_per_second_per_core': round(rerank_rate / threads, 1)
+            }
+
+        embeddings = embedder.encode(texts, batch_size=128)
+        scores = np.asarray(cross_encoder.predict(pairs, batch_size=64), dtype=np.float32)
+        if backend == "torch":
+            reference = {'embeddings': embeddings, 'scores': scores}
+        elif reference:
+            quantized = backend.endswith("int8")
+            result['parity_vs_torch'] = {
+                'embeddings': parity(reference['embeddings'], embeddings, quantized),
+                'rerank_scores': parity(reference['scores'], scores, quantized),
+                'rerank_top5_agreement': top_agreement(reference['scores'], scores, args.candidates)
+            }
+        if hasattr(embedder, 'parity'):
+            result['export_parity'] = {'embedding': embedder.parity, 'reranker': cross_encoder.parity}
+        report['backends'][backend] = result
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
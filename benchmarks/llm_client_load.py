@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+LLM client latency under concurrent load, against a local mock LLM.
+
+Fires --requests answer generations with --concurrency callers at a time at
+benchmarks.mock_llm_server, optionally with a fraction of rejected (429/503)
+upstream requests and of repeated prompts. Compares the pooled async
+LLMClient with the previous approach (a fresh requests.post per call on a
+thread pool) and reports p50/p99 latency, throughput, errors, retries,
+coalesced prompts and upstream connections opened.
+
+Usage: python -m benchmarks.llm_client_load [--requests 500] [--concurrency 64] [--error-rate 0.05]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+
+from app.processing.llm_integration import LLMClient
+from benchmarks.synthetic import make_queries
+
+
+def make_workload(n, duplicate_rate, seed=0):
+    rng = random.Random(seed)
+    queries = make_queries(n, seed=seed)
+    workload = []
+    for i, query in enumerate(queries):
+        if workload and rng.random() < duplicate_rate:
+            # Same question and context as a recent request, likely still in flight
+            workload.append(workload[rng.randrange(max(0, len(workload) - 8), len(workload))])
+        else:
+            workload.append((query, f"[Segment 1, Time: {i % 600:.2f}-{i % 600 + 5:.2f}s]: {query}\n\n"))
+    return workload
+
+
+def report(name, latencies, seconds, errors, extra=None):
+    latencies = np.array(latencies) * 1000
+    result = {
+        "client": name,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 1),
+        "requests_per_second": round(len(latencies) / seconds, 1),
+        "errors": errors
+    }
+    result.update(extra or {})
+    return result
+
+
+async def run_async(client, workload, concurrency):
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(query, context):
+        async with gate:
+            start = time.perf_counter()
+            answer = await client.generate_answer(query, context)
+            latencies.append(time.perf_counter() - start)
+            return answer.startswith("Error")
+
+    start = time.perf_counter()
+    errors = sum(await asyncio.gather(*(one(q, c) for q, c in workload)))
+    seconds = time.perf_counter() - start
+    await client.aclose()
+    return latencies, seconds, errors
+
+
+def run_blocking(url, workload, concurrency, payload_for):
+    def one(item):
+        start = time.perf_counter()
+        try:
+            response = requests.post(url, json=payload_for(*item))
+            response.raise_for_status()
+            failed = False
+        except Exception:
+            failed = True
+        return time.perf_counter() - start, failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(one, workload))
+    return [r[0] for r in results], time.perf_counter() - start, sum(r[1] for r in results)
+
+
+class MockServerProcess:
+    """benchmarks.mock_llm_server in its own process, so it does not compete
+    with the client under test for the GIL"""
+
+    def __init__(self, args, port):
+        self.url = f"http://127.0.0.1:{port}/v1/chat/completions"
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.mock_llm_server", "--port", str(port),
+             "--first-token-ms", str(args.first_token_ms), "--token-ms", str(args.token_ms),
+             "--error-rate", str(args.error_rate)],
+            cwd=REPO_ROOT, stdout=subprocess.DEVNULL
+        )
+        for _ in range(100):
+            try:
+                requests.get(self.url, timeout=1)
+                return
+            except requests.exceptions.ConnectionError:
+                time.sleep(0.05)
+
+    def stats(self):
+        stats = requests.get(self.url).json()
+        return {"upstream_requests": stats["requests_served"], "connections": stats["connections"] - 1}
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--max-concurrency", type=int, default=64, help="LLMClient upstream limit")
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--first-token-ms", type=float, default=100)
+    parser.add_argument("--token-ms", type=float, default=1)
+    parser.add_argument("--port", type=int, default=8011)
+    args = parser.parse_args()
+
+    workload = make_workload(args.requests, args.duplicate_rate)
+    results = []
+
+    server = MockServerProcess(args, args.port)
+    try:
+        client = LLMClient(api_key="benchmark", max_concurrency=args.max_concurrency, backoff_seconds=0.05)
+        client.base_url = server.url
+        latencies, seconds, errors = asyncio.run(run_async(client, workload, args.concurrency))
+        results.append(report("async_pooled", latencies, seconds, errors, dict(server.stats(), **client.stats())))
+    finally:
+        server.stop()
+
+    server = MockServerProcess(args, args.port + 1)
+    try:
+        latencies, seconds, errors = run_blocking(server.url, workload, args.concurrency, client._payload)
+        results.append(report("requests_per_call", latencies, seconds, errors, server.stats()))
+    finally:
+        server.stop()
+
+    print(json.dumps({"requests": args.requests, "concurrency": args.concurrency,
+                      "error_rate": args.error_rate, "duplicate_rate": args.duplicate_rate,
+                      "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
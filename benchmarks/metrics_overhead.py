@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Cost of stage timing spans, with metrics enabled and with METRICS_ENABLED=0.
+
+Measures a bare span() enter/exit, with and without a request collecting
+Server-Timing entries, and single-query dense searches (which run two
+spans each) against a synthetic video index.
+
+Usage: python -m benchmarks.metrics_overhead [--iterations 200000] [--searches 2000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.processing import metrics
+from app.processing.indexer import MultiVectorIndexer
+from benchmarks.synthetic import make_queries, make_video_segments
+
+
+def span_ns(iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with metrics.span("query", "bench"):
+            pass
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def search_us(indexer, video_index, queries):
+    start = time.perf_counter()
+    for query in queries:
+        indexer.search(query, k=10, video_index=video_index)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--searches", type=int, default=2000)
+    parser.add_argument("--hours", type=float, default=1.0)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="video_rag_metrics_"))
+    indexer = MultiVectorIndexer(corpus_enabled=False)
+    video_index = indexer.create_index(make_video_segments(args.hours * 3600, seed=0), "bench")
+    queries = make_queries(args.searches, seed=1)
+    search_us(indexer, video_index, queries[:100])  # warm up
+
+    report = {'iterations': args.iterations, 'searches': args.searches, 'results': {}}
+    for name, enabled in (('disabled', False), ('enabled', True)):
+        metrics.ENABLED = enabled
+        result = {'span_ns': round(span_ns(args.iterations), 1)}
+        metrics.start_request()
+        result['span_in_request_ns'] = round(span_ns(args.iterations), 1)
+        result['search_us'] = round(search_us(indexer, video_index, queries), 1)
+        report['results'][name] = result
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Local OpenAI-compatible chat completions server for benchmarks.
+
+Answers POST /v1/chat/completions with a canned answer that cites the first
+timestamps found in the prompt, either as one JSON body or, with
+"stream": true, as server-sent events one word at a time. Latency is
+simulated with a fixed time to first token and a per-token delay, a
+fraction of requests can be rejected with 429/503 to exercise retries, and
+streams can be cut off after a number of tokens, without [DONE]. GET
+on any path returns request counters. Point the
+backend at it with LLM_BASE_URL=http://127.0.0.1:<port>/v1/chat/completions.
+
+Usage: python -m benchmarks.mock_llm_server [--port 8001] [--first-token-ms 300] [--token-ms 20] [--error-rate 0]
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_TIME_RANGE = re.compile(r"Time: (\d+\.\d+)-(\d+\.\d+)s")
+
+
+def make_answer(prompt, words=60):
+    """Deterministic answer of about `words` words citing the prompt's segments"""
+    cited = [f"{start}s" for start, _ in _TIME_RANGE.findall(prompt)[:3]] or ["0.00s"]
+    sentence = "The video covers this point in detail, explaining the reasoning step by step (see {})."
+    text = []
+    while len(text) < words:
+        text.extend(sentence.format(cited[len(text) % len(cited)]).split())
+    return " ".join(text[:words])
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # the default backlog of 5 drops SYNs under load
+
+    def __init__(self, port=0, first_token_seconds=0.3, token_seconds=0.02, answer_words=60,
+                 error_rate=0.0, seed=0, drop_after_tokens=None):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.first_token_seconds = first_token_seconds
+        self.token_seconds = token_seconds
+        self.answer_words = answer_words
+        self.error_rate = error_rate
+        self.drop_after_tokens = drop_after_tokens
+        self.requests_served = 0
+        self.errors_served = 0
+        self.connections = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def process_request_thread(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request_thread(request, client_address)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1/chat/completions"
+
+    def start(self):
+        """Serve on a daemon thread; returns self"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; with Nagle on, a kept-alive
+    # connection would wait on the client's delayed ACK between them
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        """Request counters, for benchmarks running the server in another process"""
+        server = self.server
+        payload = json.dumps({"requests_served": server.requests_served, "errors_served": server.errors_served,
+                              "connections": server.connections}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        server = self.server
+        with server._lock:
+            server.requests_served += 1
+            fail = server._rng.random() < server.error_rate
+            if fail:
+                server.errors_served += 1
+        if fail:
+            status = 429 if server.errors_served % 2 else 503
+            payload = json.dumps({"error": {"message": "simulated overload"}}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if status == 429:
+                self.send_header("Retry-After", "0")
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        prompt = body["messages"][-1]["content"]
+        tokens = [word + " " for word in make_answer(prompt, server.answer_words).split()]
+        time.sleep(server.first_token_seconds)
+
+        if not body.get("stream"):
+            time.sleep(server.token_seconds * (len(tokens) - 1))
+            payload = json.dumps({
+                "object": "chat.completion",
+                "model": body.get("model"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(tokens)}}]
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for i, token in enumerate(tokens):
+            if i == server.drop_after_tokens:
+                self.close_connection = True
+                return
+            if i:
+                time.sleep(server.token_seconds)
+            chunk = {"object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--answer-words", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429/503")
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.port, args.first_token_ms / 1000, args.token_ms / 1000, args.answer_words,
+                           args.error_rate)
+    print(f"Mock LLM listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Per-worker memory of uvicorn --workers with memory-mapped vs private indexes.
+
+Builds --videos synthetic video indexes, then for INDEX_MMAP=1 and
+INDEX_MMAP=0 starts the query role with --workers processes, sends
+/query_batch requests (no LLM) until every worker has loaded every index,
+and reads the per-worker reports from /workers. PSS divides each shared
+page among the processes mapping it, so total_pss is the real footprint of
+the worker pool; index_mib is the size of the .index files.
+
+Usage: python -m benchmarks.multi_worker_memory [--workers 4] [--videos 8] [--hours 10]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+
+from app.processing.indexer import INDEX_DIR, MultiVectorIndexer
+from benchmarks.synthetic import make_video_segments
+
+
+def wait_ready(base, timeout=600):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if requests.get(f"{base}/ready", timeout=1).status_code == 200:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("backend did not become ready")
+
+
+def run_pool(args, workdir, mmap):
+    env = dict(os.environ, VIDEO_RAG_ROLE="query", CORPUS_INDEX="0", ANSWER_CACHE="0",
+               INDEX_MMAP="1" if mmap else "0", WORKER_REPORT_SECONDS="1",
+               INDEX_CACHE_MAX_BYTES=str(8 << 30),
+               PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.getenv("PYTHONPATH")])))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.backend.main:app", "--port", str(args.port),
+         "--workers", str(args.workers)],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_ready(base)
+
+        def query(video_id):
+            # A new connection per request, so the kernel spreads them over workers
+            response = requests.post(f"{base}/query_batch", json={
+                "video_id": video_id, "queries": ["how does it work"], "top_k": 5, "rerank_top_k": 1})
+            response.raise_for_status()
+
+        video_ids = [f"video{i}" for i in range(args.videos)]
+        deadline = time.perf_counter() + 300
+        with ThreadPoolExecutor(args.workers * 2) as pool:
+            while True:
+                list(pool.map(query, video_ids * args.workers))
+                report = requests.get(f"{base}/workers").json()
+                workers = [w for w in report['workers'] if w['role'] == "query"]
+                loaded = [w.get('indexes_loaded', 0) for w in workers]
+                if (len(workers) == args.workers and min(loaded) == args.videos) or time.perf_counter() > deadline:
+                    break
+                time.sleep(1)
+        return {
+            'workers': [{'pid': w['pid'], 'indexes_loaded': w['indexes_loaded'],
+                         **{key.replace('_bytes', '_mib'): round(value / 2**20, 1)
+                            for key, value in w['memory'].items()}}
+                        for w in workers],
+            'total_rss_mib': round(sum(w['memory'].get('rss_bytes', 0) for w in workers) / 2**20, 1),
+            'total_pss_mib': round(sum(w['memory'].get('pss_bytes', 0) for w in workers) / 2**20, 1)
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--videos", type=int, default=8)
+    parser.add_argument("--hours", type=float, default=10.0, help="content per video")
+    parser.add_argument("--port", type=int, default=8768)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="video_rag_workers_")
+    os.chdir(workdir)
+    indexer = MultiVectorIndexer(corpus_enabled=False)
+    for i in range(args.videos):
+        indexer.create_index(make_video_segments(args.hours * 3600, seed=i), f"video{i}")
+    index_bytes = sum(os.path.getsize(os.path.join(INDEX_DIR, name))
+                      for name in os.listdir(INDEX_DIR) if name.endswith('.index'))
+
+    report = {'workers': args.workers, 'videos': args.videos,
+              'index_mib': round(index_bytes / 2**20, 1), 'results': {}}
+    for name, mmap in (('mmap', True), ('private', False)):
+        print(f"{name}...", file=sys.stderr)
+        report['results'][name] = run_pool(args, workdir, mmap)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Compare single-call and parallel windowed Whisper transcription.
+
+Reports wall time for both modes and the timestamp drift of words that the
+two transcriptions agree on (matched with difflib on normalized words).
+
+Usage: python -m benchmarks.parallel_transcription AUDIO [--model base] [--workers 4]
+"""
+
+import argparse
+import difflib
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.processing.video_processor import VideoProcessor, _transcribe_in_worker
+
+
+def words_of(transcription):
+    return [word for segment in transcription['segments'] for word in segment.get('words', [])]
+
+
+def normalize(word):
+    return re.sub(r"[^\w']", "", word['word'].lower())
+
+
+def timestamp_drift(reference, candidate):
+    """Start-time differences (seconds) over words matched in both transcriptions"""
+    ref_words, cand_words = words_of(reference), words_of(candidate)
+    matcher = difflib.SequenceMatcher(a=[normalize(w) for w in ref_words],
+                                      b=[normalize(w) for w in cand_words], autojunk=False)
+    drift = []
+    for block in matcher.get_matching_blocks():
+        for offset in range(block.size):
+            drift.append(abs(ref_words[block.a + offset]['start'] - cand_words[block.b + offset]['start']))
+    matched = len(drift)
+    drift = np.array(drift) if drift else np.zeros(1)
+    return {
+        'reference_words': len(ref_words),
+        'candidate_words': len(cand_words),
+        'matched_ratio': matched / max(1, len(ref_words)),
+        'mean_drift_s': float(drift.mean()),
+        'p95_drift_s': float(np.percentile(drift, 95)),
+        'max_drift_s': float(drift.max())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("audio")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--window", type=float, default=300.0, help="target window length in seconds")
+    parser.add_argument("--overlap", type=float, default=2.0)
+    args = parser.parse_args()
+
+    processor = VideoProcessor(args.model, transcribe_workers=args.workers,
+                               window_seconds=args.window, overlap_seconds=args.overlap)
+    # Warm up every worker so model loading is not timed
+    warmup = np.zeros(16000, dtype=np.float32)
+    list(processor.transcribe_pool.map(_transcribe_in_worker, [warmup] * args.workers, [{}] * args.workers))
+
+    start = time.perf_counter()
+    single = processor.transcribe_audio(args.audio, mode="single")
+    single_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel = processor.transcribe_audio(args.audio, mode="parallel")
+    parallel_seconds = time.perf_counter() - start
+    processor.shutdown()
+
+    report = {
+        'audio': args.audio,
+        'model': args.model,
+        'workers': args.workers,
+        'single_seconds': single_seconds,
+        'parallel_seconds': parallel_seconds,
+        'speedup': single_seconds / parallel_seconds,
+        'single_segments': len(single['segments']),
+        'parallel_segments': len(parallel['segments']),
+        'drift': timestamp_drift(single, parallel)
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Reranking latency and quality: per-request predict vs batched, cached and pruned.
+
+Retrieves top_k candidates for a stream of questions (a fraction of them
+repeated, as users of a popular video do) and reranks them from concurrent
+threads with:
+
+  per_request   CrossEncoder.predict on every pair of every request (the
+                previous behaviour)
+  batched       pairs of concurrent requests merged into shared forward passes
+  cached        batched plus the LRU pair score cache
+  pruned        cached plus dropping candidates far below the dense leader
+
+Quality is NDCG@rerank_top_k against the per_request ranking, with graded
+relevance rerank_top_k - rank for its top results.
+
+Usage: python -m benchmarks.reranking [--queries 400] [--workers 8] [--prune-margin 0.35]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.processing.indexer import MultiVectorIndexer
+from app.processing.reranker import Reranker
+from benchmarks.synthetic import make_queries, make_video_segments
+
+
+def ndcg(ranking, reference, k):
+    gains = {segment_id: k - rank for rank, segment_id in enumerate(reference[:k])}
+    dcg = sum(gains.get(s, 0) / np.log2(i + 2) for i, s in enumerate(ranking[:k]))
+    ideal = sum(g / np.log2(i + 2) for i, g in enumerate(sorted(gains.values(), reverse=True)))
+    return dcg / ideal if ideal else 1.0
+
+
+def per_request(reranker):
+    def rerank(query, passages, min_candidates):
+        scores = reranker.model.predict([(query, p['text']) for p in passages])
+        for passage, score in zip(passages, scores):
+            passage['rerank_score'] = float(score)
+        return sorted(passages, key=lambda x: x['rerank_score'], reverse=True)
+    return rerank
+
+
+def run(rerank, workload, workers, rerank_top_k):
+    def one(item):
+        query, candidates = item
+        passages = [dict(c) for c in candidates]
+        start = time.perf_counter()
+        ranked = rerank(query, passages, rerank_top_k)[:rerank_top_k]
+        return time.perf_counter() - start, [p['segment_id'] for p in ranked]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        results = list(pool.map(one, workload))
+    seconds = time.perf_counter() - start
+    latencies = np.array([r[0] for r in results]) * 1000
+    return [r[1] for r in results], {
+        'latency_ms_p50': round(float(np.percentile(latencies, 50)), 2),
+        'latency_ms_p99': round(float(np.percentile(latencies, 99)), 2),
+        'queries_per_second': round(len(workload) / seconds, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hours", type=float, default=1.0)
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--repeat-rate", type=float, default=0.3, help="fraction of repeated questions")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--rerank-top-k", type=int, default=5)
+    parser.add_argument("--prune-margin", type=float, default=0.35)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="video_rag_rerank_"))
+    indexer = MultiVectorIndexer(corpus_enabled=False)
+    video_index = indexer.create_index(make_video_segments(args.hours * 3600, seed=0), "bench")
+
+    rng = random.Random(0)
+    queries = []
+    for query in make_queries(args.queries, seed=1):
+        queries.append(rng.choice(queries) if queries and rng.random() < args.repeat_rate else query)
+    workload = [(q, indexer.search(q, k=args.top_k, video_index=video_index)) for q in queries]
+
+    base = Reranker(cache_size=0)
+    base.warm_up()
+    configs = {
+        'per_request': per_request(base),
+        'batched': Reranker(cache_size=0).rerank,
+        'cached': Reranker().rerank,
+        'pruned': Reranker(prune_margin=args.prune_margin).rerank,
+    }
+    for name, rerank in configs.items():
+        if name != 'per_request':
+            rerank.__self__._model = base._model  # share the loaded model
+    # Warm up the model and thread pool outside the timed runs
+    run(configs['per_request'], workload[:args.workers], args.workers, args.rerank_top_k)
+
+    report = {'queries': args.queries, 'workers': args.workers, 'top_k': args.top_k,
+              'rerank_top_k': args.rerank_top_k, 'results': {}}
+    reference = None
+    for name, rerank in configs.items():
+        rankings, result = run(rerank, workload, args.workers, args.rerank_top_k)
+        if reference is None:
+            reference = rankings
+        result['ndcg'] = round(float(np.mean([ndcg(r, ref, args.rerank_top_k)
+                                               for r, ref in zip(rankings, reference)])), 4)
+        if name != 'per_request':
+            result.update(rerank.__self__.stats())
+        report['results'][name] = result
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
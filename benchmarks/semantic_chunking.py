@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for VideoProcessor.semantic_chunking on a synthetic transcript.
+
+Compares the original per-segment implementation (full en_core_web_sm
+pipeline, one nlp() call and one VideoSegment per Whisper segment) with the
+batched SemanticChunker, and checks that both produce identical chunks.
+
+Usage: python -m benchmarks.semantic_chunking [--hours 2] [--splitter parser] [--n-process 1]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import spacy
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.processing.video_processor import SemanticChunker, VideoSegment, load_sentence_splitter
+from benchmarks.synthetic import make_transcript
+
+
+def legacy_semantic_chunking(nlp, transcription, max_words=150):
+    """semantic_chunking as it was before batching, kept as the reference"""
+    segments = [VideoSegment(text=s['text'].strip(), start=s['start'], end=s['end'], segment_id=i)
+                for i, s in enumerate(transcription['segments'])]
+    semantic_segments, current_segment = [], []
+    current_start = current_end = segment_id = 0
+    for segment in segments:
+        for sentence in [sent.text.strip() for sent in nlp(segment.text).sents]:
+            words = sentence.split()
+            if len(current_segment) + len(words) > max_words and current_segment:
+                semantic_segments.append(VideoSegment(text=" ".join(current_segment), start=current_start,
+                                                      end=current_end, segment_id=segment_id))
+                segment_id += 1
+                current_segment = []
+            if not current_segment:
+                current_start = segment.start
+            current_segment.append(sentence)
+            current_end = segment.end
+    if current_segment:
+        semantic_segments.append(VideoSegment(text=" ".join(current_segment), start=current_start,
+                                              end=current_end, segment_id=segment_id))
+    return semantic_segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hours", type=float, default=2.0)
+    parser.add_argument("--splitter", default="parser", choices=["parser", "sentencizer"])
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--n-process", type=int, default=1)
+    args = parser.parse_args()
+
+    transcription = make_transcript(args.hours * 3600, seed=0)
+
+    full_nlp = spacy.load("en_core_web_sm")
+    start = time.perf_counter()
+    expected = legacy_semantic_chunking(full_nlp, transcription)
+    legacy_seconds = time.perf_counter() - start
+
+    nlp = load_sentence_splitter(args.splitter)
+    start = time.perf_counter()
+    chunker = SemanticChunker(nlp, batch_size=args.batch_size, n_process=args.n_process)
+    chunks = list(chunker.feed(transcription['segments'])) + chunker.flush()
+    batched_seconds = time.perf_counter() - start
+
+    report = {
+        'hours': args.hours,
+        'whisper_segments': len(transcription['segments']),
+        'splitter': args.splitter,
+        'n_process': args.n_process,
+        'legacy_seconds': legacy_seconds,
+        'batched_seconds': batched_seconds,
+        'speedup': legacy_seconds / batched_seconds,
+        'chunks': len(chunks),
+        'identical_to_legacy': [c.dict() for c in chunks] == [c.dict() for c in expected]
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+API startup time per deployment role.
+
+Starts the backend under uvicorn once per VIDEO_RAG_ROLE in an empty working
+directory and measures how long it takes until /health answers (the process
+accepts requests) and until /ready returns 200 (every model of that role is
+loaded). Prints one JSON record per role.
+
+Usage: python -m benchmarks.startup_time [--roles all ingest query] [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_for(url, deadline, status=200):
+    while time.perf_counter() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == status:
+                return time.perf_counter()
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(url)
+
+
+def measure(role, port, timeout):
+    env = dict(os.environ, VIDEO_RAG_ROLE=role, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.getenv("PYTHONPATH")])))
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.backend.main:app", "--port", str(port)],
+        cwd=tempfile.mkdtemp(prefix="video_rag_startup_"), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = start + timeout
+        live = wait_for(f"http://127.0.0.1:{port}/health", deadline)
+        ready = wait_for(f"http://127.0.0.1:{port}/ready", deadline)
+        models = requests.get(f"http://127.0.0.1:{port}/ready").json()["models"]
+        return live - start, ready - start, models
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--roles", nargs="+", default=["all", "ingest", "query"])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    for role in args.roles:
+        live, ready, models = [], [], {}
+        for _ in range(args.runs):
+            live_seconds, ready_seconds, models = measure(role, args.port, args.timeout)
+            live.append(live_seconds)
+            ready.append(ready_seconds)
+        print(json.dumps({
+            "role": role,
+            "runs": args.runs,
+            "seconds_to_live": round(statistics.median(live), 3),
+            "seconds_to_ready": round(statistics.median(ready), 3),
+            "model_load_seconds": {name: status["load_seconds"] for name, status in models.items()}
+        }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Time to first byte of /query versus the streaming /query/stream endpoint.
+
+Indexes a synthetic video in a scratch directory, starts a local mock LLM
+(benchmarks.mock_llm_server) and the backend under uvicorn pointed at it,
+then times each query three ways: first byte of the response, first answer
+token, and the complete answer. /query only responds once the whole
+completion is in; /query/stream sends the segments immediately.
+
+Usage: python -m benchmarks.streaming_ttfb [--queries 20] [--first-token-ms 300] [--token-ms 20]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+
+from app.processing.indexer import MultiVectorIndexer
+from benchmarks.mock_llm_server import MockLLMServer
+from benchmarks.synthetic import make_queries, make_video_segments
+
+
+def iter_events(response):
+    """(event, data) pairs of a server-sent event stream, as they arrive"""
+    buffer = ""
+    for chunk in response.iter_content(chunk_size=None, decode_unicode=True):
+        buffer += chunk
+        while "\n\n" in buffer:
+            message, buffer = buffer.split("\n\n", 1)
+            fields = dict(line.split(": ", 1) for line in message.splitlines())
+            yield fields["event"], json.loads(fields["data"])
+
+
+def time_blocking(url, body):
+    start = time.perf_counter()
+    response = requests.post(url, json=body, stream=True)
+    next(response.iter_content(chunk_size=1))
+    first_byte = time.perf_counter() - start
+    response.content
+    total = time.perf_counter() - start
+    return first_byte, total, total
+
+
+def time_streaming(url, body):
+    start = time.perf_counter()
+    first_byte = first_token = None
+    with requests.post(url, json=body, stream=True) as response:
+        for event, _ in iter_events(response):
+            now = time.perf_counter() - start
+            if first_byte is None:
+                first_byte = now
+            if event == "token" and first_token is None:
+                first_token = now
+    return first_byte, first_token, time.perf_counter() - start
+
+
+def summarize(samples):
+    return {
+        name: round(statistics.median(s[i] for s in samples) * 1000, 1)
+        for i, name in enumerate(("ttfb_ms", "first_token_ms", "total_ms"))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=3600, help="seconds of content in the video")
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=20)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="video_rag_stream_")
+    os.chdir(workdir)
+    MultiVectorIndexer(corpus_enabled=False).create_index(make_video_segments(args.duration, seed=0), "video000")
+
+    llm = MockLLMServer(first_token_seconds=args.first_token_ms / 1000, token_seconds=args.token_ms / 1000).start()
+    # Both endpoints get the same body, so the answer cache would serve the
+    # stream from the /query answer without calling the LLM, and the rerank
+    # cache would skip the stream's reranking
+    env = dict(os.environ, VIDEO_RAG_ROLE="query", CORPUS_INDEX="0", ANSWER_CACHE="0", RERANK_CACHE_SIZE="0",
+               LLM_BASE_URL=llm.url, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.getenv("PYTHONPATH")])))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.backend.main:app", "--port", str(args.port)],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        deadline = time.perf_counter() + 600
+        while time.perf_counter() < deadline:
+            try:
+                if requests.get(f"{base}/ready", timeout=1).status_code == 200:
+                    break
+            except requests.exceptions.RequestException:
+                pass
+            time.sleep(0.1)
+
+        blocking, streaming = [], []
+        for query in make_queries(args.queries, seed=1):
+            body = {"video_id": "video000", "query": query, "top_k": 10, "rerank_top_k": 5}
+            blocking.append(time_blocking(f"{base}/query", body))
+            streaming.append(time_streaming(f"{base}/query/stream", body))
+    finally:
+        server.terminate()
+        server.wait()
+        llm.shutdown()
+
+    print(json.dumps({
+        "queries": args.queries,
+        "llm_first_token_ms": args.first_token_ms,
+        "llm_token_ms": args.token_ms,
+        "query": summarize(blocking),
+        "query_stream": summarize(streaming)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite: every pipeline stage at several corpus sizes, as JSON.
+
+Runs without network access. Transcripts come from benchmarks.synthetic,
+audio from a generated WAV fixture (or --audio), and LLM answers from
+benchmarks.mock_llm_server. For each corpus size (default 10 min, 1 h and
+10 h of content) it measures:
+
+  ingest   semantic chunking, embedding, FAISS and BM25 build, save (from the
+           metrics spans); Whisper runs once on the audio fixture, since its
+           cost scales with audio length rather than with the corpus
+  search   dense and hybrid MultiVectorIndexer.search latency (and
+           hierarchical, with --hierarchical), search_batch
+  rerank   Reranker.rerank latency on the retrieved candidates
+  api      /query, /query/stream and /query_batch through uvicorn against the
+           mock LLM, with per-stage server times from the Server-Timing header
+
+The report records the git commit it ran on; compare two reports with
+benchmarks.compare.
+
+Usage: python -m benchmarks.suite [--sizes 600,3600,36000] [--queries 50] [--hierarchical] [--output report.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+
+from app.processing import metrics
+from app.processing.indexer import MultiVectorIndexer
+from app.processing.reranker import Reranker
+from app.processing.video_processor import SAMPLE_RATE, VideoProcessor, load_audio
+from benchmarks.llm_client_load import MockServerProcess
+from benchmarks.streaming_ttfb import iter_events
+from benchmarks.synthetic import make_audio_fixture, make_queries, make_transcript
+
+
+def latency_summary(seconds):
+    latencies = np.array(seconds) * 1000
+    return {
+        'latency_ms_p50': round(float(np.percentile(latencies, 50)), 2),
+        'latency_ms_p99': round(float(np.percentile(latencies, 99)), 2),
+        'queries_per_second': round(len(latencies) / latencies.sum() * 1000, 1)
+    }
+
+
+def timed(fn, items):
+    fn(items[0])  # warm-up, not timed
+    seconds = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        seconds.append(time.perf_counter() - start)
+    return latency_summary(seconds)
+
+
+def stage_seconds(before, pipeline):
+    """Seconds per stage of one pipeline recorded since the before snapshot"""
+    stages = {}
+    for (name, stage), (count, total) in metrics.STAGE_SECONDS.totals().items():
+        if name == pipeline:
+            seconds = total - before.get((name, stage), (0, 0.0))[1]
+            if seconds > 0:
+                stages[f"{stage}_seconds"] = round(seconds, 4)
+    return stages
+
+
+def server_timing(header):
+    return {name: float(dur.split("=", 1)[1]) for name, dur in
+            (entry.strip().split(";", 1) for entry in header.split(",") if ";" in entry)}
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+        return {'commit': commit, 'dirty': dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+
+
+def bench_transcription(processor, audio_path):
+    seconds_of_audio = len(load_audio(audio_path)) / SAMPLE_RATE
+    processor.warm_up()
+    start = time.perf_counter()
+    transcription = processor.transcribe_audio(audio_path)
+    seconds = time.perf_counter() - start
+    return {
+        'audio': os.path.basename(audio_path),
+        'audio_seconds': round(seconds_of_audio, 1),
+        'transcribe_seconds': round(seconds, 3),
+        'realtime_factor': round(seconds_of_audio / seconds, 2) if seconds > 0 else None,
+        'whisper_segments': len(transcription['segments'])
+    }
+
+
+def bench_ingest(processor, indexer, duration, video_id, seed):
+    transcript = make_transcript(duration, seed=seed)
+    before = metrics.STAGE_SECONDS.totals()
+    start = time.perf_counter()
+    with metrics.span("ingest", "chunk"):
+        segments = processor.semantic_chunking(transcript)
+    video_index = indexer.create_index(segments, video_id)
+    seconds = time.perf_counter() - start
+    result = {'whisper_segments': len(transcript['segments']), 'chunks': len(segments),
+              'total_seconds': round(seconds, 3),
+              'content_seconds_per_second': round(duration / seconds, 1)}
+    result.update(stage_seconds(before, "ingest"))
+    return video_index, result
+
+
+def bench_search(indexer, video_index, queries, top_k):
+    result = {}
+    modes = ("dense", "hybrid", "hierarchical") if indexer.hierarchical else ("dense", "hybrid")
+    for mode in modes:
+        result[mode] = timed(lambda q: indexer.search(q, k=top_k, video_index=video_index, mode=mode), queries)
+    start = time.perf_counter()
+    indexer.search_batch(queries, k=top_k, video_index=video_index)
+    seconds = time.perf_counter() - start
+    result['batch'] = {'queries_per_second': round(len(queries) / seconds, 1)}
+    return result
+
+
+def bench_rerank(reranker, indexer, video_index, queries, top_k, rerank_top_k):
+    candidates = [indexer.search(q, k=top_k, video_index=video_index) for q in queries]
+    return timed(lambda item: reranker.rerank(item[0], item[1], rerank_top_k), list(zip(queries, candidates)))
+
+
+def bench_api(base, video_id, queries, top_k, rerank_top_k):
+    result = {}
+    body = {"video_id": video_id, "top_k": top_k, "rerank_top_k": rerank_top_k}
+
+    seconds, stages = [], {}
+    for query in queries:
+        start = time.perf_counter()
+        response = requests.post(f"{base}/query", json=dict(body, query=query))
+        response.raise_for_status()
+        seconds.append(time.perf_counter() - start)
+        for stage, ms in server_timing(response.headers.get("Server-Timing", "")).items():
+            stages.setdefault(stage, []).append(ms)
+    result['query'] = latency_summary(seconds)
+    result['query']['server_ms'] = {stage: round(float(np.mean(ms)), 2) for stage, ms in stages.items()}
+
+    first_bytes, totals = [], []
+    for query in queries:
+        start = time.perf_counter()
+        first_byte = None
+        with requests.post(f"{base}/query/stream", json=dict(body, query=query), stream=True) as response:
+            response.raise_for_status()
+            for _ in iter_events(response):
+                if first_byte is None:
+                    first_byte = time.perf_counter() - start
+        first_bytes.append(first_byte)
+        totals.append(time.perf_counter() - start)
+    result['query_stream'] = latency_summary(totals)
+    result['query_stream']['ttfb_ms_p50'] = round(float(np.percentile(first_bytes, 50)) * 1000, 2)
+
+    for generate_answers in (False, True):
+        start = time.perf_counter()
+        response = requests.post(f"{base}/query_batch", json=dict(body, queries=queries,
+                                                                  generate_answers=generate_answers))
+        response.raise_for_status()
+        seconds = time.perf_counter() - start
+        name = 'query_batch_answers' if generate_answers else 'query_batch'
+        result[name] = {'queries_per_second': round(len(queries) / seconds, 1)}
+    return result
+
+
+def wait_ready(base, timeout=600):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if requests.get(f"{base}/ready", timeout=1).status_code == 200:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("backend did not become ready")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="600,3600,36000", help="seconds of content per corpus size")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--rerank-top-k", type=int, default=5)
+    parser.add_argument("--audio", help="local audio file to transcribe (default: generated fixture)")
+    parser.add_argument("--audio-seconds", type=float, default=120, help="length of the generated fixture")
+    parser.add_argument("--whisper-model", default="base")
+    parser.add_argument("--skip-transcription", action="store_true")
+    parser.add_argument("--skip-api", action="store_true")
+    parser.add_argument("--hierarchical", action="store_true",
+                        help="also build section and sentence indexes (HIERARCHICAL_INDEX=1)")
+    parser.add_argument("--first-token-ms", type=float, default=100)
+    parser.add_argument("--token-ms", type=float, default=2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--llm-port", type=int, default=8012)
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+    sizes = [float(s) for s in args.sizes.split(",")]
+    output_path = os.path.abspath(args.output) if args.output else None
+    audio_path = os.path.abspath(args.audio) if args.audio else None
+
+    workdir = tempfile.mkdtemp(prefix="video_rag_suite_")
+    os.chdir(workdir)
+    report = {
+        'started_at': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        **git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'inference_backend': os.getenv("INFERENCE_BACKEND", "torch"),
+        'args': vars(args),
+        'sizes': {}
+    }
+
+    processor = VideoProcessor(args.whisper_model)
+    if not args.skip_transcription:
+        audio = audio_path or make_audio_fixture(os.path.join(workdir, "fixture.wav"), args.audio_seconds)
+        report['transcription'] = bench_transcription(processor, audio)
+    processor.nlp
+
+    # No embedding cache, so every size is embedded cold
+    indexer = MultiVectorIndexer(corpus_enabled=False, hierarchical=args.hierarchical)
+    reranker = Reranker(cache_size=0)
+    indexer.warm_up()
+    reranker.warm_up()
+    queries = make_queries(args.queries, seed=1)
+
+    video_ids = {}
+    for i, duration in enumerate(sizes):
+        video_id = video_ids[duration] = f"synthetic{int(duration)}s"
+        print(f"Corpus size {duration:.0f}s...", file=sys.stderr)
+        video_index, ingest = bench_ingest(processor, indexer, duration, video_id, seed=i)
+        report['sizes'][video_id] = {
+            'content_seconds': duration,
+            'ingest': ingest,
+            'search': bench_search(indexer, video_index, queries, args.top_k),
+            'rerank': bench_rerank(reranker, indexer, video_index, queries, args.top_k, args.rerank_top_k)
+        }
+
+    if not args.skip_api:
+        llm = MockServerProcess(args, args.llm_port)
+        env = dict(os.environ, VIDEO_RAG_ROLE="query", CORPUS_INDEX="0", ANSWER_CACHE="0",
+                   RERANK_CACHE_SIZE="0", LLM_BASE_URL=llm.url,
+                   PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.getenv("PYTHONPATH")])))
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.backend.main:app", "--port", str(args.port)],
+            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        base = f"http://127.0.0.1:{args.port}"
+        try:
+            wait_ready(base)
+            for duration, video_id in video_ids.items():
+                print(f"API at {duration:.0f}s...", file=sys.stderr)
+                report['sizes'][video_id]['api'] = bench_api(base, video_id, queries, args.top_k,
+                                                             args.rerank_top_k)
+        finally:
+            server.terminate()
+            server.wait()
+            llm.stop()
+
+    output = json.dumps(report, indent=2)
+    if output_path:
+        with open(output_path, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
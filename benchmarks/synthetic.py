@@ -0,0 +1,121 @@
+"""
+Deterministic synthetic transcripts for offline benchmarks
+"""
+
+import random
+from typing import Dict, List
+
+FILLER = (
+    "the a of and to in is that it for on with as this was we you are be "
+    "at have from or one had by but not what all were when there can an "
+    "your which their said if do will each about how up out them then"
+).split()
+
+TOPICS = [
+    "neural network gradient descent backpropagation layer weight activation",
+    "photosynthesis chlorophyll sunlight glucose carbon dioxide leaf plant",
+    "renaissance painting florence perspective fresco patron sculpture",
+    "volcano magma tectonic plate eruption lava crust earthquake",
+    "compiler parser token grammar syntax tree bytecode optimizer",
+    "orchestra violin symphony conductor tempo harmony melody",
+    "blockchain ledger consensus miner hash transaction wallet",
+    "galaxy telescope nebula supernova orbit gravity redshift",
+]
+
+WORDS_PER_SECOND = 2.5
+
+
+def make_sentence(rng: random.Random, topic_words: List[str]) -> str:
+    length = rng.randint(6, 20)
+    words = [rng.choice(topic_words) if rng.random() < 0.3 else rng.choice(FILLER)
+             for _ in range(length)]
+    words[0] = words[0].capitalize()
+    return " ".join(words) + "."
+
+
+def make_transcript(duration_seconds: float, seed: int = 0, topic: int = None) -> Dict:
+    """Build a Whisper-style transcription dict covering duration_seconds.
+
+    Each segment holds one or two sentences with word-level timestamps.
+    The topic vocabulary rotates every ~5 minutes unless a topic is fixed.
+    """
+    rng = random.Random(seed)
+    segments = []
+    t = 0.0
+    while t < duration_seconds:
+        topic_index = topic if topic is not None else int(t // 300) % len(TOPICS)
+        topic_words = TOPICS[topic_index].split()
+        text = " ".join(make_sentence(rng, topic_words) for _ in range(rng.randint(1, 2)))
+        words = []
+        start = t
+        for word in text.split():
+            duration = len(word) / (5 * WORDS_PER_SECOND) + 0.05
+            words.append({'word': " " + word, 'start': round(t, 2), 'end': round(t + duration, 2)})
+            t += duration
+        segments.append({
+            'id': len(segments),
+            'start': round(start, 2),
+            'end': round(t, 2),
+            'text': " " + text,
+            'words': words
+        })
+        t += rng.uniform(0.1, 0.6)
+    return {
+        'text': "".join(seg['text'] for seg in segments),
+        'segments': segments,
+        'language': 'en'
+    }
+
+
+def make_queries(n: int, seed: int = 0, topic: int = None) -> List[str]:
+    """Questions drawn from the synthetic topic vocabularies"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        topic_words = TOPICS[topic if topic is not None else rng.randrange(len(TOPICS))].split()
+        queries.append("What does the video say about " + " and ".join(rng.sample(topic_words, 2)) + "?")
+    return queries
+
+
+def make_video_segments(duration_seconds: float, seed: int = 0, topic: int = None):
+    """Synthetic transcript segments as VideoSegment objects, one per Whisper segment"""
+    from app.processing.video_processor import VideoSegment
+
+    transcript = make_transcript(duration_seconds, seed=seed, topic=topic)
+    return [
+        VideoSegment(text=seg['text'].strip(), start=seg['start'], end=seg['end'], segment_id=i)
+        for i, seg in enumerate(transcript['segments'])
+    ]
+
+
+def make_audio_fixture(path: str, duration_seconds: float, seed: int = 0, sample_rate: int = 16000) -> str:
+    """Write a 16-bit mono WAV of speech-like tone bursts separated by pauses.
+
+    Bursts are 0.3-3 s of a few harmonics under a syllable-rate envelope,
+    pauses 0.2-0.9 s of faint noise, so silence-based windowing has real
+    cut points. Whisper will not find words in it; it is for timing only.
+    """
+    import wave
+
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    pieces = []
+    total = 0
+    while total < duration_seconds * sample_rate:
+        n = int(rng.uniform(0.3, 3.0) * sample_rate)
+        t = np.arange(n) / sample_rate
+        pitch = rng.uniform(90, 220)
+        tone = sum(np.sin(2 * np.pi * pitch * h * t) / h for h in (1, 2, 3, 4))
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(3, 6) * t) ** 2
+        pieces.append(0.2 * tone * envelope)
+        pause = int(rng.uniform(0.2, 0.9) * sample_rate)
+        pieces.append(rng.normal(0, 0.002, pause))
+        total += n + pause
+    audio = np.concatenate(pieces)[:int(duration_seconds * sample_rate)]
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((np.clip(audio, -1, 1) * 32767).astype("<i2").tobytes())
+    return path
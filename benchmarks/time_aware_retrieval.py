@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Time-range filtering and neighbour expansion versus naive top_k widening.
+
+Time ranges: each query is restricted to a random span of the video (the
+first --range-minutes in a quarter of them, like "in the first 10 minutes").
+The filtered search (sorted interval index + FAISS ID selector) is exact, so
+it is the reference; naive widening searches k * factor results and drops
+those outside the span, and reports how many of the reference top-k it
+still finds.
+
+Context: neighbors=1 with merge_adjacent widens each hit to the segments
+around it and joins overlapping windows. The naive alternative retrieves
+3 * k hits instead. Both are scored by how many of the hits' neighbouring
+segments reach the reranker/LLM, how many passages they send and how many
+words those passages hold (the token budget).
+
+Usage: python -m benchmarks.time_aware_retrieval [--hours 2] [--queries 300] [--k 5]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.processing.indexer import MultiVectorIndexer
+from benchmarks.synthetic import make_queries, make_video_segments
+
+
+def timed(fn, items):
+    seconds, outputs = [], []
+    for item in items:
+        start = time.perf_counter()
+        outputs.append(fn(item))
+        seconds.append(time.perf_counter() - start)
+    latencies = np.array(seconds) * 1000
+    return outputs, {'latency_ms_p50': round(float(np.percentile(latencies, 50)), 3),
+                     'latency_ms_p99': round(float(np.percentile(latencies, 99)), 3)}
+
+
+def words(results):
+    return sum(len(r['text'].split()) for r in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hours", type=float, default=2.0)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--range-minutes", type=float, default=10.0)
+    parser.add_argument("--widen", default="2,4,8,16", help="naive top_k widening factors")
+    args = parser.parse_args()
+    k = args.k
+
+    os.chdir(tempfile.mkdtemp(prefix="video_rag_time_"))
+    indexer = MultiVectorIndexer(corpus_enabled=False)
+    segments = make_video_segments(args.hours * 3600, seed=0)
+    video_index = indexer.create_index(segments, "bench")
+    duration = segments[-1].end
+
+    rng = random.Random(0)
+    span = args.range_minutes * 60
+    workload = []
+    for query in make_queries(args.queries, seed=1):
+        start = 0.0 if rng.random() < 0.25 else rng.uniform(0, max(0.0, duration - span))
+        workload.append((query, (start, start + span)))
+    # Warm up the model and interval index outside the timed runs
+    indexer.search(workload[0][0], k=k, video_index=video_index, time_range=workload[0][1])
+
+    report = {'segments': len(segments), 'queries': args.queries, 'k': k,
+              'range_minutes': args.range_minutes, 'time_range': {}, 'context': {}}
+
+    # Time-range filtering
+    reference, result = timed(lambda item: indexer.search(item[0], k=k, video_index=video_index,
+                                                          time_range=item[1]), workload)
+    result['recall'] = 1.0
+    report['time_range']['filtered'] = result
+    for factor in (int(f) for f in args.widen.split(",")):
+        def naive(item):
+            query, (start, end) = item
+            hits = indexer.search(query, k=k * factor, video_index=video_index)
+            return [h for h in hits if h['end_time'] > start and h['start_time'] < end][:k]
+        outputs, result = timed(naive, workload)
+        found = [len({h['segment_id'] for h in out} & {h['segment_id'] for h in ref}) / max(1, len(ref))
+                 for out, ref in zip(outputs, reference)]
+        result['recall'] = round(float(np.mean(found)), 4)
+        report['time_range'][f'naive_top{k * factor}'] = result
+
+    # Neighbour context
+    queries = [query for query, _ in workload]
+    hits = [indexer.search(q, k=k, video_index=video_index) for q in queries]
+    wanted = [{s for h in hs for s in range(h['segment_id'] - 1, h['segment_id'] + 2) if 0 <= s < len(segments)}
+              for hs in hits]
+
+    def context_report(outputs, result):
+        covered = [len(w & {s for r in out for s in r.get('segment_ids', [r['segment_id']])}) / len(w)
+                   for out, w in zip(outputs, wanted)]
+        result.update({
+            'neighbour_coverage': round(float(np.mean(covered)), 4),
+            'passages': round(float(np.mean([len(out) for out in outputs])), 2),
+            'context_words': round(float(np.mean([words(out) for out in outputs])), 1)
+        })
+        return result
+
+    outputs, result = timed(lambda q: indexer.search(q, k=k, video_index=video_index), queries)
+    report['context'][f'top{k}'] = context_report(outputs, result)
+    outputs, result = timed(lambda q: indexer.search(q, k=k * 3, video_index=video_index), queries)
+    report['context'][f'naive_top{k * 3}'] = context_report(outputs, result)
+    outputs, result = timed(lambda q: indexer.search(q, k=k, video_index=video_index, neighbors=1), queries)
+    report['context'][f'top{k}_neighbors1'] = context_report(outputs, result)
+    outputs, result = timed(lambda q: indexer.search(q, k=k, video_index=video_index, neighbors=1,
+                                                     merge_adjacent=True), queries)
+    report['context'][f'top{k}_neighbors1_merged'] = context_report(outputs, result)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
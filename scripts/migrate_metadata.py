@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Convert per-video {video_id}_metadata.json files to binary .segments stores.
+
+Run from the directory that holds data/ (the backend's working directory):
+    python scripts/migrate_metadata.py [--index-dir data/indexes] [--remove-json]
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.processing.metadata_store import migrate_json_metadata
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--index-dir", default="data/indexes")
+    parser.add_argument("--remove-json", action="store_true",
+                        help="delete the JSON files once converted")
+    args = parser.parse_args()
+
+    migrated = migrate_json_metadata(args.index_dir, remove_json=args.remove_json)
+    for video_id in migrated:
+        print(f"Migrated {video_id}")
+    print(f"{len(migrated)} index(es) migrated")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 Test the complete system with a real YouTube video
 """
 
+import asyncio
 import sys
 import os
 sys.path.append('.')
@@ -52,7 +53,14 @@ def test_complete_system():
         
         if llm_client.api_key and llm_client.api_key != "your_actual_groq_api_key_here":
             context = llm_client.format_context(reranked[:2])
-            answer = llm_client.generate_answer("What is this video about?", context)
+            
+            async def ask():
+                try:
+                    return await llm_client.generate_answer("What is this video about?", context)
+                finally:
+                    await llm_client.aclose()
+            
+            answer = asyncio.run(ask())
             print(f"   ✓ LLM response: {answer[:100]}...")
         else:
             print("   ⚠️ LLM skipped - API key not configured")
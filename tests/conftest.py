@@ -0,0 +1,52 @@
+import hashlib
+import os
+import re
+import sys
+
+import numpy as np
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+class HashEmbedder:
+    """Bag-of-words unit vectors in place of the sentence-transformers model"""
+
+    dimension = 384
+
+    def encode(self, texts, **kwargs):
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                vectors[i, int(hashlib.md5(word.encode()).hexdigest(), 16) % self.dimension] += 1
+            norm = np.linalg.norm(vectors[i])
+            vectors[i] /= norm if norm else 1
+        return vectors
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """An empty working directory: indexes and caches live under ./data"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def make_indexer(workdir, monkeypatch):
+    """MultiVectorIndexer factory working in workdir, embedding with HashEmbedder"""
+    from app.processing import indexer
+    monkeypatch.setattr(indexer, "load_embedder", lambda model_name, backend=None: HashEmbedder())
+    return indexer.MultiVectorIndexer
+
+
+@pytest.fixture(scope="session")
+def backend(tmp_path_factory):
+    """app.backend.main as a query replica, imported in an empty directory"""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.chdir(tmp_path_factory.mktemp("backend"))
+        patch.setenv("VIDEO_RAG_ROLE", "query")
+        patch.setenv("CORPUS_INDEX", "0")
+        patch.setenv("EMBEDDING_CACHE", "0")
+        import app.backend.main as main
+    return main
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from benchmarks.mock_llm_server import MockLLMServer
+
+SEGMENTS = [{"video_id": "v0", "start_time": 0.0, "end_time": 5.0,
+             "text": "Gradient descent follows the slope downhill.", "rerank_score": 1.0}]
+
+
+class FirstResults:
+    def rerank(self, query, results, top_k):
+        return results[:top_k]
+
+
+@pytest.fixture
+def llm_server(monkeypatch):
+    server = MockLLMServer(first_token_seconds=0, token_seconds=0).start()
+    monkeypatch.setenv("LLM_BASE_URL", server.url)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def stream_events(backend, on_done):
+    async def collect():
+        try:
+            response = await backend.stream_query("What is gradient descent?", SEGMENTS, 1, on_done=on_done)
+            return [chunk async for chunk in response.body_iterator]
+        finally:
+            await backend.llm_client.aclose()
+    return [chunk.split("\n", 1)[0][len("event: "):] for chunk in asyncio.run(collect())]
+
+
+def test_stream_answer_raises_when_cut_off_after_first_token(backend, llm_server):
+    llm_server.drop_after_tokens = 1
+    client = backend.LLMClient(max_retries=0)
+    tokens = []
+
+    async def consume():
+        try:
+            async for token in client.stream_answer("What is gradient descent?", "context"):
+                tokens.append(token)
+        finally:
+            await client.aclose()
+
+    with pytest.raises(backend.AnswerStreamError):
+        asyncio.run(consume())
+    assert len(tokens) == 1
+    assert client.stats()["failures"] == 1
+
+
+def test_failed_stream_ends_with_error_and_is_not_stored(backend, llm_server, monkeypatch):
+    llm_server.drop_after_tokens = 1
+    monkeypatch.setattr(backend, "reranker", FirstResults())
+    monkeypatch.setattr(backend, "llm_client", backend.LLMClient(max_retries=0))
+    done = []
+    events = stream_events(backend, done.append)
+    assert events == ["segments", "token", "error"]
+    assert done == []
+
+
+def test_complete_stream_ends_with_done_and_is_stored(backend, llm_server, monkeypatch):
+    monkeypatch.setattr(backend, "reranker", FirstResults())
+    monkeypatch.setattr(backend, "llm_client", backend.LLMClient(max_retries=0))
+    done = []
+    events = stream_events(backend, done.append)
+    assert events[-1] == "done" and "error" not in events
+    assert len(done) == 1 and done[0].answer
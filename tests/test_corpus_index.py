@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.processing.corpus_index import CorpusIndex
+from benchmarks.synthetic import make_video_segments
+
+
+@pytest.mark.parametrize("path", ["/query_corpus", "/query_corpus/stream"])
+def test_disabled_corpus_is_not_served(backend, path):
+    # TestClient outside a with block: no startup, so no models are loaded
+    response = TestClient(backend.app).post(path, json={"query": "What is gradient descent?"})
+    assert response.status_code == 503
+    assert "CORPUS_INDEX=0" in response.json()["detail"]
+
+
+def test_first_ingest_is_added_once(make_indexer):
+    indexer = make_indexer()
+    segments = make_video_segments(300, seed=0)
+    indexer.create_index(segments, "v0")
+    assert indexer.corpus_stats() == {"videos": 1, "rows": len(segments), "live_rows": len(segments)}
+
+
+def test_backfill_then_re_add(make_indexer):
+    first, second = make_video_segments(300, seed=0), make_video_segments(200, seed=1)
+    make_indexer(corpus_enabled=False).create_index(first, "v0")
+
+    # The corpus is backfilled from v0's index on disk, then v1 is added
+    indexer = make_indexer()
+    indexer.create_index(second, "v1")
+    total = len(first) + len(second)
+    assert indexer.corpus_stats() == {"videos": 2, "rows": total, "live_rows": total}
+
+    # Re-indexing v0 leaves over half the rows dead, so the corpus is
+    # compacted; another process reads the result
+    kept = len(first) // 2
+    indexer.create_index(first[:kept], "v0")
+    live = len(second) + kept
+    assert indexer.corpus_stats() == {"videos": 2, "rows": live, "live_rows": live}
+    hits = make_indexer().search_corpus(first[-1].text, k=20)
+    assert hits and {hit["video_id"] for hit in hits} <= {"v0", "v1"}
+    assert all(hit["segment_id"] < kept for hit in hits if hit["video_id"] == "v0")
+
+
+def test_re_add_tombstones_until_compaction(tmp_path):
+    corpus = CorpusIndex(8, path=str(tmp_path), compact_dead_fraction=0.25)
+    rng = np.random.default_rng(0)
+    corpus.add_video("a", rng.random((100, 8)), save=False)
+    corpus.add_video("b", rng.random((300, 8)), save=False)
+
+    corpus.add_video("a", rng.random((100, 8)), save=False)
+    assert corpus.stats() == {"videos": 2, "rows": 500, "live_rows": 400}
+
+    replacement = rng.random((50, 8)).astype(np.float32)
+    corpus.add_video("b", replacement)
+    assert corpus.stats() == {"videos": 2, "rows": 150, "live_rows": 150}
+    reloaded = CorpusIndex(8, path=str(tmp_path))
+    assert reloaded.stats() == corpus.stats()
+    video_id, row, distance = reloaded.search(replacement[7], 1, ["b"])[0]
+    assert (video_id, row) == ("b", 7) and distance < 1e-6
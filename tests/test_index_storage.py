@@ -0,0 +1,57 @@
+import os
+import threading
+
+from app.processing.generations import Generations
+from benchmarks.synthetic import make_video_segments
+
+
+def generation_files(directory, prefix):
+    generations = Generations(str(directory), prefix)
+    return sorted({generations.generation_of(name) for name in os.listdir(directory)} - {None})
+
+
+def test_save_then_reload_in_another_process(make_indexer, workdir):
+    segments = make_video_segments(600, seed=0)
+    saved = make_indexer(corpus_enabled=False).create_index(segments, "v0")
+
+    loaded = make_indexer(corpus_enabled=False).get_index("v0")
+    assert loaded.index.ntotal == saved.index.ntotal == len(segments)
+    assert list(loaded.metadata.texts()) == [seg.text for seg in segments]
+    assert loaded.version == Generations("data/indexes", "v0").version()
+
+
+def test_saves_keep_two_generations_and_no_temporary_files(make_indexer, workdir):
+    indexer = make_indexer(corpus_enabled=False)
+    for seed in range(3):
+        indexer.create_index(make_video_segments(300, seed=seed), "v0")
+    names = os.listdir(workdir / "data" / "indexes")
+    assert len(generation_files(workdir / "data" / "indexes", "v0")) == 2
+    assert not [name for name in names if name.endswith(".tmp")]
+
+
+def test_readers_never_mix_generations(make_indexer):
+    writer, reader = make_indexer(corpus_enabled=False), make_indexer(corpus_enabled=False)
+    # Saves alternate between two sizes, so a mixed read shows as a length mismatch
+    versions = [make_video_segments(300, seed=0), make_video_segments(600, seed=1)]
+    writer.create_index(versions[0], "v0")
+    done = threading.Event()
+    errors = []
+
+    def read():
+        while not done.is_set():
+            try:
+                handle = reader.get_index("v0")
+                if handle.index.ntotal != len(handle.metadata):
+                    errors.append((handle.index.ntotal, len(handle.metadata)))
+            except Exception as e:
+                errors.append(e)
+
+    thread = threading.Thread(target=read)
+    thread.start()
+    try:
+        for i in range(30):
+            writer.create_index(versions[i % 2], "v0")
+    finally:
+        done.set()
+        thread.join()
+    assert errors == []
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.processing.video_processor import VideoSegment
+from benchmarks.synthetic import make_video_segments
+
+QUERY = "How is gradient descent used to train the network?"
+
+
+def overlaps(hit, start, end):
+    return hit["end_time"] > start and hit["start_time"] < end
+
+
+@pytest.fixture
+def video(make_indexer):
+    indexer = make_indexer(corpus_enabled=False)
+    return indexer, indexer.create_index(make_video_segments(1800, seed=0), "v0")
+
+
+@pytest.mark.parametrize("start, end", [(300, 600), (None, 120), (1500, None)])
+def test_dense_time_range_matches_filtered_exact_search(video, start, end):
+    indexer, video_index = video
+    hits = indexer.search(QUERY, k=10, video_index=video_index, time_range=(start, end))
+    everything = indexer.search(QUERY, k=len(video_index.metadata), video_index=video_index)
+    expected = [hit for hit in everything
+                if overlaps(hit, -np.inf if start is None else start, np.inf if end is None else end)][:10]
+    assert len(hits) == len(expected) == 10
+    assert np.allclose([hit["score"] for hit in hits], [hit["score"] for hit in expected])
+
+
+def test_non_contiguous_rows_and_empty_ranges(make_indexer):
+    # One long segment spans the short ones, so (52, 55) selects rows 0 and 5
+    segments = [VideoSegment(text="an overview of the whole lecture", start=0, end=100, segment_id=0)]
+    segments += [VideoSegment(text=f"part {i} covers topic number {i}", start=10 * i, end=10 * i + 10, segment_id=i)
+                 for i in range(1, 10)]
+    indexer = make_indexer(corpus_enabled=False)
+    video_index = indexer.create_index(segments, "v0")
+    for mode in ("dense", "hybrid"):
+        hits = indexer.search("topic number 5", k=5, video_index=video_index, mode=mode, time_range=(52, 55))
+        assert sorted(hit["segment_id"] for hit in hits) == [0, 5]
+        assert indexer.search("topic", k=5, video_index=video_index, mode=mode, time_range=(500, 600)) == []
+
+
+def test_neighbors_stay_inside_the_range(video):
+    indexer, video_index = video
+    hits = indexer.search(QUERY, k=5, video_index=video_index, time_range=(600, 900),
+                          neighbors=2, merge_adjacent=True)
+    spans = sorted((hit["start_time"], hit["end_time"]) for hit in hits)
+    assert hits and all(overlaps(hit, 600, 900) for hit in hits)
+    assert all(first[1] < second[0] for first, second in zip(spans, spans[1:]))
+
+
+@pytest.mark.parametrize("body", [{"start_time": 5, "end_time": 1}, {"neighbors": -1}])
+def test_invalid_options_are_rejected_before_the_index(backend, body):
+    # No such video: the 400 must come before the index and answer cache lookups
+    response = TestClient(backend.app).post("/query", json={"video_id": "missing", "query": QUERY, **body})
+    assert response.status_code == 400